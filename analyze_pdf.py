@@ -2,11 +2,26 @@
 # -*- coding: utf-8 -*-
 """
 PDF Form Analyzer - Analyzuje strukturu PDF formuláře
+
+Použití:
+    python analyze_pdf.py                  # template.pdf v aktuální složce
+    python analyze_pdf.py --corpus <složka> [--out inventar.json] [--cache cache.json] [--workers N]
+    python analyze_pdf.py --bench 2000     # benchmark korpusového režimu
 """
 
+import argparse
+import hashlib
+import io
+import json
+import logging
 import os
+import shutil
 import sys
-from typing import Dict, List, Any
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional, Set
 
 try:
     from pypdf import PdfReader
@@ -79,6 +94,7 @@ def analyze_pdf_form(pdf_path: str) -> None:
         # Zkontroluj anotace na stránkách
         total_annotations = 0
         widget_annotations = 0
+        seen_names = {field['name'] for field in form_fields}
         
         for page_num, page in enumerate(reader.pages):
             page_annotations = []
@@ -100,7 +116,8 @@ def analyze_pdf_form(pdf_path: str) -> None:
                             parent = annot_obj["/Parent"].get_object()
                             field_name = parent.get("/T", f"Widget_{widget_annotations}")
                         
-                        if field_name and not any(f['name'] == str(field_name) for f in form_fields):
+                        if field_name and str(field_name) not in seen_names:
+                            seen_names.add(str(field_name))
                             form_fields.append({
                                 'name': str(field_name),
                                 'type': 'Widget',
@@ -167,10 +184,254 @@ def analyze_pdf_form(pdf_path: str) -> None:
         print(f"❌ CHYBA při analýze PDF: {e}")
 
 
+# Výchozí cache korpusového režimu (výsledky podle sha256 obsahu)
+DEFAULT_CACHE = ".pdf_inventory_cache.json"
+# Verze formátu výsledku - změna zneplatní cache
+INVENTORY_VERSION = 1
+
+# sha256 souborů, které už jsou v cache (nastaví initializer workeru)
+_known_hashes: Set[str] = set()
+
+
+def _walk_fields(fields, stats: Dict[str, Any], inherited_type=None):
+    for field in fields:
+        field = field.get_object()
+        field_type = field.get('/FT', inherited_type)
+        kids = [kid for kid in field.get('/Kids', []) if '/T' in kid.get_object()]
+        if kids:
+            _walk_fields(kids, stats, field_type)
+            continue
+        stats['fields'] += 1
+        stats['types'][str(field_type or 'Neznámý').lstrip('/')] += 1
+        value = field.get('/V')
+        if value is not None and str(value) not in ('', '/Off'):
+            stats['filled'] += 1
+
+
+def inventory_pdf(pdf_path: str) -> Dict[str, Any]:
+    """
+    Souhrn jednoho PDF pro inventář korpusu (bez výpisu)
+
+    Returns:
+        dict: sha256, velikost, stránky, počty polí podle typu, počet
+        vyplněných polí a druh ('template' / 'filled' / 'no_form'),
+        případně 'error'
+    """
+    with open(pdf_path, 'rb') as f:
+        data = f.read()
+    sha = hashlib.sha256(data).hexdigest()
+    result: Dict[str, Any] = {'path': pdf_path, 'sha256': sha, 'size': len(data)}
+    if sha in _known_hashes:
+        result['cached'] = True
+        return result
+    try:
+        reader = PdfReader(io.BytesIO(data), strict=False)
+        stats: Dict[str, Any] = {'fields': 0, 'filled': 0, 'types': Counter()}
+        acroform = reader.trailer['/Root'].get('/AcroForm')
+        if acroform is not None:
+            _walk_fields(acroform.get_object().get('/Fields', []), stats)
+        result.update({
+            'pages': len(reader.pages),
+            'fields': stats['fields'],
+            'types': dict(stats['types']),
+            'filled': stats['filled'],
+            'kind': 'no_form' if not stats['fields'] else ('filled' if stats['filled'] else 'template'),
+        })
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _init_worker(known_hashes: Set[str]):
+    global _known_hashes
+    _known_hashes = known_hashes
+    # Varování pypdf o poškozených souborech jsou v inventáři jako 'error'
+    logging.getLogger('pypdf').setLevel(logging.ERROR)
+
+
+def _inventory_many(paths: List[str], known_hashes: Set[str],
+                    workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        _init_worker(known_hashes)
+        yield from map(inventory_pdf, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(known_hashes,)) as pool:
+        yield from pool.map(inventory_pdf, paths, chunksize=max(1, min(64, len(paths) // (workers * 4))))
+
+
+def iter_pdf_files(root: str) -> Iterator[str]:
+    """Rekurzivně projde složku a vrátí PDF soubory v seřazeném pořadí"""
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.pdf'):
+                yield os.path.join(directory, name)
+
+
+def load_cache(cache_path: Optional[str]) -> Dict[str, Any]:
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == INVENTORY_VERSION:
+            return cache
+    except (OSError, TypeError, ValueError):
+        pass
+    return {'version': INVENTORY_VERSION, 'files': {}, 'results': {}}
+
+
+def save_cache(cache_path: str, cache: Dict[str, Any]) -> None:
+    temp_path = f"{cache_path}.{os.getpid()}.part"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(temp_path, cache_path)
+
+
+def analyze_corpus(root: str, cache_path: Optional[str] = DEFAULT_CACHE,
+                   workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Zinventarizuje všechna PDF ve stromu složek
+
+    Soubor se stejnou velikostí a mtime jako při minulém běhu se vůbec
+    nečte; u změněného (nebo přejmenovaného) souboru se spočítá sha256
+    a znovu se analyzuje, jen pokud obsah v cache ještě není.
+
+    Args:
+        root (str): Kořenová složka korpusu
+        cache_path (str): Soubor cache (None = bez cache)
+        workers (int): Počet procesů (výchozí počet CPU)
+
+    Returns:
+        dict: Inventář {'root', 'files': [...], 'totals': {...}, 'stats': {...}}
+    """
+    started = time.perf_counter()
+    cache = load_cache(cache_path)
+    files, results = cache['files'], cache['results']
+    inventory: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for path in iter_pdf_files(root):
+        stat = os.stat(path)
+        known = files.get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns \
+                and known['sha256'] in results:
+            inventory[path] = {'path': path, **results[known['sha256']]}
+        else:
+            pending.append(path)
+        files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': None}
+
+    analyzed = 0
+    for result in _inventory_many(pending, set(results), workers):
+        path, sha = result.pop('path'), result['sha256']
+        if result.pop('cached', False):
+            result = results[sha]
+        else:
+            analyzed += 1
+            if 'error' not in result:
+                # Chyby se necachují - přechodné selhání se příště zkusí znovu
+                results[sha] = result
+        files[path]['sha256'] = sha
+        inventory[path] = {'path': path, **result}
+
+    # Smazané soubory z cache vypadnou
+    cache['files'] = {path: files[path] for path in inventory}
+    if cache_path:
+        save_cache(cache_path, cache)
+
+    entries = [inventory[path] for path in sorted(inventory)]
+    types: Counter = Counter()
+    for entry in entries:
+        types.update(entry.get('types', {}))
+    kinds = Counter(entry.get('kind', 'error') for entry in entries)
+    elapsed = time.perf_counter() - started
+    return {
+        'root': os.path.abspath(root),
+        'files': entries,
+        'totals': {
+            'files': len(entries),
+            'bytes': sum(entry['size'] for entry in entries),
+            'pages': sum(entry.get('pages', 0) for entry in entries),
+            'fields': sum(entry.get('fields', 0) for entry in entries),
+            'types': dict(types),
+            'kinds': dict(kinds),
+        },
+        'stats': {
+            'analyzed': analyzed,
+            'cached': len(entries) - analyzed,
+            'seconds': round(elapsed, 3),
+        },
+    }
+
+
+def benchmark_corpus(count: int, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Změří korpusový režim na count souborech (studený a teplý běh)
+
+    Korpus vznikne kopiemi PDF z aktuální složky; na konec každé kopie se
+    připíše komentář, aby měla jiný sha256 a cache ji nepřeskočila.
+    """
+    sources = [f for f in sorted(os.listdir('.')) if f.lower().endswith('.pdf')]
+    if not sources:
+        raise FileNotFoundError("Ve složce nejsou žádné PDF soubory pro benchmark")
+    root = tempfile.mkdtemp(prefix='pdf_corpus_')
+    try:
+        for i in range(count):
+            directory = os.path.join(root, f"{i // 500:03d}")
+            os.makedirs(directory, exist_ok=True)
+            source = sources[i % len(sources)]
+            target = os.path.join(directory, f"{i:06d}_{source}")
+            shutil.copyfile(source, target)
+            with open(target, 'ab') as f:
+                f.write(f"\n%bench {i}\n".encode('ascii'))
+        cache_path = os.path.join(root, 'cache.json')
+        cold = analyze_corpus(root, cache_path, workers)['stats']
+        warm = analyze_corpus(root, cache_path, workers)['stats']
+    finally:
+        shutil.rmtree(root)
+    return {
+        'files': count,
+        'workers': workers or os.cpu_count() or 1,
+        'cold_seconds': cold['seconds'],
+        'cold_files_per_second': round(count / cold['seconds'], 1) if cold['seconds'] else None,
+        'warm_seconds': warm['seconds'],
+        'warm_cached': warm['cached'],
+    }
+
+
+def corpus_main(args) -> None:
+    """Korpusový režim - inventář celého stromu složek do JSON"""
+    print(f"🔍 Inventarizuji PDF korpus: {args.corpus}")
+    inventory = analyze_corpus(args.corpus, None if args.no_cache else args.cache, args.workers)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(inventory, f, ensure_ascii=False, indent=2)
+    totals, stats = inventory['totals'], inventory['stats']
+    print(f"📄 Souborů: {totals['files']} ({totals['bytes']:,} bytů, {totals['pages']} stránek)")
+    print(f"📝 Polí celkem: {totals['fields']} {totals['types']}")
+    print(f"📊 Druhy: {totals['kinds']}")
+    print(f"⏱  {stats['seconds']} s (analyzováno {stats['analyzed']}, z cache {stats['cached']})")
+    print(f"✅ Inventář uložen: {args.out}")
+
+
 def main():
     """
     Hlavní funkce analyzátoru.
     """
+    parser = argparse.ArgumentParser(description="Analýza PDF formulářů")
+    parser.add_argument('--corpus', help="Složka s korpusem PDF (rekurzivní inventář)")
+    parser.add_argument('--out', default='pdf_inventory.json', help="Výstupní JSON inventáře")
+    parser.add_argument('--cache', default=DEFAULT_CACHE, help="Cache výsledků podle sha256")
+    parser.add_argument('--no-cache', action='store_true', help="Nepoužívat cache")
+    parser.add_argument('--workers', type=int, help="Počet procesů (výchozí počet CPU)")
+    parser.add_argument('--bench', type=int, metavar='N', help="Benchmark korpusového režimu na N souborech")
+    args = parser.parse_args()
+
+    if args.bench:
+        print(json.dumps(benchmark_corpus(args.bench, args.workers)))
+        return
+    if args.corpus:
+        corpus_main(args)
+        return
+
     print("🔍 PDF FORM ANALYZER")
     print("=" * 30)
     
@@ -2,246 +2,469 @@
 # -*- coding: utf-8 -*-
 """
 Generátor ukázkového PDF formuláře pro testování
+
+Kromě pevného 14polového template.pdf umí generovat parametrické šablony
+(N polí na M stránkách, hierarchické názvy s /Kids, vložené TTF písmo,
+volitelně obrázky) a změřit na nich latenci a paměť vyplňování pro
+jednotlivé backendy.
+
+Použití:
+    python create_template.py
+    python create_template.py --fields 200 --pages 4 [--flat] [--images] [--font x.ttf] [--out t.pdf]
+    python create_template.py --bench [--sizes 10,50,200,500] [--page-counts 1,4] [--repeat 5]
+                              [--images] [--plot bench.png] [--results bench.json]
 """
 
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfform
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 
-def create_sample_pdf_form():
+# Písmo popisků parametrických šablon (vkládá se do PDF jako podmnožina)
+DEFAULT_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+# Počet polí v jedné sekci (rodiči s /Kids) hierarchické šablony
+SECTION_SIZE = 10
+
+# Sekce ukázkového formuláře: (nadpis, [(popisek, název pole, nápověda, šířka pole)])
+LOAN_FORM_SECTIONS = [
+    ("OSOBNÍ ÚDAJE", [
+        ("Jméno a příjmení:", 'fill_11', 'Celé jméno klienta', 300),
+        ("Rodné číslo:", 'fill_12', 'Rodné číslo', 150),
+        ("Adresa:", 'Adresa', 'Trvalé bydliště', 300),
+        ("Telefon:", 'Telefon', 'Telefonní číslo', 150),
+        ("Email:", 'email', 'E-mailová adresa', 250),
+    ]),
+    ("INFORMACE O ÚVĚRU", [
+        ("Produkt:", 'Produkt', 'Typ úvěru', 200),
+        ("Výše úvěru:", 'fill_21', 'Požadovaná suma', 150),
+        ("Suma zajištění:", 'fill_22', 'Zajištění úvěru', 150),
+        ("LTV:", 'LTV', 'Loan to Value ratio', 100),
+        ("Účel úvěru:", 'fill_24', 'Účel použití úvěru', 250),
+        ("Měsíční splátka:", 'fill_25', 'Očekávaná splátka', 150),
+        ("Datum podpisu úvěru:", 'fill_26', 'Datum podpisu smlouvy', 150),
+    ]),
+]
+
+
+def _text(x: float, y: float, text: str, font: str = "Helvetica", size: float = 10) -> Dict[str, Any]:
+    return {'kind': 'text', 'x': x, 'y': y, 'text': text, 'font': font, 'size': size}
+
+
+def _field(name: str, tooltip: str, x: float, y: float, width: float,
+           height: float = 20, font_size: float = 10) -> Dict[str, Any]:
+    return {'kind': 'field', 'name': name, 'tooltip': tooltip, 'x': x, 'y': y,
+            'width': width, 'height': height, 'font_size': font_size}
+
+
+def loan_form_layout() -> Dict[str, Any]:
     """
-    Vytvoří ukázkový PDF formulář s vyplnitelnými poli.
+    Rozvržení ukázkového formuláře žádosti o úvěr (template.pdf)
+
+    Rozvržení je jen popis - prvky 'text' (popisky a nadpisy), 'field'
+    (textová pole) a 'line' se souřadnicemi v bodech. Kreslí ho
+    create_sample_pdf_form() a bez šablony ho vykresluje render_layout.py.
+
+    Returns:
+        dict: {'title', 'author', 'pagesize', 'pages': [[prvek, ...]]}
     """
-    filename = "template.pdf"
-    c = canvas.Canvas(filename, pagesize=A4)
     width, height = A4
-    
-    # Nastavení základních vlastností
-    c.setTitle("Formulář žádosti o úvěr")
-    c.setAuthor("PDF Form Generator")
-    
-    # Hlavička
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, height - 50, "FORMULÁŘ ŽÁDOSTI O ÚVĚR")
-    
-    # Sekce - Osobní údaje
-    y_pos = height - 100
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y_pos, "OSOBNÍ ÚDAJE")
-    
-    y_pos -= 30
-    c.setFont("Helvetica", 10)
-    
-    # Jméno a příjmení
-    c.drawString(50, y_pos, "Jméno a příjmení:")
-    c.acroForm.textfield(
-        name='fill_11',
-        tooltip='Celé jméno klienta',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=300, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Rodné číslo
-    c.drawString(50, y_pos, "Rodné číslo:")
-    c.acroForm.textfield(
-        name='fill_12',
-        tooltip='Rodné číslo',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Adresa
-    c.drawString(50, y_pos, "Adresa:")
-    c.acroForm.textfield(
-        name='Adresa',
-        tooltip='Trvalé bydliště',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=300, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Telefon
-    c.drawString(50, y_pos, "Telefon:")
-    c.acroForm.textfield(
-        name='Telefon',
-        tooltip='Telefonní číslo',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Email
-    c.drawString(50, y_pos, "Email:")
-    c.acroForm.textfield(
-        name='email',
-        tooltip='E-mailová adresa',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=250, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    # Sekce - Informace o úvěru
-    y_pos -= 60
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y_pos, "INFORMACE O ÚVĚRU")
-    
-    y_pos -= 30
-    c.setFont("Helvetica", 10)
-    
-    # Produkt
-    c.drawString(50, y_pos, "Produkt:")
-    c.acroForm.textfield(
-        name='Produkt',
-        tooltip='Typ úvěru',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=200, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Výše úvěru
-    c.drawString(50, y_pos, "Výše úvěru:")
-    c.acroForm.textfield(
-        name='fill_21',
-        tooltip='Požadovaná suma',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Suma zajištění
-    c.drawString(50, y_pos, "Suma zajištění:")
-    c.acroForm.textfield(
-        name='fill_22',
-        tooltip='Zajištění úvěru',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # LTV
-    c.drawString(50, y_pos, "LTV:")
-    c.acroForm.textfield(
-        name='LTV',
-        tooltip='Loan to Value ratio',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=100, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Účel úvěru
-    c.drawString(50, y_pos, "Účel úvěru:")
-    c.acroForm.textfield(
-        name='fill_24',
-        tooltip='Účel použití úvěru',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=250, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Měsíční splátka
-    c.drawString(50, y_pos, "Měsíční splátka:")
-    c.acroForm.textfield(
-        name='fill_25',
-        tooltip='Očekávaná splátka',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    y_pos -= 30
-    # Datum podpisu úvěru
-    c.drawString(50, y_pos, "Datum podpisu úvěru:")
-    c.acroForm.textfield(
-        name='fill_26',
-        tooltip='Datum podpisu smlouvy',
-        x=180, y=y_pos-5, borderStyle='inset',
-        width=150, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
+    elements = [_text(50, height - 50, "FORMULÁŘ ŽÁDOSTI O ÚVĚR", "Helvetica-Bold", 16)]
+
+    y_pos = height - 70
+    for heading, fields in LOAN_FORM_SECTIONS:
+        y_pos -= 30
+        elements.append(_text(50, y_pos, heading, "Helvetica-Bold", 12))
+        for label, name, tooltip, field_width in fields:
+            y_pos -= 30
+            elements.append(_text(50, y_pos, label))
+            elements.append(_field(name, tooltip, 180, y_pos - 5, field_width))
+        y_pos -= 30
+
     # Sekce - Podpis
-    y_pos -= 60
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y_pos, "PODPIS")
-    
     y_pos -= 30
-    c.setFont("Helvetica", 10)
-    
-    # Místo
-    c.drawString(50, y_pos, "V:")
-    c.acroForm.textfield(
-        name='V',
-        tooltip='Místo podpisu',
-        x=80, y=y_pos-5, borderStyle='inset',
-        width=100, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
-    # Datum
-    c.drawString(250, y_pos, "dne:")
-    c.acroForm.textfield(
-        name='dne',
-        tooltip='Datum podpisu',
-        x=280, y=y_pos-5, borderStyle='inset',
-        width=100, height=20,
-        textColor=colors.black,
-        fillColor=colors.white,
-        fontSize=10
-    )
-    
+    elements.append(_text(50, y_pos, "PODPIS", "Helvetica-Bold", 12))
+    y_pos -= 30
+    elements.append(_text(50, y_pos, "V:"))
+    elements.append(_field('V', 'Místo podpisu', 80, y_pos - 5, 100))
+    elements.append(_text(250, y_pos, "dne:"))
+    elements.append(_field('dne', 'Datum podpisu', 280, y_pos - 5, 100))
+
     # Místo pro podpis
     y_pos -= 50
-    c.drawString(50, y_pos, "Podpis žadatele:")
-    c.line(180, y_pos-5, 450, y_pos-5)
-    
+    elements.append(_text(50, y_pos, "Podpis žadatele:"))
+    elements.append({'kind': 'line', 'x1': 180, 'y1': y_pos - 5, 'x2': 450, 'y2': y_pos - 5})
+
     # Patička
-    c.setFont("Helvetica", 8)
-    c.drawString(50, 50, "Tento formulář byl vygenerován automaticky pro testovací účely.")
+    elements.append(_text(50, 50, "Tento formulář byl vygenerován automaticky pro testovací účely.", size=8))
+    return {
+        'title': "Formulář žádosti o úvěr",
+        'author': "PDF Form Generator",
+        'pagesize': (width, height),
+        'pages': [elements],
+    }
+
+
+def create_sample_pdf_form():
+    """
+    Vytvoří ukázkový PDF formulář s vyplnitelnými poli.
+    """
+    filename = "template.pdf"
+    layout = loan_form_layout()
+    c = canvas.Canvas(filename, pagesize=layout['pagesize'])
+    
+    # Nastavení základních vlastností
+    c.setTitle(layout['title'])
+    c.setAuthor(layout['author'])
+    
+    for page_number, elements in enumerate(layout['pages']):
+        if page_number:
+            c.showPage()
+        for element in elements:
+            if element['kind'] == 'text':
+                c.setFont(element['font'], element['size'])
+                c.drawString(element['x'], element['y'], element['text'])
+            elif element['kind'] == 'field':
+                c.acroForm.textfield(
+                    name=element['name'],
+                    tooltip=element['tooltip'],
+                    x=element['x'], y=element['y'], borderStyle='inset',
+                    width=element['width'], height=element['height'],
+                    textColor=colors.black,
+                    fillColor=colors.white,
+                    fontSize=element['font_size']
+                )
+            elif element['kind'] == 'line':
+                c.line(element['x1'], element['y1'], element['x2'], element['y2'])
     
     # Uložení PDF
     c.save()
     print(f"✅ Ukázkový PDF formulář byl vytvořen: {filename}")
     return filename
 
+
+def field_names(count: int, hierarchical: bool = True) -> List[str]:
+    """
+    Názvy polí parametrické šablony ('sekce_1.pole_1' nebo 'pole_1')
+    """
+    if not hierarchical:
+        return [f"pole_{i + 1}" for i in range(count)]
+    return [f"sekce_{i // SECTION_SIZE + 1}.pole_{i % SECTION_SIZE + 1}" for i in range(count)]
+
+
+def _nest_fields(pdf_bytes: bytes) -> bytes:
+    """
+    Převede tečkované názvy polí z reportlabu na skutečnou hierarchii:
+    rodič s /T sekce a /Kids, potomci s /T pole a /Parent
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, DictionaryObject, NameObject, TextStringObject
+
+    writer = PdfWriter(clone_from=PdfReader(io.BytesIO(pdf_bytes)))
+    acroform = writer._root_object['/AcroForm']
+    fields = ArrayObject()
+    parents = {}
+    for ref in acroform['/Fields']:
+        field = ref.get_object()
+        section, _, leaf = str(field['/T']).partition('.')
+        if not leaf:
+            fields.append(ref)
+            continue
+        if section not in parents:
+            parents[section] = writer._add_object(DictionaryObject({
+                NameObject('/T'): TextStringObject(section),
+                NameObject('/Kids'): ArrayObject(),
+            }))
+            fields.append(parents[section])
+        field[NameObject('/T')] = TextStringObject(leaf)
+        field[NameObject('/Parent')] = parents[section]
+        parents[section].get_object()['/Kids'].append(ref)
+    acroform[NameObject('/Fields')] = fields
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _noise_image(size: int, seed: int) -> ImageReader:
+    from PIL import Image
+
+    rng = random.Random(seed)
+    return ImageReader(Image.frombytes('RGB', (size, size // 2), rng.randbytes(size * (size // 2) * 3)))
+
+
+def create_parametric_template(filename: str, fields: int = 50, pages: int = 1,
+                               hierarchical: bool = True, font_path: Optional[str] = DEFAULT_FONT,
+                               image_size: int = 0) -> Dict[str, Any]:
+    """
+    Vytvoří šablonu s N textovými poli rovnoměrně rozdělenými na M stránek
+
+    Args:
+        filename (str): Výstupní PDF
+        fields (int): Počet polí
+        pages (int): Počet stránek
+        hierarchical (bool): Pole v sekcích po SECTION_SIZE (rodič s /Kids)
+        font_path (str): TTF písmo popisků (vloží se); None = Helvetica
+        image_size (int): Šířka šumového obrázku v pixelech na každé stránce (0 = bez)
+
+    Returns:
+        dict: Parametry šablony a její velikost v bajtech
+    """
+    label_font = "Helvetica"
+    if font_path and os.path.exists(font_path):
+        label_font = os.path.splitext(os.path.basename(font_path))[0]
+        pdfmetrics.registerFont(TTFont(label_font, font_path))
+    elif font_path:
+        print(f"⚠ Písmo {font_path} nebylo nalezeno, popisky budou v Helvetice", file=sys.stderr)
+
+    names = field_names(fields, hierarchical)
+    per_page = math.ceil(fields / pages) if fields else 0
+    columns = 2 if per_page <= 60 else 4
+    rows = max(1, math.ceil(per_page / columns))
+    width, height = A4
+    row_height = min(24, (height - 120) / rows)
+    column_width = (width - 100) / columns
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    c.setTitle(f"Parametrická šablona {fields} polí / {pages} stran")
+    for page in range(pages):
+        c.setFont(label_font, 14)
+        c.drawString(50, height - 50, f"PARAMETRICKÝ FORMULÁŘ – strana {page + 1}/{pages}")
+        if image_size:
+            c.drawImage(_noise_image(image_size, page), 50, 40, width=width - 100, height=(width - 100) / 4)
+        page_names = names[page * per_page:(page + 1) * per_page]
+        font_size = max(4, min(10, row_height * 0.5))
+        for i, name in enumerate(page_names):
+            x = 50 + (i % columns) * column_width
+            y = height - 90 - (i // columns) * row_height
+            c.setFont(label_font, font_size)
+            c.drawString(x, y, name.split('.')[-1].replace('_', ' ').capitalize() + ":")
+            c.acroForm.textfield(
+                name=name,
+                x=x + column_width * 0.3, y=y - row_height * 0.2, borderStyle='inset',
+                width=column_width * 0.65, height=row_height * 0.8,
+                textColor=colors.black,
+                fillColor=colors.white,
+                fontSize=font_size
+            )
+        c.showPage()
+    c.save()
+
+    pdf_bytes = buffer.getvalue()
+    if hierarchical and fields:
+        pdf_bytes = _nest_fields(pdf_bytes)
+    with open(filename, 'wb') as f:
+        f.write(pdf_bytes)
+    return {'fields': fields, 'pages': pages, 'hierarchical': hierarchical,
+            'images': bool(image_size), 'size': len(pdf_bytes), 'path': filename}
+
+
+def _fill_fitz(template_bytes: bytes, values: Dict[str, str]) -> bytes:
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz
+
+    doc = fitz.open(stream=template_bytes, filetype="pdf")
+    try:
+        for page in doc:
+            for widget in page.widgets():
+                if widget.field_name in values:
+                    widget.field_value = values[widget.field_name]
+                    widget.update()
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def _fill_strategy(name: str):
+    def fill(template_bytes: bytes, values: Dict[str, str]) -> bytes:
+        from pypdf import PdfReader
+        from fill_strategy import STRATEGIES, _to_bytes
+
+        return _to_bytes(STRATEGIES[name](PdfReader(io.BytesIO(template_bytes)), values))
+    return fill
+
+
+# Měřené cesty vyplnění: PyMuPDF a strategie pypdf z fill_strategy.py
+BENCH_BACKENDS = {
+    'fitz': _fill_fitz,
+    'pypdf-bulk': _fill_strategy('bulk'),
+    'pypdf-per_field': _fill_strategy('per_field'),
+    'pypdf-direct': _fill_strategy('direct'),
+}
+
+
+def _max_rss_mb() -> float:
+    try:
+        # Modul resource není na Windows - render_layout.py importuje tento modul
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss je na Linuxu v KB, na macOS v bajtech
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1024 * 1024)
+
+
+def _measure(args) -> Dict[str, Any]:
+    """
+    Změří jeden backend na jedné šabloně (běží v čerstvém procesu, aby
+    špička RSS patřila jen tomuto měření)
+    """
+    backend, template_path, names, repeat = args
+    fill = BENCH_BACKENDS[backend]
+    values = {name: f"Hodnota {i} ěščřžýáíé" for i, name in enumerate(names)}
+    with open(template_path, 'rb') as f:
+        template_bytes = f.read()
+    from pypdf import PdfReader
+
+    # První vyplnění načte knihovny; zároveň se ověří, kolik polí opravdu dostalo hodnotu
+    output = PdfReader(io.BytesIO(fill(template_bytes, values))).get_fields() or {}
+    filled = sum(1 for name, field in output.items() if name in values and field.get('/V') == values[name])
+    baseline = _max_rss_mb()
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fill(template_bytes, values)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        'backend': backend,
+        'filled': filled,
+        'median_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'peak_rss_mb': round(_max_rss_mb(), 1),
+        'fill_rss_growth_mb': round(_max_rss_mb() - baseline, 1),
+    }
+
+
+def run_benchmark(sizes: List[int], page_counts: List[int], repeat: int = 5,
+                  image_size: int = 0, backends: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Vygeneruje šablony všech kombinací velikostí a změří každý backend
+
+    Returns:
+        list: Řádky {'fields', 'pages', 'size', 'backend', 'median_ms', 'p95_ms', 'peak_rss_mb',
+            'complete', ...}; neúplné vyplnění (complete=False) má latence None
+    """
+    backends = backends or list(BENCH_BACKENDS)
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory(prefix='template_bench_') as directory:
+        for pages in page_counts:
+            for fields in sizes:
+                path = os.path.join(directory, f"t_{fields}_{pages}.pdf")
+                template = create_parametric_template(path, fields, pages, image_size=image_size)
+                names = field_names(fields)
+                for backend in backends:
+                    with context.Pool(1) as pool:
+                        row = pool.apply(_measure, ((backend, path, names, repeat),))
+                    row.update(fields=fields, pages=pages, size=template['size'],
+                               complete=row['filled'] == fields)
+                    if not row['complete']:
+                        # Latence neúplného vyplnění by se srovnávala s backendy,
+                        # které opravdu vyplnily - do výsledků ani grafu nejde
+                        print(f"  ⚠ {backend}: vyplněno jen {row['filled']}/{fields} polí, "
+                              f"latence se nezveřejní", file=sys.stderr)
+                        row.update(median_ms=None, p95_ms=None)
+                        results.append(row)
+                        continue
+                    print(f"  {fields:5d} polí / {pages} str ({template['size']:,} B) "
+                          f"{backend:16s} {row['median_ms']:8.1f} ms  {row['peak_rss_mb']:6.1f} MB  "
+                          f"vyplněno {row['filled']}/{fields}",
+                          file=sys.stderr)
+                    results.append(row)
+    return results
+
+
+def plot_benchmark(results: List[Dict[str, Any]], filename: str) -> bool:
+    """
+    Vykreslí latenci a paměť podle počtu polí (jedna čára na backend a počet stran)
+
+    Returns:
+        bool: False, pokud není nainstalovaný matplotlib
+    """
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("⚠ matplotlib není nainstalován, graf se nevytvoří (pip install matplotlib)", file=sys.stderr)
+        return False
+
+    figure, (latency_axis, memory_axis) = plt.subplots(1, 2, figsize=(12, 5))
+    results = [row for row in results if row.get('complete', True)]
+    series = sorted({(row['backend'], row['pages']) for row in results})
+    for backend, pages in series:
+        rows = sorted((row for row in results if row['backend'] == backend and row['pages'] == pages),
+                      key=lambda row: row['fields'])
+        label = f"{backend} ({pages} str)"
+        latency_axis.plot([row['fields'] for row in rows], [row['median_ms'] for row in rows], marker='o', label=label)
+        memory_axis.plot([row['fields'] for row in rows], [row['peak_rss_mb'] for row in rows], marker='o', label=label)
+    for axis, title in ((latency_axis, "Medián vyplnění [ms]"), (memory_axis, "Špička RSS [MB]")):
+        axis.set_xscale('log')
+        axis.set_xlabel("Počet polí")
+        axis.set_title(title)
+        axis.grid(True, alpha=0.3)
+    latency_axis.set_yscale('log')
+    latency_axis.legend(fontsize=8)
+    figure.tight_layout()
+    figure.savefig(filename, dpi=100)
+    return True
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(',') if item]
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Generátor PDF šablon pro testování")
+    parser.add_argument('--fields', type=int, help="Parametrická šablona s N poli")
+    parser.add_argument('--pages', type=int, default=1, help="Počet stránek parametrické šablony")
+    parser.add_argument('--flat', action='store_true', help="Ploché názvy polí (bez /Kids)")
+    parser.add_argument('--font', default=DEFAULT_FONT, help="TTF písmo popisků")
+    parser.add_argument('--images', type=int, nargs='?', const=512, default=0, metavar='PX',
+                        help="Šumový obrázek na každé stránce (šířka v px, výchozí 512)")
+    parser.add_argument('--out', default='parametric_template.pdf', help="Výstupní PDF")
+    parser.add_argument('--bench', action='store_true', help="Benchmark vyplňování podle velikosti šablony")
+    parser.add_argument('--sizes', type=_int_list, default=[10, 50, 200, 500], help="Počty polí (čárkami)")
+    parser.add_argument('--page-counts', type=_int_list, default=[1, 4], help="Počty stránek (čárkami)")
+    parser.add_argument('--repeat', type=int, default=5, help="Počet vyplnění na měření")
+    parser.add_argument('--backends', help="Backendy čárkami (výchozí všechny: %s)" % ','.join(BENCH_BACKENDS))
+    parser.add_argument('--results', default='template_bench.json', help="Výsledky benchmarku (JSON)")
+    parser.add_argument('--plot', default='template_bench.png', help="Graf benchmarku (PNG)")
+    args = parser.parse_args()
+
+    if args.bench:
+        backends = args.backends.split(',') if args.backends else None
+        results = run_benchmark(args.sizes, args.page_counts, args.repeat, args.images, backends)
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Výsledky benchmarku: {args.results}")
+        if plot_benchmark(results, args.plot):
+            print(f"📈 Graf: {args.plot}")
+    elif args.fields is not None:
+        template = create_parametric_template(args.out, args.fields, args.pages, not args.flat,
+                                              args.font, args.images)
+        print(f"✅ Parametrická šablona vytvořena: {args.out} ({template['size']:,} bytů)")
+    else:
+        create_sample_pdf_form()
+
+
 if __name__ == "__main__":
-    create_sample_pdf_form()
+    main()
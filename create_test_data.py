@@ -1,11 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Testovací data pro vyplňování formuláře
+=======================================
+
+Bez parametrů zapíše jeden ukázkový záznam do test_form_data.json.
+S parametrem --count generuje proudově libovolný počet syntetických
+záznamů (JSONL) pro benchmarky a zátěžové testy:
+
+- rodná čísla s platným kontrolním součtem (dělitelná 11, ženy měsíc + 50)
+- česká jména s diakritikou (přechýlená příjmení), adresy s PSČ
+- výše úvěru, zajištění a LTV navzájem konzistentní, splátka jako anuita
+- nastavitelný podíl dlouhých hodnot a duplicitních záznamů
+
+Paměť je konstantní (duplicity se berou z okna posledních záznamů)
+a výstup je pro stejné --seed a parametry vždy stejný.
+
+Použití:
+    python create_test_data.py
+    python create_test_data.py --count 1000000 --out records.jsonl [--seed 42]
+                               [--duplicate-rate 0.02] [--long-rate 0.1] [--nested]
+"""
+
+import argparse
 import json
+import random
+import sys
+import time
+import unicodedata
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, Any, Iterator, Optional
 
 # Test data
 test_data = {
     "fill_11": "Jan Novák",
     "fill_12": "123456789",
     "Adresa": "Praha 1, Václavské náměstí 1",
-    "Telefon": "123456789", 
+    "Telefon": "123456789",
     "email": "jan@test.cz",
     "fill_16": "Ing. Milan Kost",
     "fill_17": "8680020061",
@@ -21,8 +53,215 @@ test_data = {
     "dne": "3.8.2025"
 }
 
-# Zapíšeme do souboru
-with open('test_form_data.json', 'w', encoding='utf-8') as f:
-    json.dump(test_data, f, ensure_ascii=False, indent=2)
+# Referenční datum - věk klientů a data smluv nezávisí na dni spuštění
+REFERENCE_DATE = date(2025, 8, 1)
+# Počet posledních záznamů, ze kterých se vybírají duplicity
+DUPLICATE_WINDOW = 1000
+
+MALE_NAMES = ["Jan", "Jiří", "Petr", "Josef", "Pavel", "Martin", "Tomáš", "Jaroslav", "Miroslav",
+              "Zdeněk", "Václav", "Michal", "František", "Jakub", "Milan", "Karel", "Lukáš", "David",
+              "Ondřej", "Radek", "Vojtěch", "Matěj", "Štěpán", "Aleš", "Luboš"]
+FEMALE_NAMES = ["Jana", "Marie", "Eva", "Hana", "Anna", "Lenka", "Kateřina", "Lucie", "Věra", "Alena",
+                "Petra", "Veronika", "Jaroslava", "Tereza", "Martina", "Michaela", "Jitka", "Zdeňka",
+                "Ivana", "Marcela", "Barbora", "Kristýna", "Markéta", "Šárka", "Dagmar"]
+# Příjmení: (mužský tvar, ženský tvar)
+SURNAMES = [("Novák", "Nováková"), ("Svoboda", "Svobodová"), ("Dvořák", "Dvořáková"), ("Černý", "Černá"),
+            ("Procházka", "Procházková"), ("Kučera", "Kučerová"), ("Veselý", "Veselá"),
+            ("Horák", "Horáková"), ("Němec", "Němcová"), ("Pokorný", "Pokorná"), ("Marek", "Marková"),
+            ("Pospíšil", "Pospíšilová"), ("Hájek", "Hájková"), ("Jelínek", "Jelínková"),
+            ("Král", "Králová"), ("Růžička", "Růžičková"), ("Beneš", "Benešová"), ("Fiala", "Fialová"),
+            ("Sedláček", "Sedláčková"), ("Doležal", "Doležalová"), ("Zeman", "Zemanová"),
+            ("Kolář", "Kolářová"), ("Navrátil", "Navrátilová"), ("Čermák", "Čermáková"),
+            ("Vaněk", "Vaňková"), ("Kříž", "Křížová"), ("Bartoš", "Bartošová"), ("Vlček", "Vlčková"),
+            ("Kopecký", "Kopecká"), ("Štěpánek", "Štěpánková"), ("Raškovec", "Raškovcová"),
+            ("Satrapa", "Satrapová")]
+TITLES = ["Ing.", "Mgr.", "MUDr.", "Bc.", "JUDr.", "Ing. Mgr.", "doc. Ing.", "prof. MUDr."]
+# Obce: (název, PSČ)
+CITIES = [("Praha", "110 00"), ("Brno", "602 00"), ("Ostrava", "702 00"), ("Plzeň", "301 00"),
+          ("Liberec", "460 01"), ("Olomouc", "779 00"), ("České Budějovice", "370 01"),
+          ("Hradec Králové", "500 02"), ("Ústí nad Labem", "400 01"), ("Pardubice", "530 02"),
+          ("Zlín", "760 01"), ("Kladno", "272 01"), ("Jihlava", "586 01"), ("Třebíč", "674 01"),
+          ("Polička", "572 01"), ("Ujčov", "592 31"), ("Kroměříž", "767 01"),
+          ("Frýdek-Místek", "738 01")]
+STREETS = ["Husova", "Palackého", "Masarykova", "Nádražní", "Komenského", "Zahradní", "Sokolovská",
+           "Jiráskova", "Tyršova", "Havlíčkova", "Školní", "Smetanova", "Žižkova", "Na Výsluní",
+           "U Školy", "Zákřejsova"]
+LONG_STREETS = ["Nábřeží Kapitána Jaroše", "Třída Tomáše Bati", "Náměstí Svatého Václava a Ludmily",
+                "Bratří Čapků a Karla Havlíčka Borovského"]
+DISTRICTS = ["Královo Pole", "Černá Pole", "Moravská Ostrava a Přívoz", "Vinohrady", "Žabovřesky"]
+PRODUCTS = ["Hypoteční úvěr", "Americká hypotéka", "Refinancování hypotéky", "Úvěr ze stavebního spoření"]
+PURPOSES = ["Koupě nemovitosti", "Výstavba rodinného domu", "Rekonstrukce", "Refinancování",
+            "Koupě pozemku"]
+LONG_PURPOSES = ["Koupě bytové jednotky včetně podílu na společných částech domu a pozemku",
+                 "Výstavba rodinného domu svépomocí včetně přípojek inženýrských sítí a oplocení"]
+ADVISORS = [("Ing. Milan Kost", "8680020061"), ("Mgr. Petra Šimková", "8680020147"),
+            ("Bc. Tomáš Holub", "8680020239")]
+LTV_VALUES = [50, 60, 70, 75, 80, 85, 90]
+
+
+def birth_number(rng: random.Random, born: date, female: bool) -> str:
+    """
+    Vrátí platné desetimístné rodné číslo (bez lomítka)
+
+    Celé číslo je dělitelné 11; koncovka, pro kterou by kontrolní číslice
+    vyšla 10 (dříve nahrazovaná nulou), se losuje znovu.
+    """
+    month = born.month + (50 if female else 0)
+    prefix = f"{born.year % 100:02d}{month:02d}{born.day:02d}"
+    while True:
+        base = int(f"{prefix}{rng.randrange(1000):03d}")
+        check = (-base * 10) % 11
+        if check < 10:
+            return f"{base:09d}{check}"
+
+
+def is_valid_birth_number(value: str) -> bool:
+    """Kontrola desetimístného rodného čísla (dělitelnost 11 a platné datum)"""
+    digits = value.replace('/', '')
+    if len(digits) != 10 or not digits.isdigit() or int(digits) % 11:
+        return False
+    month = int(digits[2:4]) % 50
+    return 1 <= month <= 12 and 1 <= int(digits[4:6]) <= 31
+
+
+def format_amount(value: float) -> str:
+    """2000000 -> '2 000 000 Kč'"""
+    return f"{round(value):,} Kč".replace(',', ' ')
+
+
+def format_date(value: date) -> str:
+    return f"{value.day}.{value.month}.{value.year}"
+
+
+def _ascii(text: str) -> str:
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def make_record(rng: random.Random, seq: int, long_rate: float = 0.1, nested: bool = False) -> Dict[str, Any]:
+    """
+    Vygeneruje jeden syntetický záznam formuláře
+
+    Args:
+        rng (random.Random): Zdroj náhody (určuje reprodukovatelnost)
+        seq (int): Pořadí záznamu (číslo smlouvy)
+        long_rate (float): Pravděpodobnost dlouhých hodnot (tituly, složená
+            příjmení, dlouhé adresy a účely)
+        nested (bool): Vrátit vnořená client_data jako fill_pdf.py
+            (zadatel/doklady/uver/podpis) místo polí formuláře
+    """
+    long = rng.random() < long_rate
+    female = rng.random() < 0.5
+    first = rng.choice(FEMALE_NAMES if female else MALE_NAMES)
+    surname = rng.choice(SURNAMES)[female]
+    if long:
+        surname = f"{surname} {rng.choice(SURNAMES)[female]}"
+        first = f"{rng.choice(TITLES)} {first}"
+    born = REFERENCE_DATE - timedelta(days=rng.randint(20 * 365, 70 * 365))
+
+    city, zip_code = rng.choice(CITIES)
+    if long:
+        address = (f"{rng.choice(LONG_STREETS)} {rng.randint(1, 3999)}/{rng.randint(1, 120)}, "
+                   f"{rng.choice(DISTRICTS)}, {zip_code} {city}")
+    else:
+        address = f"{rng.choice(STREETS)} {rng.randint(1, 999)}, {zip_code} {city}"
+
+    # Zajištění -> LTV -> úvěr; LTV se dopočítá zpět, aby sedělo po zaokrouhlení
+    collateral = rng.randint(150, 1200) * 10_000
+    loan = round(collateral * rng.choice(LTV_VALUES) / 100 / 10_000) * 10_000
+    rate = rng.randint(39, 65) / 10
+    monthly_rate = rate / 100 / 12
+    months = 12 * rng.choice([15, 20, 25, 30])
+    payment = loan * monthly_rate / (1 - (1 + monthly_rate) ** -months)
+    signed = REFERENCE_DATE - timedelta(days=rng.randint(0, 3 * 365))
+    advisor, advisor_number = rng.choice(ADVISORS)
+    signing_city = rng.choice(CITIES)[0]
+
+    record = {
+        "fill_11": f"{first} {surname}",
+        "fill_12": birth_number(rng, born, female),
+        "Adresa": address,
+        "Telefon": f"{rng.choice('67')}{rng.randint(0, 99):02d} {rng.randint(0, 999):03d} {rng.randint(0, 999):03d}",
+        "email": f"{_ascii(first.split()[-1])}.{_ascii(surname.split()[0])}{rng.randint(1, 99)}@example.cz",
+        "fill_16": advisor,
+        "fill_17": advisor_number,
+        "fill_10": f"SM-{signed.year}-{seq:07d}",
+        "Produkt": rng.choice(PRODUCTS),
+        "fill_21": format_amount(loan),
+        "fill_22": format_amount(collateral),
+        "LTV": f"{round(loan / collateral * 100)}%",
+        "fill_4": f"{rate:.1f}".replace('.', ',') + " %",
+        "fill_24": rng.choice(LONG_PURPOSES if long else PURPOSES),
+        "fill_25": format_amount(payment),
+        "fill_26": format_date(signed),
+        "V": signing_city,
+        "dne": format_date(signed + timedelta(days=rng.randint(0, 5))),
+    }
+    if nested:
+        return {
+            "zadatel": {"jmeno": first, "prijmeni": surname, "rodne_cislo": record["fill_12"],
+                        "trvale_bydliste": address},
+            "doklady": {"telefon": record["Telefon"], "email": record["email"]},
+            "uver": {"produkt": record["Produkt"], "vyse_uveru": record["fill_21"],
+                     "suma_zajisteni": record["fill_22"], "ltv": record["LTV"], "ucel": record["fill_24"],
+                     "mesicni_splatka": record["fill_25"], "datum_podpisu": record["fill_26"]},
+            "podpis": {"misto": signing_city, "datum": record["dne"]},
+        }
+    return record
+
+
+def generate_records(count: int, seed: Optional[int] = None,
+                     duplicate_rate: float = 0.0, long_rate: float = 0.1,
+                     nested: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Proudově generuje syntetické záznamy (konstantní paměť)
+
+    Args:
+        count (int): Počet záznamů
+        seed (int): Semínko - stejné semínko dá stejná data
+        duplicate_rate (float): Podíl přesných duplicit dříve vydaných záznamů
+        long_rate (float): Podíl záznamů s dlouhými hodnotami
+        nested (bool): Vnořená client_data místo polí formuláře
+    """
+    rng = random.Random(seed)
+    recent: deque = deque(maxlen=DUPLICATE_WINDOW)
+    for seq in range(count):
+        if recent and rng.random() < duplicate_rate:
+            yield rng.choice(recent)
+            continue
+        record = make_record(rng, seq, long_rate, nested)
+        recent.append(record)
+        yield record
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Generátor testovacích dat formuláře")
+    parser.add_argument('--count', type=int, help="Počet syntetických záznamů (JSONL)")
+    parser.add_argument('--out', default='-', help="Výstupní JSONL soubor (výchozí stdout)")
+    parser.add_argument('--seed', type=int, default=42, help="Semínko generátoru")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help="Podíl duplicitních záznamů (0-1)")
+    parser.add_argument('--long-rate', type=float, default=0.1, help="Podíl záznamů s dlouhými hodnotami (0-1)")
+    parser.add_argument('--nested', action='store_true', help="Vnořená client_data (zadatel/uver/...) jako fill_pdf.py")
+    args = parser.parse_args()
+
+    if args.count is None:
+        # Zapíšeme do souboru
+        with open('test_form_data.json', 'w', encoding='utf-8') as f:
+            json.dump(test_data, f, ensure_ascii=False, indent=2)
+        print("Test data saved to test_form_data.json")
+        return
+
+    started = time.perf_counter()
+    out = sys.stdout if args.out == '-' else open(args.out, 'w', encoding='utf-8')
+    try:
+        for record in generate_records(args.count, args.seed, args.duplicate_rate, args.long_rate, args.nested):
+            out.write(json.dumps(record, ensure_ascii=False))
+            out.write('\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"✅ {args.count} záznamů za {time.perf_counter() - started:.1f} s -> {args.out}", file=sys.stderr)
+
 
-print("Test data saved to test_form_data.json")
+if __name__ == "__main__":
+    main()
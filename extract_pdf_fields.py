@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hromadné čtení hodnot polí z vyplněných PDF
+===========================================
+
+Projde jen strom polí AcroFormu (/Fields včetně /Kids) - stránky ani
+jejich obsah se nenačítají. Soubory se zpracují v poolu procesů a
+výsledek se zapíše jako JSONL (jeden řádek na soubor) nebo CSV (sloupec
+na pole). Slouží k reimportu a auditu historických formulářů.
+
+Použití:
+    python extract_pdf_fields.py <pdf|složka ...> [-o vystup.jsonl|vystup.csv] [--workers N]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, NameObject
+except ImportError:
+    print("CHYBA: Knihovna pypdf není nainstalována.")
+    print("Nainstalujte ji pomocí: pip install pypdf")
+    sys.exit(1)
+
+
+def _value(value) -> Any:
+    """Převede /V na JSON hodnotu (/Off -> '', /Yes -> 'Yes', pole -> seznam)"""
+    if value is None:
+        return None
+    value = value.get_object()
+    if isinstance(value, NameObject):
+        return '' if value == '/Off' else str(value)[1:]
+    if isinstance(value, ArrayObject):
+        return [_value(item) for item in value]
+    return str(value)
+
+
+def _walk(fields, values: Dict[str, Any], parent_name: str = '', inherited=None):
+    for field in fields:
+        field = field.get_object()
+        partial = field.get('/T')
+        name = f"{parent_name}.{partial}" if parent_name and partial is not None else str(partial or parent_name)
+        value = field.get('/V', inherited)
+        # Potomci bez /T jsou jen widgety téhož pole
+        kids = [kid for kid in field.get('/Kids', []) if '/T' in kid.get_object()]
+        if kids:
+            _walk(kids, values, name, value)
+        elif name:
+            values[name] = _value(value)
+
+
+def extract_fields(pdf_path: str) -> Dict[str, Any]:
+    """
+    Přečte hodnoty všech terminálních polí formuláře
+
+    Returns:
+        dict: {'file', 'fields': {plný název: hodnota}} nebo {'file', 'error'}
+    """
+    try:
+        reader = PdfReader(pdf_path, strict=False)
+        acroform = reader.trailer['/Root'].get('/AcroForm')
+        values: Dict[str, Any] = {}
+        if acroform is not None:
+            _walk(acroform.get_object().get('/Fields', []), values)
+        return {'file': pdf_path, 'fields': values}
+    except Exception as e:
+        return {'file': pdf_path, 'error': f"{type(e).__name__}: {e}"}
+
+
+def iter_pdfs(paths: Iterable[str]) -> Iterator[str]:
+    """Rozbalí složky na PDF soubory (rekurzivně, v seřazeném pořadí)"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith('.pdf'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def extract_many(paths: Iterable[str], workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Přečte pole z mnoha PDF v poolu procesů (výsledky v pořadí vstupu)
+    """
+    paths = list(iter_pdfs(paths))
+    if workers == 1 or len(paths) < 2:
+        yield from map(extract_fields, paths)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(extract_fields, paths, chunksize=max(1, min(64, len(paths) // (workers * 4))))
+
+
+def write_jsonl(results: Iterable[Dict[str, Any]], out) -> int:
+    count = 0
+    for result in results:
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def write_csv(results: Iterable[Dict[str, Any]], out) -> int:
+    """
+    Zapíše CSV se sloupcem na každé pole (sjednocení přes všechny soubory)
+    """
+    rows: List[Dict[str, Any]] = list(results)
+    columns: Dict[str, None] = {}
+    for row in rows:
+        for name in row.get('fields', {}):
+            columns.setdefault(name)
+    writer = csv.writer(out)
+    writer.writerow(['file', 'error', *columns])
+    for row in rows:
+        fields = row.get('fields', {})
+        cells = []
+        for name in columns:
+            value = fields.get(name)
+            cells.append('; '.join(map(str, value)) if isinstance(value, list) else ('' if value is None else value))
+        writer.writerow([row['file'], row.get('error', ''), *cells])
+    return len(rows)
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Hromadné čtení hodnot polí z vyplněných PDF")
+    parser.add_argument('paths', nargs='+', help="PDF soubory nebo složky")
+    parser.add_argument('-o', '--output', help="Výstup .jsonl nebo .csv (výchozí JSONL na stdout)")
+    parser.add_argument('--workers', type=int, help="Počet procesů (výchozí počet CPU)")
+    args = parser.parse_args()
+
+    results = extract_many(args.paths, args.workers)
+    write = write_csv if args.output and args.output.lower().endswith('.csv') else write_jsonl
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as out:
+            count = write(results, out)
+        print(f"✅ Přečteno {count} souborů -> {args.output}", file=sys.stderr)
+    else:
+        write(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,14 +12,9 @@ Datum: 2. srpna 2025
 """
 
 import os
-import sys
 from typing import Dict, Any
-try:
-    from pypdf import PdfReader, PdfWriter
-except ImportError:
-    print("CHYBA: Knihovna pypdf není nainstalována.")
-    print("Nainstalujte ji pomocí: pip install pypdf")
-    sys.exit(1)
+
+from fill_strategy import fill_with_strategy
 
 
 def create_field_mapping() -> Dict[str, str]:
@@ -108,8 +103,6 @@ def fill_pdf_form(template_path: str, output_path: str, client_data: Dict[str, A
         
         # Načtení PDF šablony
         print(f"Načítám PDF šablonu: {template_path}")
-        reader = PdfReader(template_path)
-        writer = PdfWriter()
         
         # Příprava dat pro formulář
         form_data = prepare_form_data(client_data)
@@ -124,54 +117,22 @@ def fill_pdf_form(template_path: str, output_path: str, client_data: Dict[str, A
         
         print(f"Připravena data pro {len(pdf_form_data)} polí")
         
-        # Kontrola, zda PDF obsahuje formulář
-        has_form = False
-        if len(reader.pages) > 0:
-            page = reader.pages[0]
-            if "/Annots" in page or "/AcroForm" in reader.trailer.get("/Root", {}):
-                has_form = True
-        
-        if not has_form:
+        # Vyplnění strategií zjištěnou jednorázovou sondou šablony (viz fill_strategy.py)
+        pdf_bytes, strategy = fill_with_strategy(template_path, pdf_form_data)
+        if strategy is None:
             print("VAROVÁNÍ: PDF neobsahuje formulářová pole nebo AcroForm.")
             print("Vytvářím kopii PDF bez vyplnění polí.")
-        
-        # Procházení všech stránek
-        fields_filled = 0
-        for page_num, page in enumerate(reader.pages):
-            print(f"Zpracovávám stránku {page_num + 1}")
-            
-            # Přidání stránky do výstupního PDF
-            writer.add_page(page)
-            
-            # Pokus o vyplnění formulářových polí
-            if has_form and pdf_form_data:
-                try:
-                    # Pokus o vyplnění všech polí najednou
-                    writer.update_page_form_field_values(writer.pages[-1], pdf_form_data)
-                    fields_filled = len(pdf_form_data)
-                    print(f"  ✓ Vyplněno {fields_filled} polí na stránce {page_num + 1}")
-                    
-                    # Výpis vyplněných polí
-                    for field_name, value in pdf_form_data.items():
-                        print(f"    - {field_name}: {value}")
-                        
-                except Exception as form_error:
-                    print(f"  ⚠ Problém s vyplněním formuláře: {form_error}")
-                    # Pokus o vyplnění polí jednotlivě
-                    for field_name, value in pdf_form_data.items():
-                        try:
-                            writer.update_page_form_field_values(
-                                writer.pages[-1], {field_name: value}
-                            )
-                            fields_filled += 1
-                            print(f"    ✓ {field_name}: {value}")
-                        except Exception as field_error:
-                            print(f"    ✗ {field_name}: {field_error}")
+            fields_filled = 0
+        else:
+            fields_filled = len(pdf_form_data)
+            print(f"  ✓ Vyplněno {fields_filled} polí (strategie: {strategy})")
+            for field_name, value in pdf_form_data.items():
+                print(f"    - {field_name}: {value}")
         
         # Uložení vyplněného PDF
         print(f"Ukládám vyplněný formulář: {output_path}")
         with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+            output_file.write(pdf_bytes)
         
         if fields_filled > 0:
             print(f"✅ ÚSPĚCH: PDF formulář byl vyplněn ({fields_filled} polí) a uložen jako '{output_path}'")
@@ -8,16 +8,9 @@ Vylepšená verze s lepším zpracováním formulářových polí v pypdf.
 """
 
 import os
-import sys
 from typing import Dict, Any
 
-try:
-    from pypdf import PdfReader, PdfWriter
-    from pypdf.generic import TextStringObject
-except ImportError:
-    print("CHYBA: Knihovna pypdf není nainstalována.")
-    print("Nainstalujte ji pomocí: pip install pypdf")
-    sys.exit(1)
+from fill_strategy import fill_with_strategy
 
 
 def get_sample_client_data() -> Dict[str, Any]:
@@ -61,8 +54,6 @@ def fill_pdf_form_advanced(template_path: str, output_path: str, client_data: Di
             return False
         
         print(f"📖 Načítám PDF: {template_path}")
-        reader = PdfReader(template_path)
-        writer = PdfWriter()
         
         # Příprava dat pro vyplnění
         full_name = f"{client_data['zadatel']['jmeno']} {client_data['zadatel']['prijmeni']}"
@@ -86,81 +77,16 @@ def fill_pdf_form_advanced(template_path: str, output_path: str, client_data: Di
         
         print(f"📝 Připraveno {len(form_data)} hodnot pro vyplnění")
         
-        # Metoda 1: Klasické vyplnění přes writer
-        print("\n🔧 Metoda 1: Standardní vyplnění...")
-        fields_filled_method1 = 0
-        
-        for page in reader.pages:
-            new_page = writer.add_page(page)
-            
-            try:
-                writer.update_page_form_field_values(new_page, form_data)
-                fields_filled_method1 = len(form_data)
-                print(f"  ✅ Úspěšně vyplněno {fields_filled_method1} polí")
-                break
-            except Exception as e:
-                print(f"  ❌ Chyba standardní metody: {e}")
-        
-        # Metoda 2: Pokud metoda 1 nefunguje, zkus přímou manipulaci
-        if fields_filled_method1 == 0:
-            print("\n🔧 Metoda 2: Přímá manipulace formulářových polí...")
-            fields_filled_method2 = 0
-            
-            # Přístup přes annotations
-            for page_num, page in enumerate(writer.pages):
-                if "/Annots" in page:
-                    annotations = page["/Annots"]
-                    
-                    for annot in annotations:
-                        annot_obj = annot.get_object()
-                        
-                        if annot_obj.get("/Subtype") == "/Widget":
-                            # Získej název pole
-                            field_name = None
-                            if "/T" in annot_obj:
-                                field_name = str(annot_obj["/T"])
-                            elif "/Parent" in annot_obj:
-                                parent = annot_obj["/Parent"].get_object()
-                                if "/T" in parent:
-                                    field_name = str(parent["/T"])
-                            
-                            # Vyplň pole pokud máme data
-                            if field_name and field_name in form_data:
-                                value = form_data[field_name]
-                                try:
-                                    # Nastav hodnotu pole
-                                    annot_obj["/V"] = TextStringObject(str(value))
-                                    annot_obj["/AP"] = None  # Vymaž vzhled, aby se překreslil
-                                    fields_filled_method2 += 1
-                                    print(f"    ✅ {field_name}: {value}")
-                                except Exception as field_error:
-                                    print(f"    ❌ {field_name}: {field_error}")
-            
-            print(f"  📊 Vyplněno {fields_filled_method2} polí metodou 2")
-        
-        # Metoda 3: Pokud ani metoda 2 nefunguje, zkus clone + fill
-        total_filled = fields_filled_method1 + fields_filled_method2
-        if total_filled == 0:
-            print("\n🔧 Metoda 3: Clone a fill...")
-            
-            # Vytvoř nový writer
-            writer = PdfWriter()
-            
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            # Zkus fill na celém writer objektu
-            try:
-                writer.update_page_form_field_values(writer.pages[0], form_data)
-                total_filled = len(form_data)
-                print(f"  ✅ Metoda 3 úspěšná: {total_filled} polí")
-            except Exception as e:
-                print(f"  ❌ Metoda 3 selhala: {e}")
+        # Strategie se pro šablonu zjišťuje jednou sondou (viz fill_strategy.py),
+        # další vyplnění rovnou použijí tu funkční
+        pdf_bytes, strategy = fill_with_strategy(template_path, form_data)
+        total_filled = len(form_data) if strategy else 0
+        print(f"\n🔧 Strategie vyplnění: {strategy or 'žádná (šablona bez polí)'}")
         
         # Uložení výsledku
         print(f"\n💾 Ukládám výsledek: {output_path}")
         with open(output_path, 'wb') as output_file:
-            writer.write(output_file)
+            output_file.write(pdf_bytes)
         
         # Shrnutí
         if total_filled > 0:
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Výběr strategie vyplňování podle šablony
+========================================
+
+Místo zkoušení všech metod při každém vyplnění se pro šablonu jednou
+spustí sonda: každá strategie vyplní testovací hodnoty a výsledek se
+zpětně načte a ověří. Funkční strategie (seřazené podle preference) se
+uloží vedle šablony jako <šablona>.strategy.json spolu s jejím sha256.
+
+Při běžném vyplnění se použije první funkční strategie. Jistič (circuit
+breaker) počítá chyby po sobě; po FAILURE_THRESHOLD chybách strategii
+degraduje na COOLDOWN_SECONDS a použije se další v pořadí. Když nezbude
+žádná, zkusí se nejlepší strategie a po uplynutí COOLDOWN_SECONDS od
+poslední sondy se sonda spustí znovu.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import NameObject, BooleanObject, TextStringObject
+except ImportError:
+    print("CHYBA: Knihovna pypdf není nainstalována.")
+    print("Nainstalujte ji pomocí: pip install pypdf")
+    sys.exit(1)
+
+
+CACHE_SUFFIX = '.strategy.json'
+CACHE_VERSION = 1
+
+# Počet chyb po sobě, po kterém se strategie degraduje
+FAILURE_THRESHOLD = 3
+# Doba degradace strategie v sekundách
+COOLDOWN_SECONDS = 15 * 60
+
+PROBE_VALUE = 'Sonda 123 ěščř'
+
+
+def _fill_bulk(reader: PdfReader, form_data: Dict[str, str]) -> PdfWriter:
+    """Standardní vyplnění všech polí najednou (bývalá Metoda 1 / 3)"""
+    writer = PdfWriter()
+    writer.append(reader)
+    for page in writer.pages:
+        writer.update_page_form_field_values(page, form_data)
+    return writer
+
+
+def _fill_per_field(reader: PdfReader, form_data: Dict[str, str]) -> PdfWriter:
+    """Vyplnění po jednotlivých polích - chybné pole nezastaví ostatní"""
+    writer = PdfWriter()
+    writer.append(reader)
+    for page in writer.pages:
+        for field_name, value in form_data.items():
+            try:
+                writer.update_page_form_field_values(page, {field_name: value})
+            except Exception:
+                pass
+    return writer
+
+
+def _qualified_name(field) -> str:
+    """Plně kvalifikovaný název pole (např. 'sekce_1.pole_1') přes řetěz /Parent"""
+    parts = []
+    while field is not None:
+        if "/T" in field:
+            parts.append(str(field["/T"]))
+        field = field["/Parent"].get_object() if "/Parent" in field else None
+    return '.'.join(reversed(parts))
+
+
+def _fill_direct(reader: PdfReader, form_data: Dict[str, str]) -> PdfWriter:
+    """Přímý zápis /V do widgetů; vzhled vygeneruje prohlížeč (bývalá Metoda 2)"""
+    writer = PdfWriter()
+    writer.append(reader)
+    for page in writer.pages:
+        for annot in page.get("/Annots", []):
+            annot_obj = annot.get_object()
+            if annot_obj.get("/Subtype") != "/Widget":
+                continue
+            target = annot_obj
+            if "/T" not in annot_obj and "/Parent" in annot_obj:
+                target = annot_obj["/Parent"].get_object()
+            # Hierarchické šablony (/Kids) mají v /T jen poslední část názvu
+            field_name = _qualified_name(target)
+            if field_name not in form_data:
+                continue
+            target[NameObject("/V")] = TextStringObject(form_data[field_name])
+            if "/AP" in annot_obj:
+                del annot_obj["/AP"]
+    if "/AcroForm" in writer._root_object:
+        writer._root_object["/AcroForm"][NameObject("/NeedAppearances")] = BooleanObject(True)
+    return writer
+
+
+# Strategie v pořadí preference
+STRATEGIES: Dict[str, Callable[[PdfReader, Dict[str, str]], PdfWriter]] = {
+    'bulk': _fill_bulk,
+    'per_field': _fill_per_field,
+    'direct': _fill_direct,
+}
+
+
+def _to_bytes(writer: PdfWriter) -> bytes:
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def _text_fields(reader: PdfReader) -> List[str]:
+    fields = reader.get_fields() or {}
+    return [name for name, field in fields.items() if field.get('/FT') == '/Tx']
+
+
+def probe(template_bytes: bytes) -> Dict[str, Any]:
+    """
+    Vyzkouší všechny strategie na šabloně a ověří výsledek zpětným čtením
+
+    Returns:
+        dict: {'sha256', 'fields', 'working': [názvy strategií], 'errors': {...}}
+    """
+    reader = PdfReader(io.BytesIO(template_bytes))
+    fields = _text_fields(reader)
+    probe_data = {name: PROBE_VALUE for name in fields}
+    working = []
+    errors = {}
+    # Bez textových polí (PDF bez AcroForm) není co ověřit - žádná strategie nefunguje
+    for name, strategy in (STRATEGIES.items() if fields else ()):
+        try:
+            output = _to_bytes(strategy(PdfReader(io.BytesIO(template_bytes)), probe_data))
+            values = PdfReader(io.BytesIO(output)).get_fields() or {}
+            missing = [field for field in fields if values.get(field, {}).get('/V') != PROBE_VALUE]
+            if missing:
+                errors[name] = f"{len(missing)} polí bez hodnoty (např. {missing[0]})"
+            else:
+                working.append(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+    return {
+        'version': CACHE_VERSION,
+        'sha256': hashlib.sha256(template_bytes).hexdigest(),
+        'fields': len(fields),
+        'working': working,
+        'errors': errors,
+        'probed_at': time.time(),
+        'breaker': {},
+    }
+
+
+class StrategySelector:
+    """
+    Vybírá strategii pro šablonu podle uložené sondy a stavu jističe
+    """
+
+    def __init__(self, template_path: str):
+        self.template_path = template_path
+        self.cache_path = os.path.splitext(template_path)[0] + CACHE_SUFFIX
+        with open(template_path, 'rb') as f:
+            self.template_bytes = f.read()
+        self.sha256 = hashlib.sha256(self.template_bytes).hexdigest()
+        self.state = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') == CACHE_VERSION and state.get('sha256') == self.sha256:
+                return state
+        except (OSError, ValueError):
+            pass
+        return self._probe()
+
+    def _probe(self) -> Dict[str, Any]:
+        self.state = probe(self.template_bytes)
+        self._save()
+        return self.state
+
+    def _save(self):
+        try:
+            temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            # Složka šablony může být jen pro čtení - sonda pak platí jen pro tento proces
+            pass
+
+    def _available(self, name: str) -> bool:
+        breaker = self.state['breaker'].get(name, {})
+        return breaker.get('open_until', 0) <= time.time()
+
+    def select(self) -> Optional[str]:
+        """
+        Vrátí první funkční strategii, která není degradovaná
+
+        Returns:
+            str: Název strategie, None pokud šablona nemá vyplnitelná pole
+        """
+        for name in self.state['working']:
+            if self._available(name):
+                return name
+        if self.state['working'] and time.time() - self.state['probed_at'] > COOLDOWN_SECONDS:
+            # Všechny strategie jsou degradované - možná se změnilo prostředí
+            self._probe()
+        # Žádná strategie není volná - zkusí se nejlepší (half-open)
+        return self.state['working'][0] if self.state['working'] else None
+
+    def record(self, name: str, ok: bool):
+        """
+        Zaznamená výsledek strategie do jističe
+        """
+        breaker = self.state['breaker'].get(name)
+        if ok:
+            if breaker:
+                # Úspěch po chybě uzavře jistič
+                del self.state['breaker'][name]
+                self._save()
+            return
+        breaker = self.state['breaker'].setdefault(name, {'failures': 0, 'open_until': 0})
+        breaker['failures'] += 1
+        if breaker['failures'] >= FAILURE_THRESHOLD:
+            breaker['open_until'] = time.time() + COOLDOWN_SECONDS
+            breaker['failures'] = 0
+        self._save()
+
+    def fill(self, form_data: Dict[str, str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Vyplní šablonu vybranou strategií
+
+        Returns:
+            tuple: (PDF jako bytes, název použité strategie nebo None = kopie bez vyplnění)
+        """
+        name = self.select()
+        if name is None:
+            writer = PdfWriter()
+            writer.append(PdfReader(io.BytesIO(self.template_bytes)))
+            return _to_bytes(writer), None
+        tried = set()
+        while name is not None and name not in tried:
+            tried.add(name)
+            try:
+                reader = PdfReader(io.BytesIO(self.template_bytes))
+                pdf_bytes = _to_bytes(STRATEGIES[name](reader, form_data))
+            except Exception as e:
+                # Záznam se zkusí další strategií; jistič si chybu pamatuje
+                self.record(name, False)
+                error = e
+                name = next((other for other in self.state['working']
+                             if other not in tried and self._available(other)), None)
+                continue
+            self.record(name, True)
+            return pdf_bytes, name
+        raise error
+
+
+def fill_with_strategy(template_path: str, form_data: Dict[str, str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Vyplní šablonu strategií zjištěnou sondou (viz StrategySelector.fill)
+    """
+    return StrategySelector(template_path).fill(form_data)
+
+
+if __name__ == "__main__":
+    template = sys.argv[1] if len(sys.argv) > 1 else "template.pdf"
+    result = probe(open(template, 'rb').read())
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vykreslení vyplněného formuláře přímo z rozvržení, bez šablony
+==============================================================
+
+Rozvržení formuláře je popsané v kódu (create_template.loan_form_layout).
+Místo otevírání a parsování template.pdf při každém vyplnění se rozvržení
+jednou zkompiluje:
+
+- statický obsah stránek (popisky, rámečky polí, čáry) do hotového
+  komprimovaného content streamu,
+- všechny pevné objekty PDF (katalog, stránky, písma, kódování) do
+  bajtového prefixu se známými offsety pro xref,
+- každé pole do předpočítaného úseku operátorů (ořez na rámeček pole,
+  písmo, pozice), kam se jen vloží zakódovaná hodnota.
+
+Vyplnění záznamu pak jen spojí prefix, jeden malý stream hodnot na stránku
+a xref - výsledek je zploštělý dokument (bez AcroFormu). Písma jsou
+standardní Helvetica bez vložení, s kódováním cp1250 přes /Differences,
+takže čeština (ř, ě, ů...) vychází správně.
+
+Druhý engine 'reportlab' přehrává zkompilovaný seznam instrukcí na
+reportlab canvas s vloženým DejaVuSans - pomalejší, ale s vloženým písmem.
+
+Použití:
+    python render_layout.py <data.json> [--out vyplneny.pdf] [--engine raw|reportlab]
+    python render_layout.py --bench [--count 300] [--results layout_bench.json]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from create_template import DEFAULT_FONT, loan_form_layout
+
+# Kódování cp1250 pro standardní písma sdílí s pokračovacími stranami scripts/bohemika_pdftext.py
+sys.path.append(str(Path(__file__).parent / "scripts"))
+from bohemika_pdftext import ENCODING_OBJECT, encode_text, pdf_number as _num
+
+# Písmo vyplněných hodnot
+VALUE_FONT = 'Helvetica'
+# Vnitřní okraj textu v rámečku pole (jako vzhled pole s borderStyle='inset')
+FIELD_PADDING = 2
+# TTF náhrady standardních písem pro engine 'reportlab'
+TTF_FONTS = {
+    'Helvetica': DEFAULT_FONT,
+    'Helvetica-Bold': DEFAULT_FONT.replace('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf'),
+}
+
+
+def _pdf_text_string(text: str) -> bytes:
+    # Texty v /Info jako UTF-16BE s BOM
+    return b'<FEFF' + text.encode('utf-16-be').hex().upper().encode('ascii') + b'>'
+
+
+class CompiledLayout:
+    """
+    Zkompilované rozvržení - sdílí se mezi všemi vyplněními
+
+    Attributes:
+        ops (list): Instrukce statického obsahu pro reportlab po stránkách
+            [(metoda canvasu, argumenty), ...]
+        slots (dict): Název pole -> [(stránka, x, y, šířka, výška, velikost písma)]
+        prefix (bytes): Pevná část PDF (hlavička a všechny statické objekty)
+        offsets (list): Offsety objektů prefixu pro xref
+    """
+
+    def __init__(self, layout: Dict[str, Any]):
+        self.title = layout.get('title', '')
+        self.author = layout.get('author', '')
+        self.pagesize = layout['pagesize']
+        self.page_count = len(layout['pages'])
+        self.ops: List[List[Tuple[str, tuple]]] = []
+        self.slots: Dict[str, List[Tuple[int, float, float, float, float, float]]] = {}
+        # Použitá písma -> název zdroje (/F1, /F2...)
+        self.fonts: Dict[str, bytes] = {VALUE_FONT: b'F1'}
+
+        streams = []
+        for page, elements in enumerate(layout['pages']):
+            page_ops, content = self._compile_page(page, elements)
+            self.ops.append(page_ops)
+            streams.append(zlib.compress(content))
+        self.field_ops = self._compile_fields()
+        self._build_prefix(streams)
+
+    def _font(self, name: str) -> bytes:
+        if name not in self.fonts:
+            self.fonts[name] = b'F%d' % (len(self.fonts) + 1)
+        return self.fonts[name]
+
+    def _compile_page(self, page: int, elements: List[Dict[str, Any]]):
+        ops = []
+        content = []
+        for element in elements:
+            kind = element['kind']
+            if kind == 'text':
+                ops.append(('setFont', (element['font'], element['size'])))
+                ops.append(('drawString', (element['x'], element['y'], element['text'])))
+                content.append(b'BT /%s %s Tf %s %s Td (%s) Tj ET\n' % (
+                    self._font(element['font']), _num(element['size']),
+                    _num(element['x']), _num(element['y']), encode_text(element['text'])))
+            elif kind == 'field':
+                x, y, width, height = element['x'], element['y'], element['width'], element['height']
+                ops.append(('rect', (x, y, width, height)))
+                content.append(b'%s %s %s %s re S\n' % (_num(x), _num(y), _num(width), _num(height)))
+                self.slots.setdefault(element['name'], []).append(
+                    (page, x, y, width, height, element['font_size']))
+            elif kind == 'line':
+                ops.append(('line', (element['x1'], element['y1'], element['x2'], element['y2'])))
+                content.append(b'%s %s m %s %s l S\n' % (
+                    _num(element['x1']), _num(element['y1']), _num(element['x2']), _num(element['y2'])))
+        return ops, b''.join(content)
+
+    def _compile_fields(self) -> Dict[str, List[Tuple[int, bytes]]]:
+        """
+        Název pole -> [(stránka, operátory před hodnotou)] - ořez na
+        rámeček pole, písmo a pozice účaří jsou předpočítané
+        """
+        font = self.fonts[VALUE_FONT]
+        field_ops = {}
+        for name, slots in self.slots.items():
+            field_ops[name] = []
+            for page, x, y, width, height, size in slots:
+                baseline = y + (height - size) / 2 + size * 0.22
+                field_ops[name].append((page, b'q %s %s %s %s re W n BT /%s %s Tf %s %s Td (' % (
+                    _num(x + 1), _num(y + 1), _num(width - 2), _num(height - 2), font, _num(size),
+                    _num(x + FIELD_PADDING), _num(round(baseline, 2)))))
+        return field_ops
+
+    def _build_prefix(self, streams: List[bytes]):
+        """
+        Objekty: 1 katalog, 2 stránky, 3 info, 4 kódování, písma, pak na
+        stránku objekt stránky a statický stream; streamy hodnot jsou až za
+        prefixem (čísla objektů jsou předem dána)
+        """
+        objects: List[bytes] = []
+
+        def add(body: bytes) -> int:
+            objects.append(body)
+            return len(objects)
+
+        font_count = len(self.fonts)
+        first_page = 5 + font_count
+        # Streamy hodnot jsou objekty za prefixem: first_page + 2 * page_count + stránka
+        self.first_value_object = first_page + 2 * self.page_count
+        page_refs = b' '.join(b'%d 0 R' % (first_page + 2 * page) for page in range(self.page_count))
+
+        add(b'<< /Type /Catalog /Pages 2 0 R >>')
+        add(b'<< /Type /Pages /Kids [%s] /Count %d >>' % (page_refs, self.page_count))
+        add(b'<< /Title %s /Author %s /Producer (render_layout.py) >>' % (
+            _pdf_text_string(self.title), _pdf_text_string(self.author)))
+        add(ENCODING_OBJECT)
+        font_resources = []
+        for font, resource in self.fonts.items():
+            number = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding 4 0 R >>' % font.encode('ascii'))
+            font_resources.append(b'/%s %d 0 R' % (resource, number))
+        resources = b'<< /Font << %s >> >>' % b' '.join(font_resources)
+        width, height = self.pagesize
+        for page, stream in enumerate(streams):
+            add(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %s %s] /Resources %s /Contents [%d 0 R %d 0 R] >>' % (
+                _num(width), _num(height), resources, first_page + 2 * page + 1, self.first_value_object + page))
+            add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+        buffer = io.BytesIO()
+        buffer.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self.offsets = []
+        for number, body in enumerate(objects, 1):
+            self.offsets.append(buffer.tell())
+            buffer.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        self.prefix = buffer.getvalue()
+
+    def render(self, values: Dict[str, Any]) -> bytes:
+        """
+        Vykreslí vyplněný zploštělý dokument (engine 'raw')
+
+        Args:
+            values (dict): Název pole -> hodnota (prázdné hodnoty se vynechají)
+        """
+        pages: List[List[bytes]] = [[] for _ in range(self.page_count)]
+        for name, value in values.items():
+            if not value or name not in self.field_ops:
+                continue
+            text = encode_text(str(value))
+            for page, ops in self.field_ops[name]:
+                pages[page].append(ops + text + b') Tj ET Q\n')
+
+        parts = [self.prefix]
+        offsets = list(self.offsets)
+        position = len(self.prefix)
+        for page, number in enumerate(range(self.first_value_object, self.first_value_object + self.page_count)):
+            content = b''.join(pages[page])
+            chunk = b'%d 0 obj\n<< /Length %d >>\nstream\n%s\nendstream\nendobj\n' % (number, len(content), content)
+            offsets.append(position)
+            parts.append(chunk)
+            position += len(chunk)
+
+        xref = [b'xref\n0 %d\n0000000000 65535 f \n' % (len(offsets) + 1)]
+        xref.extend(b'%010d 00000 n \n' % offset for offset in offsets)
+        parts.extend(xref)
+        parts.append(b'trailer\n<< /Size %d /Root 1 0 R /Info 3 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+            len(offsets) + 1, position))
+        return b''.join(parts)
+
+    def render_reportlab(self, values: Dict[str, Any]) -> bytes:
+        """
+        Vykreslí vyplněný dokument přehráním instrukcí na reportlab canvas
+        (engine 'reportlab', písmo DejaVuSans se vkládá)
+        """
+        fonts = _register_ttf_fonts()
+        buffer = io.BytesIO()
+        c = canvas.Canvas(buffer, pagesize=self.pagesize)
+        c.setTitle(self.title)
+        c.setAuthor(self.author)
+        for page, ops in enumerate(self.ops):
+            for method, args in ops:
+                if method == 'setFont':
+                    args = (fonts.get(args[0], args[0]),) + args[1:]
+                getattr(c, method)(*args)
+            for name, value in values.items():
+                if not value:
+                    continue
+                for slot_page, x, y, width, height, size in self.slots.get(name, ()):
+                    if slot_page != page:
+                        continue
+                    c.saveState()
+                    path = c.beginPath()
+                    path.rect(x + 1, y + 1, width - 2, height - 2)
+                    c.clipPath(path, stroke=0, fill=0)
+                    c.setFont(fonts.get(VALUE_FONT, VALUE_FONT), size)
+                    c.drawString(x + FIELD_PADDING, y + (height - size) / 2 + size * 0.22, str(value))
+                    c.restoreState()
+            c.showPage()
+        c.save()
+        return buffer.getvalue()
+
+
+_ttf_fonts: Optional[Dict[str, str]] = None
+
+
+def _register_ttf_fonts() -> Dict[str, str]:
+    """Zaregistruje TTF náhrady standardních písem (jednou za proces)"""
+    global _ttf_fonts
+    if _ttf_fonts is None:
+        _ttf_fonts = {}
+        for font, path in TTF_FONTS.items():
+            if os.path.exists(path):
+                name = os.path.splitext(os.path.basename(path))[0]
+                pdfmetrics.registerFont(TTFont(name, path))
+                _ttf_fonts[font] = name
+    return _ttf_fonts
+
+
+_compiled: Dict[str, CompiledLayout] = {}
+
+
+def compile_layout(layout: Optional[Dict[str, Any]] = None, key: str = 'loan_form') -> CompiledLayout:
+    """
+    Zkompiluje rozvržení (výchozí: formulář žádosti o úvěr) a uloží ho
+    v procesu pod klíčem - další volání vrací hotový výsledek
+    """
+    if key not in _compiled:
+        _compiled[key] = CompiledLayout(layout if layout is not None else loan_form_layout())
+    return _compiled[key]
+
+
+def render(values: Dict[str, Any], engine: str = 'raw') -> bytes:
+    """
+    Vykreslí vyplněný formulář žádosti o úvěr bez šablony
+
+    Args:
+        values (dict): Název pole -> hodnota
+        engine (str): 'raw' nebo 'reportlab'
+    """
+    compiled = compile_layout()
+    if engine == 'raw':
+        return compiled.render(values)
+    if engine == 'reportlab':
+        return compiled.render_reportlab(values)
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def _fill_template(backend: str):
+    """Vyplnění template.pdf pro srovnání (parsuje šablonu při každém volání)"""
+    from create_template import BENCH_BACKENDS
+
+    fill = BENCH_BACKENDS[backend]
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'template.pdf'), 'rb') as f:
+        template_bytes = f.read()
+    return lambda values: fill(template_bytes, values)
+
+
+def run_benchmark(count: int = 300, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Porovná vykreslení z rozvržení s vyplňováním template.pdf
+
+    Returns:
+        list: Řádky {'method', 'docs_per_s', 'median_ms', 'p95_ms', 'avg_size'}
+    """
+    from create_test_data import generate_records
+
+    field_set = {name for slots in loan_form_layout()['pages'] for name in
+                 (element['name'] for element in slots if element['kind'] == 'field')}
+    records = [{name: str(value) for name, value in record.items() if name in field_set}
+               for record in generate_records(count, seed)]
+    methods = {
+        'layout-raw': compile_layout().render,
+        'layout-reportlab': compile_layout().render_reportlab,
+        'template-fitz': _fill_template('fitz'),
+        'template-pypdf': _fill_template('pypdf-bulk'),
+    }
+    results = []
+    for method, fill in methods.items():
+        fill(records[0])  # zahřátí (importy, registrace písem)
+        latencies = []
+        size = 0
+        started = time.perf_counter()
+        for values in records:
+            begin = time.perf_counter()
+            size += len(fill(values))
+            latencies.append((time.perf_counter() - begin) * 1000)
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        row = {
+            'method': method,
+            'docs_per_s': round(count / elapsed, 1),
+            'median_ms': round(latencies[len(latencies) // 2], 3),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            'avg_size': size // count,
+        }
+        print(f"  {method:18s} {row['docs_per_s']:9.1f} dok/s  medián {row['median_ms']:8.3f} ms  "
+              f"{row['avg_size']:8,} B", file=sys.stderr)
+        results.append(row)
+    return results
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Vyplněný formulář přímo z rozvržení (bez šablony)")
+    parser.add_argument('input', nargs='?', help="JSON soubor nebo JSON řetězec s daty formuláře")
+    parser.add_argument('--out', default='vyplneny_formular.pdf', help="Výstupní PDF")
+    parser.add_argument('--engine', choices=('raw', 'reportlab'), default='raw')
+    parser.add_argument('--bench', action='store_true', help="Srovnání se šablonou template.pdf")
+    parser.add_argument('--count', type=int, default=300, help="Počet záznamů benchmarku")
+    parser.add_argument('--results', help="Výsledky benchmarku (JSON)")
+    args = parser.parse_args()
+
+    if args.bench:
+        results = run_benchmark(args.count)
+        if args.results:
+            with open(args.results, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Výsledky benchmarku: {args.results}")
+        return
+    if not args.input:
+        parser.error("input is required")
+
+    if os.path.isfile(args.input):
+        with open(args.input, 'r', encoding='utf-8') as f:
+            form_data = json.load(f)
+    else:
+        form_data = json.loads(args.input)
+
+    pdf_bytes = render(form_data, args.engine)
+    with open(args.out, 'wb') as f:
+        f.write(pdf_bytes)
+    print(f"✅ Formulář vykreslen: {args.out} ({len(pdf_bytes):,} bytů)")
+
+
+if __name__ == "__main__":
+    main()
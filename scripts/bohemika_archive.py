@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Archivní výstupy (ZIP / tar) pro dávkové vyplňování Bohemika formulářů
+Každé PDF se zapisuje do archivu hned po vyplnění přes omezenou frontu
+a vlastní zapisovací vlákno, takže dávka nevytváří statisíce souborů
+ani nedrží výstupy v paměti. Na konec archivu se přidá manifest.jsonl
+s jedním řádkem na záznam. Když dávka skončí výjimkou, archiv se
+nedokončí a rozepsaný soubor se smaže.
+"""
+
+import abc
+import hashlib
+import io
+import json
+import os
+import queue
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from typing import Dict, Any, List, Optional
+
+COMPRESSIONS = ('stored', 'deflate')
+MANIFEST_NAME = 'manifest.jsonl'
+
+# Kolik vyplněných PDF může čekat na zápis
+BUFFER_SIZE = 64
+
+_SENTINEL = object()
+
+
+class ArchiveSink(abc.ABC):
+    """
+    Společný základ archivních výstupů s write-behind vláknem
+
+    Podtřídy implementují _open, _add, _add_file a _finish.
+    """
+
+    def __init__(self, path: str, compression: str = 'stored', buffer_size: int = BUFFER_SIZE):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.path = str(path)
+        self.compression = compression
+        self.count = 0
+        self._names = set()
+        self._errors: List[BaseException] = []
+        self._aborted = False
+        # Manifest se průběžně odkládá na disk, ne do paměti
+        self._manifest = tempfile.TemporaryFile('w+b')
+        self._queue: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self._open()
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def __call__(self, key: str, pdf_bytes: bytes):
+        self.write(key, pdf_bytes)
+
+    def write(self, key: str, pdf_bytes: bytes):
+        """
+        Zařadí PDF k zápisu (blokuje, pokud je fronta plná)
+        """
+        if self._errors:
+            raise self._errors[0]
+        self._queue.put((key, pdf_bytes))
+
+    def close(self) -> int:
+        """
+        Dopíše frontu, přidá manifest a uzavře archiv
+
+        Returns:
+            int: Počet zapsaných záznamů
+        """
+        if self._thread.is_alive():
+            self._queue.put(_SENTINEL)
+            self._thread.join()
+            if not self._errors:
+                self._manifest.seek(0)
+                self._add_file(MANIFEST_NAME, self._manifest, self._manifest_size())
+            self._finish()
+            self._manifest.close()
+        if self._errors:
+            raise self._errors[0]
+        return self.count
+
+    def abort(self):
+        """
+        Zahodí frontu a smaže rozepsaný archiv (bez manifestu)
+        """
+        if not self._thread.is_alive():
+            return
+        self._aborted = True
+        self._queue.put(_SENTINEL)
+        self._thread.join()
+        try:
+            self._finish()
+        finally:
+            self._manifest.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _manifest_size(self) -> int:
+        self._manifest.seek(0, io.SEEK_END)
+        size = self._manifest.tell()
+        self._manifest.seek(0)
+        return size
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is _SENTINEL:
+                return
+            if self._errors or self._aborted:
+                continue
+            key, pdf_bytes = item
+            try:
+                name = f"{key}.pdf"
+                if name in self._names:
+                    # Opakovaný klíč (retry) se do archivu nezapisuje dvakrát
+                    continue
+                self._names.add(name)
+                self._add(name, pdf_bytes)
+                entry = {
+                    'key': key,
+                    'name': name,
+                    'size': len(pdf_bytes),
+                    'sha256': hashlib.sha256(pdf_bytes).hexdigest(),
+                }
+                self._manifest.write((json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8'))
+                self.count += 1
+            except BaseException as e:
+                self._errors.append(e)
+
+    @abc.abstractmethod
+    def _open(self):
+        """Otevře archiv pro zápis"""
+
+    @abc.abstractmethod
+    def _add(self, name: str, data: bytes):
+        """Přidá soubor z bajtů"""
+
+    @abc.abstractmethod
+    def _add_file(self, name: str, fileobj, size: int):
+        """Přidá soubor z otevřeného souboru (manifest)"""
+
+    @abc.abstractmethod
+    def _finish(self):
+        """Dokončí a zavře archiv"""
+
+
+class ZipSink(ArchiveSink):
+    """
+    ZIP archiv (ZIP64, stored nebo deflate)
+    """
+
+    def _open(self):
+        mode = zipfile.ZIP_STORED if self.compression == 'stored' else zipfile.ZIP_DEFLATED
+        self._zip = zipfile.ZipFile(self.path, 'w', compression=mode, allowZip64=True)
+
+    def _add(self, name: str, data: bytes):
+        self._zip.writestr(name, data)
+
+    def _add_file(self, name: str, fileobj, size: int):
+        with self._zip.open(name, 'w', force_zip64=True) as dest:
+            while True:
+                chunk = fileobj.read(1 << 16)
+                if not chunk:
+                    break
+                dest.write(chunk)
+
+    def _finish(self):
+        self._zip.close()
+
+
+class TarSink(ArchiveSink):
+    """
+    Tar archiv (stored = .tar, deflate = .tar.gz)
+    """
+
+    def _open(self):
+        mode = 'w' if self.compression == 'stored' else 'w:gz'
+        self._tar = tarfile.open(self.path, mode)
+
+    def _add(self, name: str, data: bytes):
+        self._add_file(name, io.BytesIO(data), len(data))
+
+    def _add_file(self, name: str, fileobj, size: int):
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(time.time())
+        self._tar.addfile(info, fileobj)
+
+    def _finish(self):
+        self._tar.close()
+
+
+def open_sink(path: str, compression: Optional[str] = None, buffer_size: int = BUFFER_SIZE) -> ArchiveSink:
+    """
+    Vytvoří archivní výstup podle přípony (.zip, .tar, .tar.gz, .tgz)
+
+    Args:
+        path (str): Cesta k archivu
+        compression (str): 'stored' nebo 'deflate'; výchozí je 'stored' pro
+            .zip/.tar (PDF už jsou komprimovaná) a 'deflate' pro .tar.gz.
+            U tar archivu určuje kompresi přípona, jiná hodnota je chyba.
+    """
+    lower = str(path).lower()
+    if lower.endswith('.zip'):
+        return ZipSink(path, compression or 'stored', buffer_size)
+    if lower.endswith(('.tar.gz', '.tgz')):
+        expected = 'deflate'
+    elif lower.endswith('.tar'):
+        expected = 'stored'
+    else:
+        raise ValueError(f"Unsupported archive type: {path}")
+    if compression not in (None, expected):
+        raise ValueError(f"Compression '{compression}' does not match archive type: {path}")
+    return TarSink(path, expected, buffer_size)
+
+
+def read_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Načte manifest z hotového archivu
+    """
+    if str(path).lower().endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            data = archive.read(MANIFEST_NAME)
+    else:
+        with tarfile.open(path) as archive:
+            data = archive.extractfile(MANIFEST_NAME).read()
+    return [json.loads(line) for line in data.decode('utf-8').splitlines() if line]
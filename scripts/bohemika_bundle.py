@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tiskový balík - všechny vyplněné Bohemika formuláře v jednom PDF
+Stránka šablony se do balíku vloží jednou jako Form XObject (včetně
+fontů a obrázků) a každá kopie na ni jen odkazuje. Ke každé kopii se
+přidá pouze text vyplněných hodnot (zploštěná pole), takže velikost
+balíku roste o dynamický obsah záznamu, ne o celou šablonu.
+
+Použití:
+    python bohemika_bundle.py <data.jsonl> [--out balik.pdf] [--template sablona.pdf]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Tuple, Union
+
+from bohemika_engine import TEMPLATE_PATH, load_template, map_form_data
+from bohemika_manifest import import_fitz
+from bohemika_jobs import read_records
+
+# Font s českou diakritikou (v balíku se uloží jen použité znaky)
+FONT_PATH = Path(__file__).parent.parent / "public" / "fonts" / "NotoSans-Regular.ttf"
+FONT_SIZE = 10
+# Odsazení textu od levého okraje pole
+PADDING = 2
+
+
+def template_layout(template_doc) -> List[List[Tuple[str, Any]]]:
+    """
+    Vrátí textová pole šablony po stránkách jako (název, obdélník)
+    """
+    fitz = import_fitz()
+
+    layout = []
+    for page in template_doc:
+        layout.append([
+            (widget.field_name, widget.rect)
+            for widget in page.widgets()
+            if widget.field_type == fitz.PDF_WIDGET_TYPE_TEXT
+        ])
+    return layout
+
+
+def build_bundle(records: Iterable[Dict[str, Any]],
+                 output_path: str,
+                 template_path: Union[str, Path] = TEMPLATE_PATH,
+                 font_path: Union[str, Path] = FONT_PATH,
+                 font_size: float = FONT_SIZE) -> int:
+    """
+    Vytvoří tiskový balík ze záznamů
+
+    Args:
+        records: Záznamy (form_data) k vyplnění
+        output_path (str): Cesta k výslednému PDF
+        template_path (str): Cesta k šabloně PDF
+        font_path (str): TrueType font pro vyplněné hodnoty
+
+    Returns:
+        int: Počet záznamů v balíku
+    """
+    fitz = import_fitz()
+
+    template = fitz.open(stream=load_template(template_path), filetype="pdf")
+    bundle = fitz.open()
+    font = fitz.Font(fontfile=str(font_path))
+    layout = template_layout(template)
+    count = 0
+    try:
+        for record in records:
+            values = map_form_data(record)
+            for page_num, fields in enumerate(layout):
+                source = template[page_num]
+                page = bundle.new_page(width=source.rect.width, height=source.rect.height)
+                # Opakované vložení stejné stránky šablony znovu použije tentýž XObject
+                page.show_pdf_page(page.rect, template, page_num)
+                writer = fitz.TextWriter(page.rect)
+                for field_name, rect in fields:
+                    value = values.get(field_name)
+                    if not value:
+                        continue
+                    baseline = rect.y0 + (rect.height + font_size * 0.7) / 2
+                    writer.append((rect.x0 + PADDING, baseline), value, font=font, fontsize=font_size)
+                writer.write_text(page)
+            count += 1
+        bundle.subset_fonts()
+        bundle.save(output_path, garbage=3, deflate=True)
+    finally:
+        bundle.close()
+        template.close()
+    return count
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Tiskový balík Bohemika formulářů")
+    parser.add_argument('input', help="JSONL/JSON soubor se záznamy")
+    parser.add_argument('--out', default='bohemika_balik.pdf', help="Výstupní PDF")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--font', default=str(FONT_PATH))
+    args = parser.parse_args()
+
+    count = build_bundle(read_records(args.input), args.out, args.template, args.font)
+    print(f"Bundled {count} forms into {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Koordinátor a workery pro rozdělení dávky Bohemika formulářů mezi více uzlů
+Staví na frontě z bohemika_jobs.py: koordinátor rozdělí záznamy úlohy na
+rozsahy (shardy), workery si je nárokují ze sdílené SQLite databáze a
+nečinný worker převezme horní polovinu rozsahu nejpomalejšího kolegy.
+Výsledný manifest obsahuje každý záznam právě jednou.
+
+Použití:
+    python bohemika_cluster.py plan <job_id> [--shard-size 500] [--db jobs.sqlite]
+    python bohemika_cluster.py worker <job_id> [--node uzel-1] [--db jobs.sqlite] [--metrics-port 9108]
+    python bohemika_cluster.py local <job_id> [--workers 4] [--db jobs.sqlite]
+    python bohemika_cluster.py retry <job_id> [--db jobs.sqlite]
+    python bohemika_cluster.py report <job_id> [--db jobs.sqlite]
+    python bohemika_cluster.py manifest <job_id> [--db jobs.sqlite]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import bohemika_metrics
+from bohemika_documents import (documents_digest, fill_document_set, is_document_set,
+                                set_name_of, write_document_set)
+from bohemika_engine import fill_record
+from bohemika_jobs import DEFAULT_DB, JobQueue, queue_depth
+from bohemika_metrics import QUEUE_DEPTH
+from bohemika_profile import add_profile_arguments, options_from_args, start_profiler
+from bohemika_trace import emit_summary
+
+CLUSTER_SCHEMA = """
+CREATE INDEX IF NOT EXISTS records_by_seq ON records (job_id, seq);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    start_seq INTEGER NOT NULL,
+    end_seq INTEGER NOT NULL,
+    next_seq INTEGER NOT NULL,
+    owner TEXT,
+    lease_until REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending'
+);
+CREATE INDEX IF NOT EXISTS shards_by_job ON shards (job_id, status);
+CREATE TABLE IF NOT EXISTS nodes (
+    job_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    stolen INTEGER NOT NULL DEFAULT 0,
+    busy_seconds REAL NOT NULL DEFAULT 0,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (job_id, node_id)
+);
+CREATE TABLE IF NOT EXISTS manifest (
+    job_id TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (job_id, record_key)
+);
+"""
+
+# Jak dlouho platí nárok na shard bez obnovení (po pádu uzlu ho převezme jiný)
+LEASE_SECONDS = 60
+# Menší zbytek rozsahu se nevyplatí dělit
+MIN_STEAL = 4
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class ClusterQueue(JobQueue):
+    """
+    Rozšíření fronty úloh o shardy, uzly a manifest
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        super().__init__(db_path)
+        self.conn.executescript(CLUSTER_SCHEMA)
+
+    def plan(self, job_id: str, shard_size: int = 500) -> int:
+        """
+        Rozdělí záznamy úlohy na shardy (koordinátor)
+
+        Returns:
+            int: Počet vytvořených shardů
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.conn.execute("SELECT 1 FROM shards WHERE job_id = ? LIMIT 1", (job_id,)).fetchone():
+                self.conn.execute("ROLLBACK")
+                return 0
+            total = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM records WHERE job_id = ?", (job_id,)).fetchone()[0]
+            count = 0
+            for start in range(0, total, shard_size):
+                end = min(start + shard_size, total)
+                self.conn.execute(
+                    "INSERT INTO shards (job_id, start_seq, end_seq, next_seq) VALUES (?, ?, ?, ?)",
+                    (job_id, start, end, start))
+                count += 1
+            self.conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                              (time.time(), job_id))
+            self.conn.execute("COMMIT")
+            return count
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def retry(self, job_id: str) -> int:
+        """
+        Vrátí selhané záznamy do fronty a naplánuje pro ně nové shardy
+
+        Původní shardy už mají rozsah odbavený, proto každý souvislý úsek
+        selhaných seq dostane vlastní shard (velké úseky pak dělí krádež).
+
+        Returns:
+            int: Počet znovu zařazených záznamů
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            seqs = [row[0] for row in self.conn.execute(
+                "SELECT seq FROM records WHERE job_id = ? AND status = 'failed' ORDER BY seq", (job_id,))]
+            runs = []
+            for seq in seqs:
+                if runs and runs[-1][1] == seq:
+                    runs[-1][1] = seq + 1
+                else:
+                    runs.append([seq, seq + 1])
+            for start, end in runs:
+                self.conn.execute(
+                    "INSERT INTO shards (job_id, start_seq, end_seq, next_seq) VALUES (?, ?, ?, ?)",
+                    (job_id, start, end, start))
+            self.conn.execute(
+                "UPDATE records SET status = 'pending', error = NULL WHERE job_id = ? AND status = 'failed'",
+                (job_id,))
+            if seqs:
+                self.conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                                  (time.time(), job_id))
+            self.conn.execute("COMMIT")
+            return len(seqs)
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def claim(self, job_id: str, node_id: str) -> Optional[int]:
+        """
+        Nárokuje volný shard, případně ukradne část rozsahu pomalého uzlu
+
+        Returns:
+            int: ID shardu nebo None, pokud už není co dělat
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.conn.execute(
+                "SELECT id FROM shards WHERE job_id = ? AND next_seq < end_seq "
+                "AND (status = 'pending' OR lease_until < ?) ORDER BY start_seq LIMIT 1",
+                (job_id, now)).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE shards SET owner = ?, lease_until = ?, status = 'running' WHERE id = ?",
+                    (node_id, now + LEASE_SECONDS, row['id']))
+                self.conn.execute("COMMIT")
+                return row['id']
+
+            # Krádež: největší zbývající rozsah jiného uzlu rozdělíme napůl.
+            # Vlastník právě zpracovává next_seq, proto dělíme až za ním.
+            victim = self.conn.execute(
+                "SELECT id, next_seq, end_seq FROM shards WHERE job_id = ? AND status = 'running' "
+                "AND owner != ? AND end_seq - next_seq >= ? ORDER BY end_seq - next_seq DESC LIMIT 1",
+                (job_id, node_id, MIN_STEAL)).fetchone()
+            if victim is None:
+                self.conn.execute("COMMIT")
+                return None
+            middle = victim['next_seq'] + (victim['end_seq'] - victim['next_seq'] + 1) // 2
+            self.conn.execute("UPDATE shards SET end_seq = ? WHERE id = ?", (middle, victim['id']))
+            cursor = self.conn.execute(
+                "INSERT INTO shards (job_id, start_seq, end_seq, next_seq, owner, lease_until, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'running')",
+                (job_id, middle, victim['end_seq'], middle, node_id, now + LEASE_SECONDS))
+            self.conn.execute(
+                "UPDATE nodes SET stolen = stolen + ? WHERE job_id = ? AND node_id = ?",
+                (victim['end_seq'] - middle, job_id, node_id))
+            self.conn.execute("COMMIT")
+            return cursor.lastrowid
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _register_node(self, job_id: str, node_id: str):
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR IGNORE INTO nodes (job_id, node_id, started_at, updated_at) VALUES (?, ?, ?, ?)",
+            (job_id, node_id, now, now))
+
+    def work(self, job_id: str, node_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Smyčka workeru: nárokuje shardy a vyplňuje jejich záznamy
+
+        Returns:
+            dict: Statistika uzlu
+        """
+        node_id = node_id or default_node_id()
+        job = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        output_dir = Path(job['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self._register_node(job_id, node_id)
+
+        while True:
+            shard_id = self.claim(job_id, node_id)
+            if shard_id is None:
+                break
+            self._run_shard(job, shard_id, node_id, output_dir)
+
+        if not self.conn.execute(
+                "SELECT 1 FROM shards WHERE job_id = ? AND next_seq < end_seq LIMIT 1", (job_id,)).fetchone():
+            self.conn.execute("UPDATE jobs SET status = 'done', updated_at = ? WHERE id = ?",
+                              (time.time(), job_id))
+        emit_summary(job_id=job_id, node_id=node_id)
+        bohemika_metrics.flush(force=True)
+        return dict(self.conn.execute(
+            "SELECT * FROM nodes WHERE job_id = ? AND node_id = ?", (job_id, node_id)).fetchone())
+
+    def _run_shard(self, job, shard_id: int, node_id: str, output_dir: Path):
+        job_id = job['id']
+        while True:
+            shard = self.conn.execute(
+                "SELECT next_seq, end_seq, owner FROM shards WHERE id = ?", (shard_id,)).fetchone()
+            # Rozsah mohl být zkrácen krádeží nebo převzat po vypršení nároku
+            if shard['owner'] != node_id or shard['next_seq'] >= shard['end_seq']:
+                break
+            seq = shard['next_seq']
+            record = self.conn.execute(
+                "SELECT record_key, payload, status, output_path, sha256, size FROM records "
+                "WHERE job_id = ? AND seq = ?",
+                (job_id, seq)).fetchone()
+
+            started = time.perf_counter()
+            result = None
+            if record is not None and record['status'] != 'done':
+                result = self._fill(job, record, output_dir)
+            elapsed = time.perf_counter() - started
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                owned = self.conn.execute(
+                    "UPDATE shards SET next_seq = ?, lease_until = ? "
+                    "WHERE id = ? AND owner = ? AND next_seq = ?",
+                    (seq + 1, time.time() + LEASE_SECONDS, shard_id, node_id, seq)).rowcount
+                if owned and result is None and record is not None:
+                    # Záznam hotový už dřív (bohemika_jobs.py work, předchozí běh) se
+                    # nevyplňuje znovu, ale do manifestu patří také
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO manifest (job_id, record_key, node_id, output_path, sha256, size) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (job_id, record['record_key'], node_id, record['output_path'],
+                         record['sha256'], record['size']))
+                if owned and result is not None:
+                    key = record['record_key']
+                    if 'error' in result:
+                        self.conn.execute(
+                            "UPDATE records SET status = 'failed', attempts = attempts + 1, error = ? "
+                            "WHERE job_id = ? AND record_key = ?", (result['error'], job_id, key))
+                    else:
+                        self.conn.execute(
+                            "INSERT OR IGNORE INTO manifest (job_id, record_key, node_id, output_path, sha256, size) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            (job_id, key, node_id, result['output_path'], result['sha256'], result['size']))
+                        self.conn.execute(
+                            "UPDATE records SET status = 'done', attempts = attempts + 1, output_path = ?, "
+                            "sha256 = ?, size = ?, error = NULL WHERE job_id = ? AND record_key = ?",
+                            (result['output_path'], result['sha256'], result['size'], job_id, key))
+                    self.conn.execute(
+                        "UPDATE nodes SET records = records + 1, busy_seconds = busy_seconds + ?, updated_at = ? "
+                        "WHERE job_id = ? AND node_id = ?", (elapsed, time.time(), job_id, node_id))
+                if owned and self.conn.execute(
+                        "SELECT next_seq >= end_seq FROM shards WHERE id = ?", (shard_id,)).fetchone()[0]:
+                    self.conn.execute("UPDATE shards SET status = 'done' WHERE id = ?", (shard_id,))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            bohemika_metrics.flush()
+            if not owned:
+                break
+
+    @staticmethod
+    def _fill(job, record, output_dir: Path) -> Dict[str, Any]:
+        key = record['record_key']
+        try:
+            if is_document_set(job['template_path']):
+                documents = fill_document_set(json.loads(record['payload']),
+                                              set_name_of(job['template_path']), job['backend'])
+            else:
+                pdf_bytes = fill_record(json.loads(record['payload']), job['template_path'], job['backend'])
+        except Exception as e:
+            return {'error': f"{type(e).__name__}: {e}"}
+        if is_document_set(job['template_path']):
+            return {
+                'output_path': str(write_document_set(output_dir, key, documents)),
+                'sha256': documents_digest(documents),
+                'size': sum(map(len, documents.values())),
+            }
+        output_path = output_dir / f"{key}.pdf"
+        # Dočasný soubor je unikátní pro proces, aby se souběžné zápisy nepřepisovaly
+        temp_path = output_dir / f"{key}.pdf.{os.getpid()}.part"
+        with open(temp_path, 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(temp_path, output_path)
+        return {
+            'output_path': str(output_path),
+            'sha256': hashlib.sha256(pdf_bytes).hexdigest(),
+            'size': len(pdf_bytes),
+        }
+
+    def report(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Vrátí propustnost jednotlivých uzlů
+        """
+        rows = self.conn.execute(
+            "SELECT node_id, records, stolen, busy_seconds, started_at, updated_at "
+            "FROM nodes WHERE job_id = ? ORDER BY node_id", (job_id,))
+        report = []
+        for row in rows:
+            wall = max(row['updated_at'] - row['started_at'], 1e-9)
+            report.append({
+                'node_id': row['node_id'],
+                'records': row['records'],
+                'stolen': row['stolen'],
+                'records_per_second': round(row['records'] / wall, 2),
+                'busy_seconds': round(row['busy_seconds'], 3),
+            })
+        return report
+
+    def manifest(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Vrátí společný manifest úlohy (jeden řádek na záznam)
+        """
+        rows = self.conn.execute(
+            "SELECT m.record_key, m.node_id, m.output_path, m.sha256, m.size FROM manifest m "
+            "JOIN records r ON r.job_id = m.job_id AND r.record_key = m.record_key "
+            "WHERE m.job_id = ? ORDER BY r.seq", (job_id,))
+        return [dict(row) for row in rows]
+
+
+def _local_worker(db_path: str, job_id: str, node_id: str):
+    queue = ClusterQueue(db_path)
+    try:
+        queue.work(job_id, node_id)
+    finally:
+        queue.close()
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Koordinátor a workery Bohemika filleru")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Cesta ke sdílené SQLite databázi")
+    add_profile_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    plan = commands.add_parser('plan', help="Rozdělí úlohu na shardy")
+    plan.add_argument('job_id')
+    plan.add_argument('--shard-size', type=int, default=500)
+
+    worker = commands.add_parser('worker', help="Spustí worker na tomto uzlu")
+    worker.add_argument('job_id')
+    worker.add_argument('--node', help="Identifikátor uzlu (výchozí hostname-pid)")
+    worker.add_argument('--metrics-port', type=int, help="Port HTTP endpointu /metrics")
+    worker.add_argument('--metrics-file', help="Soubor s metrikami (Prometheus textfile)")
+
+    local = commands.add_parser('local', help="Spustí několik workerů lokálně (test)")
+    local.add_argument('job_id')
+    local.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    local.add_argument('--shard-size', type=int, default=500)
+
+    for name in ('retry', 'report', 'manifest'):
+        commands.add_parser(name).add_argument('job_id')
+
+    args = parser.parse_args()
+    queue = ClusterQueue(args.db)
+    try:
+        if args.command == 'plan':
+            print(queue.plan(args.job_id, args.shard_size))
+        elif args.command == 'worker':
+            bohemika_metrics.configure_from_env(args.metrics_port, args.metrics_file)
+            QUEUE_DEPTH.callback = lambda: queue_depth(args.db)
+            with start_profiler(options_from_args(args)):
+                stats = queue.work(args.job_id, args.node)
+            print(json.dumps(stats))
+        elif args.command == 'local':
+            queue.plan(args.job_id, args.shard_size)
+            processes = [
+                multiprocessing.Process(target=_local_worker,
+                                        args=(args.db, args.job_id, f"local-{i}"))
+                for i in range(args.workers)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            for row in queue.report(args.job_id):
+                print(json.dumps(row))
+        elif args.command == 'retry':
+            print(queue.retry(args.job_id))
+        elif args.command == 'report':
+            for row in queue.report(args.job_id):
+                print(json.dumps(row))
+        elif args.command == 'manifest':
+            for row in queue.manifest(args.job_id):
+                print(json.dumps(row, ensure_ascii=False))
+    except KeyError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
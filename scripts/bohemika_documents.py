@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Sady dokumentů - jeden záznam klienta, více vyplněných šablon
+
+Ke každému klientovi vzniká několik dokumentů ze stejných dat (průvodní
+list Bohemika, obecná žádost o úvěr template.pdf). Záznam se namapuje
+a zkontroluje jednou a všechny šablony sady se vyplní ze stejných
+hodnot polí v jedné návštěvě workeru. Výstupy klienta leží pohromadě:
+    <out>/<klíč záznamu>/<dokument>.pdf
+
+Fronta (bohemika_jobs.py submit --documents klient) ukládá jako šablonu
+úlohy 'set:<název sady>'.
+
+Použití:
+    python bohemika_documents.py <data.jsonl> --out vystup/ [--set klient] [--backend fitz]
+    python bohemika_documents.py --list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, Union
+
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, fill_mapped, map_form_data, template_field_names
+from bohemika_metrics import observe_fill, record_error
+from bohemika_trace import start_trace
+
+# Předpona šablony úlohy, která místo jedné šablony vyplňuje sadu
+DOCUMENT_SET_PREFIX = 'set:'
+DEFAULT_SET = 'klient'
+
+# Registrované sady: název sady -> {název dokumentu: šablona}
+DOCUMENT_SETS: Dict[str, Dict[str, Path]] = {
+    DEFAULT_SET: {
+        'pruvodni_list': TEMPLATE_PATH,
+        'zadost_o_uver': Path(__file__).parent.parent / "template.pdf",
+    },
+}
+
+
+def register_document(set_name: str, document: str, template_path: Union[str, Path]):
+    """
+    Přidá šablonu do sady dokumentů (sada se případně založí)
+    """
+    DOCUMENT_SETS.setdefault(set_name, {})[document] = Path(template_path)
+
+
+def is_document_set(template_path: str) -> bool:
+    return str(template_path).startswith(DOCUMENT_SET_PREFIX)
+
+
+def set_name_of(template_path: str) -> str:
+    return str(template_path)[len(DOCUMENT_SET_PREFIX):]
+
+
+def fill_document_set(form_data: Dict[str, Any], set_name: str = DEFAULT_SET,
+                      backend: str = 'fitz') -> Dict[str, bytes]:
+    """
+    Vyplní všechny šablony sady z jednoho mapování záznamu
+
+    Hodnota pole, které nemá žádná šablona sady, se započítá jako chyba
+    'missing_field' (jednou za záznam, ne za každou šablonu).
+
+    Returns:
+        dict: Název dokumentu -> PDF bajty
+    """
+    if set_name not in DOCUMENT_SETS:
+        raise KeyError(f"Unknown document set: {set_name}")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    templates = DOCUMENT_SETS[set_name]
+    trace = start_trace(backend=backend, template=DOCUMENT_SET_PREFIX + set_name)
+    documents = {}
+    try:
+        with trace.stage('mapping'):
+            field_values = map_form_data(form_data)
+        for document, template_path in templates.items():
+            started = time.perf_counter()
+            documents[document] = fill_mapped(field_values, template_path, backend, trace=trace)
+            observe_fill(os.path.basename(str(template_path)), backend, time.perf_counter() - started)
+    except Exception as e:
+        record_error(e)
+        raise
+    known = frozenset().union(*(template_field_names(path) for path in templates.values()))
+    if any(value and name not in known for name, value in field_values.items()):
+        record_error('missing_field')
+    trace.finish(documents=len(documents), size=sum(map(len, documents.values())))
+    return documents
+
+
+def documents_digest(documents: Dict[str, bytes]) -> str:
+    """sha256 sady - z názvů a sha256 jednotlivých dokumentů"""
+    digest = hashlib.sha256()
+    for document in sorted(documents):
+        digest.update(f"{document}:{hashlib.sha256(documents[document]).hexdigest()}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_document_set(output_dir: Union[str, Path], key: str, documents: Dict[str, bytes]) -> Path:
+    """
+    Zapíše dokumenty klienta do <output_dir>/<key>/ jako celek
+
+    Dokumenty se zapíší do dočasné složky, která se pak přejmenuje na místo
+    cílové. Předchozí sada se nejdřív odsune stranou a smaže až po
+    přejmenování - složka klienta tak nikdy neobsahuje jen část sady
+    (mezi oběma přejmenováními na okamžik chybí).
+
+    Raises:
+        ValueError: Klíč není jedna bezpečná složka cesty
+    """
+    if (not key or key in ('.', '..') or key != os.path.basename(key)
+            or (os.altsep and os.altsep in key) or os.path.isabs(key)):
+        raise ValueError(f"Unsafe record key: {key!r}")
+    target = Path(output_dir) / key
+    temp_dir = Path(output_dir) / f"{key}.{os.getpid()}.part"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    temp_dir.mkdir(parents=True)
+    for document, pdf_bytes in documents.items():
+        with open(temp_dir / f"{document}.pdf", 'wb') as f:
+            f.write(pdf_bytes)
+    previous = None
+    if target.exists():
+        previous = Path(output_dir) / f"{key}.{os.getpid()}.old"
+        shutil.rmtree(previous, ignore_errors=True)
+        os.replace(target, previous)
+    os.replace(temp_dir, target)
+    if previous is not None:
+        shutil.rmtree(previous, ignore_errors=True)
+    return target
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    from bohemika_jobs import read_records, record_key_for
+
+    parser = argparse.ArgumentParser(description="Vyplnění sady dokumentů pro každý záznam klienta")
+    parser.add_argument('input', nargs='?', help="JSONL/JSON soubor se záznamy")
+    parser.add_argument('--out', default='bohemika_documents', help="Výstupní složka")
+    parser.add_argument('--set', default=DEFAULT_SET, help="Sada dokumentů")
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    parser.add_argument('--list', action='store_true', help="Vypíše registrované sady")
+    args = parser.parse_args()
+
+    if args.list:
+        print(json.dumps({name: {document: str(path) for document, path in templates.items()}
+                          for name, templates in DOCUMENT_SETS.items()}, ensure_ascii=False, indent=2))
+        return
+    if not args.input:
+        parser.error("input is required")
+    if args.set not in DOCUMENT_SETS:
+        parser.error(f"unknown document set: {args.set}")
+
+    count = 0
+    for record in read_records(args.input):
+        key = record_key_for(record)
+        write_document_set(args.out, key, fill_document_set(record, args.set, args.backend))
+        count += 1
+    print(f"Filled {count} document sets into {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
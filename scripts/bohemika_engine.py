@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+Jádro vyplňování Bohemika formuláře pro dávkové zpracování
+Sdílí mapování polí s CLI skripty a vrací vyplněné PDF jako bytes
+
+Šablony lze otevírat přes mmap (parametr use_mmap nebo proměnná prostředí
+BOHEMIKA_TEMPLATE_MMAP=1). Backendy pak dostávají buffer nad stránkami
+souboru v page cache bez kopie, takže bajty šablony jsou v paměti jednou
+na stroj, ne jednou na každý worker proces.
+"""
+
+import io
+import mmap
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Any, Optional, Union
+
+from bohemika_manifest import fields_by_page, import_fitz, load_manifest
+from bohemika_metrics import cache_result, observe_fill, record_error
+from bohemika_trace import NULL_TRACE, start_trace
+
+# Výchozí šablona (v public složce)
+TEMPLATE_PATH = Path(__file__).parent.parent / "public" / "bohemika_template.pdf"
+
+# Pole formuláře a jejich výchozí hodnoty (fill_bohemika_pdf*.py + pole z simpleBohemikaService.ts)
+FIELD_DEFAULTS = {
+    # Klient sekce
+    'fill_11': '',  # Jméno a příjmení
+    'fill_12': '',  # Rodné číslo
+    'Adresa': '',
+    'Telefon': '',
+    'email': '',
+
+    # Zpracovatel sekce
+    'fill_16': 'Ing. Milan Kost',
+    'fill_17': '8680020061',
+
+    # Doporučitel (TIPAŘ)
+    'fill_18': '',  # Jméno a příjmení
+    'fill_19': '',  # Agenturní číslo
+
+    # Úvěr sekce
+    'fill_10': '',  # Číslo smlouvy
+    'Produkt': '',
+    'fill_21': '',  # Výše úvěru
+    'fill_22': '',  # Suma zajištění
+    'LTV': '',
+    'fill_4': '',  # Úrok úvěru (%)
+    'fill_24': '',  # Účel úvěru
+    'fill_25': '',  # Měsíční splátka
+    'fill_26': '',  # Datum podpisu úvěru
+
+    # Datum a místo
+    'V': 'Brno',
+    'dne': '',
+}
+
+BACKENDS = ('fitz', 'pypdf')
+
+USE_MMAP = os.environ.get('BOHEMIKA_TEMPLATE_MMAP', '') not in ('', '0')
+
+# Načtené šablony podle cesty - každý proces čte šablonu jen jednou
+_template_cache: Dict[str, bytes] = {}
+# Namapované šablony: cesta -> (otevřený soubor, mmap)
+_mapped_templates: Dict[str, Any] = {}
+# Názvy polí šablon: cesta -> množina názvů
+_field_names: Dict[str, frozenset] = {}
+# Manifesty polí šablon: cesta -> manifest (None = bez platného manifestu)
+_manifests: Dict[str, Optional[Dict[str, Any]]] = {}
+
+
+def map_form_data(form_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Převede vstupní data na hodnoty polí PDF formuláře
+
+    Args:
+        form_data (dict): Data pro vyplnění formuláře
+
+    Returns:
+        dict: Název pole -> textová hodnota
+    """
+    field_values = {}
+    for field_name, default in FIELD_DEFAULTS.items():
+        value = form_data.get(field_name, default)
+        field_values[field_name] = '' if value is None else str(value)
+    return field_values
+
+
+def _map_template(template_path: Union[str, Path]):
+    key = str(template_path)
+    cache_result('template', key in _mapped_templates)
+    if key not in _mapped_templates:
+        f = open(key, 'rb')
+        _mapped_templates[key] = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return _mapped_templates[key]
+
+
+def load_template(template_path: Union[str, Path] = TEMPLATE_PATH,
+                  use_mmap: Optional[bool] = None) -> Union[bytes, memoryview]:
+    """
+    Načte šablonu PDF (s cache v rámci procesu)
+
+    Args:
+        template_path (str): Cesta k šabloně PDF
+        use_mmap (bool): Vrátit memoryview nad mmap místo kopie bajtů
+    """
+    if USE_MMAP if use_mmap is None else use_mmap:
+        return memoryview(_map_template(template_path)[1])
+    key = str(template_path)
+    cache_result('template', key in _template_cache)
+    if key not in _template_cache:
+        with open(key, 'rb') as f:
+            _template_cache[key] = f.read()
+    return _template_cache[key]
+
+
+def open_template_stream(template_path: Union[str, Path] = TEMPLATE_PATH,
+                         use_mmap: Optional[bool] = None):
+    """
+    Vrátí čitelný stream šablony pro pypdf
+
+    V režimu mmap je to nové mapování téhož souboru (sdílené stránky,
+    vlastní pozice čtení), jinak BytesIO nad cache bajtů.
+    """
+    if USE_MMAP if use_mmap is None else use_mmap:
+        f = _map_template(template_path)[0]
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return io.BytesIO(load_template(template_path, use_mmap=False))
+
+
+def release_templates():
+    """
+    Uvolní všechny načtené a namapované šablony
+    """
+    _template_cache.clear()
+    _field_names.clear()
+    _manifests.clear()
+    for f, mapped in _mapped_templates.values():
+        try:
+            mapped.close()
+        except BufferError:
+            # Na mapování ještě odkazuje otevřený dokument - uvolní se s procesem
+            pass
+        f.close()
+    _mapped_templates.clear()
+
+
+def template_manifest(template_path: Union[str, Path] = TEMPLATE_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Vrátí platný manifest polí šablony (viz bohemika_manifest.py) nebo None
+    """
+    key = str(template_path)
+    if key not in _manifests:
+        _manifests[key] = load_manifest(template_path, load_template(template_path))
+    return _manifests[key]
+
+
+def template_field_names(template_path: Union[str, Path] = TEMPLATE_PATH) -> frozenset:
+    """
+    Vrátí názvy polí šablony (zjišťují se jednou na proces)
+    """
+    key = str(template_path)
+    if key not in _field_names:
+        manifest = template_manifest(template_path)
+        if manifest is not None:
+            _field_names[key] = frozenset(field['name'] for field in manifest['fields'])
+        else:
+            from pypdf import PdfReader
+
+            with open(key, 'rb') as f:
+                _field_names[key] = frozenset(PdfReader(f).get_fields() or ())
+    return _field_names[key]
+
+
+def _fill_fitz_widgets(doc, field_values: Dict[str, str], trace=NULL_TRACE,
+                      manifest: Optional[Dict[str, Any]] = None):
+    """
+    Vyplní neprázdné hodnoty do widgetů otevřeného dokumentu PyMuPDF
+    """
+    selected = None
+    if manifest is not None:
+        selected = fields_by_page(manifest, {name for name, value in field_values.items() if value})
+    for page in doc:
+        with trace.stage('field_discovery'):
+            if selected is None:
+                widgets = list(page.widgets())
+            else:
+                widgets = [page.load_widget(field['xref']) for field in selected.get(page.number, [])]
+        for widget in widgets:
+            value = field_values.get(widget.field_name)
+            if not value:
+                continue
+            if trace.enabled:
+                started = time.perf_counter()
+                widget.field_value = value
+                filled = time.perf_counter()
+                widget.update()
+                updated = time.perf_counter()
+                trace.add('field_fill', filled - started)
+                trace.add('appearance', updated - filled)
+                trace.field(widget.field_name, updated - started)
+            else:
+                widget.field_value = value
+                widget.update()
+
+
+def fill_with_fitz(template: Union[bytes, memoryview], field_values: Dict[str, str],
+                   trace=NULL_TRACE, manifest: Optional[Dict[str, Any]] = None,
+                   extra_pages: Optional[bytes] = None) -> bytes:
+    """
+    Vyplní šablonu pomocí PyMuPDF a vrátí PDF jako bytes
+
+    Args:
+        manifest (dict): Manifest polí šablony - načtou se jen widgety
+            s hodnotou místo procházení všech
+        extra_pages (bytes): PDF, jehož strany se připojí za formulář
+            (viz bohemika_continuation.py)
+    """
+    fitz = import_fitz()
+
+    with trace.stage('template_load'):
+        doc = fitz.open(stream=template, filetype="pdf")
+    try:
+        _fill_fitz_widgets(doc, field_values, trace, manifest)
+        if extra_pages:
+            with trace.stage('extra_pages'):
+                with fitz.open(stream=extra_pages, filetype="pdf") as extra:
+                    doc.insert_pdf(extra)
+        with trace.stage('serialization'):
+            return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def fill_variants_with_fitz(template: Union[bytes, memoryview], field_values: Dict[str, str],
+                            overlays: Dict[str, Dict[str, str]], trace=NULL_TRACE,
+                            manifest: Optional[Dict[str, Any]] = None) -> Dict[str, bytes]:
+    """
+    Vyplní šablonu jednou a z téhož dokumentu uloží plnou verzi i varianty
+
+    Varianta přepíše jen pole ze svého překryvu (ostatní objekty a vzhledy
+    zůstávají sdílené). Překryvy se vrství v pořadí slovníku. Varianty se
+    ukládají se sběrem nepoužitých objektů, aby v nich nezůstal původní
+    vzhled přepsaných polí.
+
+    Returns:
+        dict: 'full' a názvy variant -> PDF bajty
+    """
+    fitz = import_fitz()
+
+    with trace.stage('template_load'):
+        doc = fitz.open(stream=template, filetype="pdf")
+    try:
+        _fill_fitz_widgets(doc, field_values, trace, manifest)
+        with trace.stage('serialization'):
+            outputs = {'full': doc.tobytes()}
+        for name, overlay in overlays.items():
+            _fill_fitz_widgets(doc, overlay, trace, manifest)
+            with trace.stage('serialization'):
+                outputs[name] = doc.tobytes(garbage=1)
+        return outputs
+    finally:
+        doc.close()
+
+
+def _pypdf_writer(template, trace=NULL_TRACE):
+    from pypdf import PdfReader, PdfWriter
+
+    if isinstance(template, (bytes, bytearray, memoryview)):
+        template = io.BytesIO(template)
+    with trace.stage('template_load'):
+        reader = PdfReader(template)
+        writer = PdfWriter()
+        writer.append(reader)
+    return writer
+
+
+def _write_pypdf(writer, field_values: Dict[str, str], trace=NULL_TRACE,
+                 extra_pages: Optional[bytes] = None) -> bytes:
+    # pypdf hledá pole a generuje vzhled v jednom volání - měří se jako field_fill
+    with trace.stage('field_fill'):
+        for page in writer.pages:
+            writer.update_page_form_field_values(page, field_values, auto_regenerate=False)
+    if extra_pages:
+        from pypdf import PdfReader
+
+        # Až po vyplnění - připojené strany nemají pole
+        with trace.stage('extra_pages'):
+            writer.append(PdfReader(io.BytesIO(extra_pages)))
+    with trace.stage('serialization'):
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+
+def fill_with_pypdf(template, field_values: Dict[str, str], trace=NULL_TRACE,
+                    extra_pages: Optional[bytes] = None) -> bytes:
+    """
+    Vyplní šablonu pomocí pypdf a vrátí PDF jako bytes
+
+    Args:
+        template: Bajty šablony nebo čitelný stream (viz open_template_stream)
+        extra_pages (bytes): PDF, jehož strany se připojí za formulář
+    """
+    return _write_pypdf(_pypdf_writer(template, trace), field_values, trace, extra_pages)
+
+
+def fill_variants_with_pypdf(template, field_values: Dict[str, str],
+                             overlays: Dict[str, Dict[str, str]], trace=NULL_TRACE) -> Dict[str, bytes]:
+    """
+    Jako fill_variants_with_fitz() pro pypdf - writer zapisuje jen objekty
+    dosažitelné z dokumentu, nahrazené vzhledy se do variant nedostanou
+    """
+    writer = _pypdf_writer(template, trace)
+    outputs = {'full': _write_pypdf(writer, field_values, trace)}
+    for name, overlay in overlays.items():
+        outputs[name] = _write_pypdf(writer, overlay, trace)
+    return outputs
+
+
+def fill_mapped(field_values: Dict[str, str],
+                template_path: Union[str, Path] = TEMPLATE_PATH,
+                backend: str = 'fitz',
+                use_mmap: Optional[bool] = None,
+                trace=NULL_TRACE,
+                extra_pages: Optional[bytes] = None) -> bytes:
+    """
+    Vyplní už namapované hodnoty polí do šablony (bez mapování, kontroly polí a metrik)
+
+    Args:
+        field_values (dict): Název pole -> textová hodnota (viz map_form_data)
+        extra_pages (bytes): PDF připojené za formulář
+    """
+    if backend == 'fitz':
+        with trace.stage('template_load'):
+            template = load_template(template_path, use_mmap)
+        return fill_with_fitz(template, field_values, trace, template_manifest(template_path), extra_pages)
+    with trace.stage('template_load'):
+        stream = open_template_stream(template_path, use_mmap)
+    try:
+        return fill_with_pypdf(stream, field_values, trace, extra_pages)
+    finally:
+        if isinstance(stream, mmap.mmap):
+            stream.close()
+
+
+def fill_mapped_variants(field_values: Dict[str, str],
+                         overlays: Dict[str, Dict[str, str]],
+                         template_path: Union[str, Path] = TEMPLATE_PATH,
+                         backend: str = 'fitz',
+                         use_mmap: Optional[bool] = None,
+                         trace=NULL_TRACE) -> Dict[str, bytes]:
+    """
+    Jako fill_mapped(), ale z jednoho otevření šablony vrátí plnou verzi
+    a varianty podle překryvů (název varianty -> změněné hodnoty polí)
+    """
+    if backend == 'fitz':
+        with trace.stage('template_load'):
+            template = load_template(template_path, use_mmap)
+        return fill_variants_with_fitz(template, field_values, overlays, trace, template_manifest(template_path))
+    with trace.stage('template_load'):
+        stream = open_template_stream(template_path, use_mmap)
+    try:
+        return fill_variants_with_pypdf(stream, field_values, overlays, trace)
+    finally:
+        if isinstance(stream, mmap.mmap):
+            stream.close()
+
+
+def fill_record(form_data: Dict[str, Any],
+                template_path: Union[str, Path] = TEMPLATE_PATH,
+                backend: str = 'fitz',
+                use_mmap: Optional[bool] = None,
+                extra_pages: Optional[bytes] = None) -> bytes:
+    """
+    Vyplní jeden záznam do šablony
+
+    Args:
+        form_data (dict): Data pro vyplnění formuláře
+        template_path (str): Cesta k šabloně PDF
+        backend (str): 'fitz' nebo 'pypdf'
+        use_mmap (bool): Otevřít šablonu přes mmap (výchozí podle
+            BOHEMIKA_TEMPLATE_MMAP)
+        extra_pages (bytes): PDF, jehož strany se připojí za formulář
+            (pokračovací strany, viz bohemika_continuation.py)
+
+    Returns:
+        bytes: Vyplněné PDF
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    template_name = os.path.basename(str(template_path))
+    started = time.perf_counter()
+    trace = start_trace(backend=backend, template=template_name)
+    try:
+        with trace.stage('mapping'):
+            field_values = map_form_data(form_data)
+        pdf_bytes = fill_mapped(field_values, template_path, backend, use_mmap, trace, extra_pages)
+    except Exception as e:
+        record_error(e)
+        raise
+    # Hodnota pro pole, které šablona nemá, se tiše zahodí - formulář je neúplný
+    known = template_field_names(template_path)
+    if any(value and name not in known for name, value in field_values.items()):
+        record_error('missing_field')
+    observe_fill(template_name, backend, time.perf_counter() - started)
+    trace.finish(size=len(pdf_bytes))
+    return pdf_bytes
+
+
+def fill_record_variants(form_data: Dict[str, Any],
+                         variants: Dict[str, Callable[[Dict[str, str]], Dict[str, str]]],
+                         template_path: Union[str, Path] = TEMPLATE_PATH,
+                         backend: str = 'fitz',
+                         use_mmap: Optional[bool] = None) -> Dict[str, bytes]:
+    """
+    Vyplní jeden záznam do šablony a v témže průchodu vytvoří i varianty
+
+    Args:
+        form_data (dict): Data pro vyplnění formuláře
+        variants (dict): Název varianty -> funkce, která z namapovaných
+            hodnot vrátí jen změněná pole (např. bohemika_mask.mask_field_values)
+
+    Returns:
+        dict: 'full' a názvy variant -> PDF bajty
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    template_name = os.path.basename(str(template_path))
+    started = time.perf_counter()
+    trace = start_trace(backend=backend, template=template_name)
+    try:
+        with trace.stage('mapping'):
+            field_values = map_form_data(form_data)
+            overlays = {name: variant(field_values) for name, variant in variants.items()}
+        outputs = fill_mapped_variants(field_values, overlays, template_path, backend, use_mmap, trace)
+    except Exception as e:
+        record_error(e)
+        raise
+    known = template_field_names(template_path)
+    if any(value and name not in known for name, value in field_values.items()):
+        record_error('missing_field')
+    observe_fill(template_name, backend, time.perf_counter() - started)
+    trace.finish(size=len(outputs['full']), variants=len(overlays))
+    return outputs
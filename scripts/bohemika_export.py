@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Streamovaný převod exportů Supabase tabulek na vyplněné Bohemika formuláře
+Čte CSV/JSONL dumpy tabulek clients, loans, employers a properties,
+spojuje je podle client_id bez načítání celých tabulek do paměti
+(externí třídění + merge join) a posílá namapované záznamy do fill enginu.
+Seznamy klienta (spolužadatel, zaměstnavatelé, podnikání, děti, závazky)
+se s --continuation vypíšou na pokračovací strany (bohemika_continuation.py).
+
+Použití:
+    python bohemika_export.py --clients clients.csv --loans loans.jsonl --out vystup/
+    python bohemika_export.py --clients clients.csv --loans loans.jsonl --archive vystup.zip
+    python bohemika_export.py --clients clients.csv --loans loans.csv --liabilities liabilities.csv \
+                              --children children.csv --businesses businesses.csv --continuation --out vystup/
+    python bohemika_export.py --clients clients.csv --loans loans.csv --emit-jsonl > zaznamy.jsonl
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import json
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional
+
+from bohemika_archive import COMPRESSIONS, open_sink
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, fill_record
+from bohemika_profile import add_profile_arguments, options_from_args, start_profiler
+from bohemika_trace import emit_summary
+
+# Kolik řádků se najednou třídí v paměti, než se běh odloží na disk
+RUN_SIZE = 50_000
+# Velikost front mezi čtecím, plnícím a zapisovacím vláknem
+QUEUE_SIZE = 64
+
+DEFAULT_PRODUCT = 'Např. Hypoteční úvěr'
+
+# Tabulky, jejichž řádky se předávají jako seznamy (pokračovací strany)
+LIST_TABLES = ('employers', 'businesses', 'children', 'liabilities')
+# Sloupce clients.co_applicant_* předávané jako record['co_applicant']
+CO_APPLICANT_FIELDS = ('title', 'first_name', 'last_name', 'birth_number', 'birth_date',
+                       'phone', 'email', 'permanent_address')
+
+_SENTINEL = object()
+
+
+def read_dump(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Postupně čte řádky CSV nebo JSONL dumpu
+
+    Args:
+        path (str): Cesta k souboru (.csv, .jsonl, .ndjson)
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.lower().endswith('.csv'):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def external_sort(rows: Iterable[Dict[str, Any]], key: str,
+                  run_size: int = RUN_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Seřadí řádky podle klíče s omezenou pamětí
+
+    Setříděné běhy po run_size řádcích se ukládají do dočasných JSONL
+    souborů a následně se slévají přes heapq.merge.
+    """
+    rows = iter(rows)
+    run_files = []
+    try:
+        for chunk in iter(lambda: list(itertools.islice(rows, run_size)), []):
+            chunk.sort(key=lambda row: str(row.get(key) or ''))
+            if not run_files and len(chunk) < run_size:
+                # Celý vstup se vešel do jednoho běhu - není co slévat
+                yield from chunk
+                return
+            run_file = tempfile.TemporaryFile('w+', encoding='utf-8')
+            for row in chunk:
+                run_file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            run_file.seek(0)
+            run_files.append(run_file)
+        streams = [(json.loads(line) for line in run_file) for run_file in run_files]
+        yield from heapq.merge(*streams, key=lambda row: str(row.get(key) or ''))
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+def join_by_client(clients: Iterable[Dict[str, Any]],
+                   children: Dict[str, Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Merge join klientů s podřízenými tabulkami podle client_id
+
+    Všechny vstupy musí být seřazené (klienti podle id, ostatní podle
+    client_id). V paměti jsou vždy jen řádky jednoho klienta.
+
+    Yields:
+        dict: {'client': {...}, 'loans': [...], 'employers': [...], ...}
+    """
+    iterators = {name: iter(rows) for name, rows in children.items()}
+    heads = {name: next(it, None) for name, it in iterators.items()}
+
+    for client in clients:
+        client_id = str(client.get('id') or '')
+        joined = {'client': client}
+        for name, it in iterators.items():
+            matched = []
+            head = heads[name]
+            # Řádky bez klienta (osiřelé) přeskočíme
+            while head is not None and str(head.get('client_id') or '') < client_id:
+                head = next(it, None)
+            while head is not None and str(head.get('client_id') or '') == client_id:
+                matched.append(head)
+                head = next(it, None)
+            heads[name] = head
+            joined[name] = matched
+        yield joined
+
+
+def _number(value: Any) -> Optional[float]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(' ', '').replace('\xa0', '').replace(',', '.').replace('%', ''))
+    except ValueError:
+        return None
+
+
+def format_currency(value: Any) -> str:
+    number = _number(value)
+    if number is None:
+        return ''
+    return f"{number:,.0f} Kč".replace(',', ' ')
+
+
+def format_percent(value: Any) -> str:
+    """
+    Formátuje procenta stejně jako percentSmart v simpleBohemikaService.ts
+    (hodnoty do 1.5 bez znaku % se berou jako zlomek)
+    """
+    if value is None or value == '':
+        return ''
+    raw = str(value).strip()
+    number = _number(raw)
+    if number is None:
+        return ''
+    if '%' not in raw and -1.5 < number <= 1.5:
+        number *= 100
+    return f"{round(number, 2):g}%".replace('.', ',')
+
+
+def format_date(value: Any) -> str:
+    """
+    Převede ISO datum (YYYY-MM-DD) nebo dd.mm.yyyy na dd.mm.yyyy
+    """
+    if not value:
+        return ''
+    text = str(value).strip()
+    match = re.match(r'^(\d{4})-(\d{2})-(\d{2})', text)
+    if match:
+        return f"{match.group(3)}.{match.group(2)}.{match.group(1)}"
+    match = re.match(r'^(\d{1,2})[./-](\d{1,2})[./-](\d{4})$', text)
+    if match:
+        return f"{int(match.group(1)):02d}.{int(match.group(2)):02d}.{match.group(3)}"
+    return text
+
+
+def format_address(value: Any) -> str:
+    """
+    Adresa je v DB JSONB - v dumpu jako JSON řetězec nebo objekt
+    """
+    if not value:
+        return ''
+    if isinstance(value, str):
+        text = value.strip()
+        if text[:1] in '{"':
+            try:
+                value = json.loads(text)
+            except ValueError:
+                return text
+        else:
+            return text
+    if isinstance(value, dict):
+        parts = [value.get(k) for k in ('street', 'house_number', 'city', 'zip', 'postal_code')]
+        return ', '.join(str(p) for p in parts if p) or ', '.join(str(v) for v in value.values() if v)
+    return str(value)
+
+
+def map_client_record(joined: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Namapuje spojený záznam klienta na pole Bohemika formuláře
+    (stejná pravidla jako simpleBohemikaService.ts)
+    """
+    client = joined['client']
+    loan = (joined.get('loans') or [{}])[0]
+    prop = (joined.get('properties') or [{}])[0]
+
+    amount = loan.get('loan_amount') or loan.get('amount')
+    property_value = loan.get('property_value') or prop.get('price')
+    ltv = loan.get('ltv')
+    if not ltv:
+        a, p = _number(amount), _number(property_value)
+        if a and p:
+            ltv = a / p * 100
+
+    advisor_name = loan.get('advisor_name') or loan.get('advisor') or ''
+    advisor_agency = loan.get('advisor_agency_number') or ''
+    if not advisor_agency and advisor_name:
+        match = re.search(r'(?:-|\(|\b)\s*(\d{5,})\s*(?:\)|$)', advisor_name)
+        if match:
+            advisor_agency = match.group(1)
+
+    contract_date = format_date(loan.get('signature_date') or loan.get('contract_date'))
+    full_name = f"{client.get('applicant_first_name') or ''} {client.get('applicant_last_name') or ''}".strip()
+
+    record = {
+        '_key': str(client.get('id') or ''),
+        'fill_11': full_name,
+        'fill_12': client.get('applicant_birth_number') or '',
+        'Adresa': format_address(client.get('applicant_permanent_address')),
+        'Telefon': client.get('applicant_phone') or '',
+        'email': client.get('applicant_email') or '',
+        'fill_10': loan.get('contract_number') or '',
+        'fill_18': advisor_name,
+        'fill_19': advisor_agency,
+        'Produkt': loan.get('product') or DEFAULT_PRODUCT,
+        'fill_21': format_currency(amount),
+        'fill_22': format_currency(amount),
+        'LTV': format_percent(ltv),
+        'fill_4': format_percent(loan.get('interest_rate')),
+        'fill_24': loan.get('purpose') or 'Nákup nemovitosti',
+        'fill_25': format_currency(loan.get('monthly_payment')),
+        'fill_26': contract_date,
+        'dne': contract_date or date.today().strftime('%d.%m.%Y'),
+        'V': 'Brno',
+    }
+    # Seznamy pro pokračovací strany - jen neprázdné
+    if client.get('co_applicant_first_name') or client.get('co_applicant_last_name'):
+        record['co_applicant'] = {field: client.get(f'co_applicant_{field}') for field in CO_APPLICANT_FIELDS}
+    for name in LIST_TABLES:
+        if joined.get(name):
+            record[name] = joined[name]
+    return record
+
+
+def stream_form_data(clients_path: str, loans_path: str,
+                     employers_path: Optional[str] = None,
+                     properties_path: Optional[str] = None,
+                     presorted: bool = False,
+                     run_size: int = RUN_SIZE,
+                     list_paths: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generátor namapovaných záznamů ze dumpů tabulek
+
+    Args:
+        presorted (bool): Dumpy už jsou seřazené (ORDER BY id / client_id),
+            externí třídění se přeskočí
+        list_paths (dict): Další dumpy seznamů (children, liabilities,
+            businesses) - tabulka -> cesta
+    """
+    def prepare(path, key):
+        rows = read_dump(path)
+        return rows if presorted else external_sort(rows, key, run_size)
+
+    children = {'loans': prepare(loans_path, 'client_id')}
+    if employers_path:
+        children['employers'] = prepare(employers_path, 'client_id')
+    if properties_path:
+        children['properties'] = prepare(properties_path, 'client_id')
+    for name, path in (list_paths or {}).items():
+        if path:
+            children[name] = prepare(path, 'client_id')
+
+    for joined in join_by_client(prepare(clients_path, 'id'), children):
+        yield map_client_record(joined)
+
+
+# Jak často vlákno čekající na plnou frontu kontroluje požadavek na zastavení
+PUT_TIMEOUT = 0.1
+
+
+def _put(out: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    """Vloží položku do fronty; vrátí False, pokud mezitím přišel stop"""
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce(source: Iterable[Any], out: queue.Queue, errors: List[BaseException], stop: threading.Event):
+    iterator = iter(source)
+    try:
+        for item in iterator:
+            if not _put(out, item, stop):
+                break
+    except BaseException as e:
+        errors.append(e)
+    finally:
+        # Uzavření generátoru uvolní CSV soubory a dočasné běhy externího třídění
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+        _put(out, _SENTINEL, stop)
+
+
+def run_pipeline(records: Iterable[Dict[str, Any]],
+                 write: Callable[[str, bytes], None],
+                 template_path: str = str(TEMPLATE_PATH),
+                 backend: str = 'fitz',
+                 queue_size: int = QUEUE_SIZE,
+                 fill: Callable[..., bytes] = fill_record,
+                 failures: Optional[List[Dict[str, str]]] = None) -> int:
+    """
+    Vyplní záznamy s překrytím I/O a výpočtu
+
+    Čtecí vlákno plní omezenou vstupní frontu, hlavní vlákno vyplňuje PDF
+    a zapisovací vlákno ukládá výsledky. Paměť je omezena velikostí front.
+    Chyba vyplnění jednoho záznamu dávku nepřeruší; chyba čtení nebo zápisu
+    ano - čtecí vlákno se pak zastaví a uvolní vstup.
+
+    Args:
+        records: Generátor namapovaných záznamů (form_data s '_key')
+        write: Funkce write(key, pdf_bytes) volaná ze zapisovacího vlákna
+        fill: Funkce fill(record, template_path, backend) -> PDF bajty
+            (např. bohemika_continuation.fill_with_continuation)
+        failures: Seznam, do kterého se přidají {'key', 'error'} záznamů,
+            jejichž vyplnění selhalo
+
+    Returns:
+        int: Počet vyplněných záznamů
+    """
+    inbox: queue.Queue = queue.Queue(maxsize=queue_size)
+    outbox: queue.Queue = queue.Queue(maxsize=queue_size)
+    errors: List[BaseException] = []
+    failures = failures if failures is not None else []
+    stop = threading.Event()
+
+    def drain():
+        # Po chybě zápisu se fronta dál vyprazdňuje (výsledky se zahodí),
+        # aby hlavní vlákno nezůstalo viset na plné outbox.put
+        while True:
+            item = outbox.get()
+            if item is _SENTINEL:
+                return
+            if errors:
+                continue
+            try:
+                write(*item)
+            except BaseException as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=_produce, args=(records, inbox, errors, stop), daemon=True)
+    writer = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    writer.start()
+
+    count = 0
+    seen = 0
+    try:
+        while not errors:
+            record = inbox.get()
+            if record is _SENTINEL:
+                break
+            key = record.get('_key') or str(seen)
+            seen += 1
+            try:
+                pdf_bytes = fill(record, template_path, backend)
+            except Exception as e:
+                failures.append({'key': key, 'error': f"{type(e).__name__}: {e}"})
+                continue
+            outbox.put((key, pdf_bytes))
+            count += 1
+    finally:
+        stop.set()
+        outbox.put(_SENTINEL)
+        writer.join()
+        reader.join()
+    if errors:
+        raise errors[0]
+    emit_summary(records=count, failed=len(failures))
+    return count
+
+
+def directory_writer(output_dir: str) -> Callable[[str, bytes], None]:
+    """
+    Vrátí zapisovač, který ukládá PDF jako <key>.pdf do složky
+    """
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+    def write(key: str, pdf_bytes: bytes):
+        output_path = os.path.join(output_dir, f"{key}.pdf")
+        with open(output_path + '.part', 'wb') as f:
+            f.write(pdf_bytes)
+        os.replace(output_path + '.part', output_path)
+
+    return write
+
+
+def report_failures(failures: List[Dict[str, str]]):
+    """
+    Vypíše záznamy, jejichž vyplnění selhalo, a ukončí CLI s kódem 1
+    """
+    if not failures:
+        return
+    for failure in failures:
+        print(f"Failed {failure['key']}: {failure['error']}", file=sys.stderr)
+    sys.exit(1)
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Export Supabase dumpů do Bohemika formulářů")
+    parser.add_argument('--clients', required=True, help="Dump tabulky clients (CSV/JSONL)")
+    parser.add_argument('--loans', required=True, help="Dump tabulky loans (CSV/JSONL)")
+    parser.add_argument('--employers', help="Dump tabulky employers (CSV/JSONL)")
+    parser.add_argument('--properties', help="Dump tabulky properties (CSV/JSONL)")
+    parser.add_argument('--children', help="Dump tabulky children (CSV/JSONL)")
+    parser.add_argument('--liabilities', help="Dump tabulky liabilities (CSV/JSONL)")
+    parser.add_argument('--businesses', help="Dump tabulky businesses (CSV/JSONL)")
+    parser.add_argument('--continuation', action='store_true',
+                        help="Seznamy klienta vypsat na pokračovací strany za formulářem")
+    parser.add_argument('--presorted', action='store_true', help="Dumpy jsou seřazené podle id/client_id")
+    parser.add_argument('--out', help="Výstupní složka pro PDF")
+    parser.add_argument('--archive', help="Výstupní archiv (.zip, .tar, .tar.gz)")
+    parser.add_argument('--compression', choices=COMPRESSIONS,
+                        help="Komprese archivu (výchozí stored pro .zip/.tar)")
+    parser.add_argument('--emit-jsonl', action='store_true',
+                        help="Místo vyplnění vypíše namapované záznamy (vstup pro bohemika_jobs.py)")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    list_paths = {'children': args.children, 'liabilities': args.liabilities, 'businesses': args.businesses}
+    records = stream_form_data(args.clients, args.loans, args.employers, args.properties, args.presorted,
+                               list_paths=list_paths)
+    if args.emit_jsonl:
+        for record in records:
+            print(json.dumps(record, ensure_ascii=False))
+        return
+    if not args.out and not args.archive:
+        parser.error("--out, --archive or --emit-jsonl is required")
+    fill = fill_record
+    if args.continuation:
+        from bohemika_continuation import fill_with_continuation as fill
+    failures: List[Dict[str, str]] = []
+    with start_profiler(options_from_args(args)):
+        if args.archive:
+            with open_sink(args.archive, args.compression) as sink:
+                count = run_pipeline(records, sink.write, args.template, args.backend, fill=fill,
+                                     failures=failures)
+        else:
+            count = run_pipeline(records, directory_writer(args.out), args.template, args.backend, fill=fill,
+                                 failures=failures)
+    print(f"Filled {count} forms into {args.archive or args.out}", file=sys.stderr)
+    report_failures(failures)
+
+
+if __name__ == "__main__":
+    main()
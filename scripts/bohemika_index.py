@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Fulltextový index hodnot polí vygenerovaných a vytěžených formulářů
+
+Hodnoty polí (fill_*, Adresa, Produkt, ...) se ukládají do lokální SQLite
+databáze s FTS5 indexem, takže dotaz typu "všechny formuláře s rodným
+číslem X" nebo "Ujčov" nesahá na PDF soubory.
+
+Zdroje:
+    jobs - hotové záznamy fronty (bohemika_jobs.py); hodnoty se vezmou
+           z uloženého payloadu, PDF se neotevírá
+    pdfs - libovolná vyplněná PDF (historické formuláře); čtou se jen widgety
+
+Indexace je inkrementální: záznam fronty se přeskočí, pokud je v indexu
+se stejným sha256, PDF soubor, pokud se nezměnila velikost ani mtime.
+
+Použití:
+    python bohemika_index.py [--index index.sqlite] jobs [--db jobs.sqlite]
+    python bohemika_index.py [--index index.sqlite] pdfs <pdf|složka ...>
+    python bohemika_index.py [--index index.sqlite] search <dotaz> [--field fill_12] [--limit 50] [--raw]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
+
+from bohemika_engine import map_form_data
+from bohemika_jobs import DEFAULT_DB
+from bohemika_manifest import import_fitz
+
+DEFAULT_INDEX = os.environ.get('BOHEMIKA_INDEX', 'bohemika_index.sqlite')
+# Hodnoty s alespoň tolika číslicemi se indexují i bez oddělovačů
+# (rodné číslo 801016/4778, telefon 603 477 572)
+MIN_DIGITS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    sha256 TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    job_id TEXT,
+    record_key TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS field_rows (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    digits TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS field_rows_by_doc ON field_rows (doc_id);
+CREATE INDEX IF NOT EXISTS documents_by_record ON documents (job_id, record_key);
+CREATE VIRTUAL TABLE IF NOT EXISTS field_fts USING fts5(
+    value, digits,
+    content='field_rows', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS field_rows_ai AFTER INSERT ON field_rows BEGIN
+    INSERT INTO field_fts (rowid, value, digits) VALUES (new.id, new.value, new.digits);
+END;
+CREATE TRIGGER IF NOT EXISTS field_rows_ad AFTER DELETE ON field_rows BEGIN
+    INSERT INTO field_fts (field_fts, rowid, value, digits) VALUES ('delete', old.id, old.value, old.digits);
+END;
+"""
+
+
+def _digits(value: str) -> str:
+    digits = re.sub(r'\D', '', value)
+    return digits if len(digits) >= MIN_DIGITS else ''
+
+
+def read_widget_values(pdf_path: Union[str, Path]) -> Dict[str, str]:
+    """
+    Přečte neprázdné hodnoty polí z widgetů vyplněného PDF
+    """
+    fitz = import_fitz()
+
+    doc = fitz.open(str(pdf_path))
+    try:
+        return {widget.field_name: str(widget.field_value)
+                for page in doc for widget in page.widgets()
+                if widget.field_value not in (None, '', 'Off')}
+    finally:
+        doc.close()
+
+
+def build_query(text: str) -> str:
+    """
+    Převede text dotazu na FTS5 výraz
+
+    Každé slovo se hledá jako fráze (všechna musí sedět). Dotaz složený jen
+    z číslic a oddělovačů se hledá v hodnotách bez oddělovačů, takže
+    '801016/4778' najde i '8010164778'.
+    """
+    if re.fullmatch(r'[\d\s/+-]+', text) and len(_digits(text)) >= MIN_DIGITS:
+        return f'digits : "{_digits(text)}"'
+    return ' '.join('"' + token.replace('"', '""') + '"' for token in text.split())
+
+
+class FieldIndex:
+    """
+    FTS5 index hodnot polí nad SQLite
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX):
+        self.index_path = str(index_path)
+        self.conn = sqlite3.connect(self.index_path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _store(self, path: str, source: str, values: Dict[str, Any], **meta):
+        self.conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+        cursor = self.conn.execute(
+            "INSERT INTO documents (path, source, sha256, size, mtime_ns, job_id, record_key, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, source, meta.get('sha256'), meta.get('size'), meta.get('mtime_ns'),
+             meta.get('job_id'), meta.get('record_key'), time.time()))
+        self.conn.executemany(
+            "INSERT INTO field_rows (doc_id, name, value, digits) VALUES (?, ?, ?, ?)",
+            [(cursor.lastrowid, name, str(value), _digits(str(value)))
+             for name, value in values.items() if value not in (None, '')])
+
+    def add_jobs(self, db_path: str = DEFAULT_DB) -> int:
+        """
+        Zaindexuje hotové záznamy fronty, které v indexu ještě nejsou
+
+        Returns:
+            int: Počet nově zaindexovaných záznamů
+        """
+        # Anti-join v SQL: čtou se jen záznamy, které v indexu ještě nejsou
+        # (podle cesty nebo podle job_id/record_key u starších relativních
+        # cest), a kurzor se prochází po řádcích - běh je úměrný novým záznamům
+        self.conn.execute("ATTACH DATABASE ? AS jobs", (str(db_path),))
+        count = 0
+        try:
+            rows = self.conn.execute(
+                "SELECT r.job_id, r.record_key, r.payload, r.output_path, r.sha256, r.size "
+                "FROM jobs.records r WHERE r.status = 'done' "
+                "AND NOT EXISTS (SELECT 1 FROM documents d WHERE d.path = r.output_path "
+                "AND (d.sha256 = r.sha256 OR (d.sha256 IS NULL AND d.size = r.size))) "
+                "AND NOT EXISTS (SELECT 1 FROM documents d WHERE d.job_id = r.job_id "
+                "AND d.record_key = r.record_key AND d.sha256 IS r.sha256)")
+            with self.conn:
+                for row in rows:
+                    # Úlohy ukládají absolutní cesty; starší relativní cesta se
+                    # vyhodnotí vůči pracovní složce indexeru
+                    self._store(os.path.abspath(row['output_path']), 'job',
+                                map_form_data(json.loads(row['payload'])),
+                                sha256=row['sha256'], size=row['size'],
+                                job_id=row['job_id'], record_key=row['record_key'])
+                    count += 1
+        finally:
+            self.conn.execute("DETACH DATABASE jobs")
+        return count
+
+    def add_pdfs(self, pdf_paths: Iterable[str]) -> int:
+        """
+        Zaindexuje PDF soubory, které jsou nové nebo se od minula změnily
+
+        Returns:
+            int: Počet nově zaindexovaných souborů
+        """
+        count = 0
+        for path in pdf_paths:
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            known = self.conn.execute(
+                "SELECT 1 FROM documents WHERE path = ? AND size = ? AND (mtime_ns = ? OR source = 'job')",
+                (path, stat.st_size, stat.st_mtime_ns)).fetchone()
+            if known:
+                continue
+            values = read_widget_values(path)
+            with self.conn:
+                self._store(path, 'pdf', values, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            count += 1
+        return count
+
+    def search(self, text: str, field: Optional[str] = None, limit: int = 50,
+               raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        Najde pole odpovídající dotazu
+
+        Args:
+            text (str): Hledaný text (nebo FTS5 výraz při raw=True)
+            field (str): Omezení na jedno pole (např. 'fill_12')
+            limit (int): Maximální počet výsledků
+
+        Returns:
+            list: Shody {'path', 'source', 'job_id', 'record_key', 'name', 'value'}
+        """
+        sql = ("SELECT d.path, d.source, d.job_id, d.record_key, r.name, r.value "
+               "FROM field_fts JOIN field_rows r ON r.id = field_fts.rowid "
+               "JOIN documents d ON d.id = r.doc_id WHERE field_fts MATCH ?")
+        params: List[Any] = [text if raw else build_query(text)]
+        if field:
+            sql += " AND r.name = ?"
+            params.append(field)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def document(self, path: str) -> Dict[str, str]:
+        """
+        Vrátí všechny zaindexované hodnoty polí dokumentu
+        """
+        rows = self.conn.execute(
+            "SELECT r.name, r.value FROM field_rows r JOIN documents d ON d.id = r.doc_id "
+            "WHERE d.path = ? ORDER BY r.id", (path,))
+        return {row['name']: row['value'] for row in rows}
+
+
+def iter_pdfs(paths: Iterable[str]) -> Iterator[str]:
+    """Rozbalí složky na PDF soubory (rekurzivně)"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.lower().endswith('.pdf'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Fulltextový index hodnot Bohemika formulářů")
+    parser.add_argument('--index', default=DEFAULT_INDEX, help="Cesta k SQLite indexu")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    jobs = commands.add_parser('jobs', help="Zaindexuje hotové záznamy fronty")
+    jobs.add_argument('--db', default=DEFAULT_DB, help="SQLite databáze fronty")
+    pdfs = commands.add_parser('pdfs', help="Zaindexuje vyplněná PDF")
+    pdfs.add_argument('paths', nargs='+', help="PDF soubory nebo složky")
+    search = commands.add_parser('search', help="Vyhledá hodnoty polí")
+    search.add_argument('query')
+    search.add_argument('--field', help="Hledat jen v jednom poli")
+    search.add_argument('--limit', type=int, default=50)
+    search.add_argument('--raw', action='store_true', help="Dotaz je FTS5 výraz")
+
+    args = parser.parse_args()
+    index = FieldIndex(args.index)
+    try:
+        if args.command == 'jobs':
+            print(json.dumps({'indexed': index.add_jobs(args.db)}))
+        elif args.command == 'pdfs':
+            print(json.dumps({'indexed': index.add_pdfs(iter_pdfs(args.paths))}))
+        else:
+            for match in index.search(args.query, args.field, args.limit, args.raw):
+                print(json.dumps(match, ensure_ascii=False))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
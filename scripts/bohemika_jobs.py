@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Fronta dávkových úloh pro vyplňování Bohemika formulářů
+Úlohy i jejich záznamy jsou uloženy v lokální SQLite databázi, takže
+přerušená dávka po restartu pokračuje od posledního dokončeného záznamu.
+
+Použití:
+    python bohemika_jobs.py submit <data.jsonl> [--db jobs.sqlite] [--out vystup/] [--documents klient]
+    python bohemika_jobs.py work [--db jobs.sqlite] [--timeout 30] [--metrics-port 9108] [--metrics-file w.prom]
+                                 [--max-rss-growth 200] [--snapshot-every 1000]
+    python bohemika_jobs.py status <job_id> [--db jobs.sqlite]
+    python bohemika_jobs.py results <job_id> [--db jobs.sqlite]
+    python bohemika_jobs.py retry <job_id> [--db jobs.sqlite]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import signal
+import sqlite3
+import threading
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+import bohemika_metrics
+from bohemika_documents import (DOCUMENT_SET_PREFIX, DOCUMENT_SETS, documents_digest, fill_document_set,
+                                is_document_set, set_name_of, write_document_set)
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, fill_record
+from bohemika_memory import MB, RECYCLE_EXIT, MemoryGuard
+from bohemika_metrics import QUEUE_DEPTH, cache_result
+from bohemika_profile import add_profile_arguments, options_from_args, start_profiler
+from bohemika_trace import emit_summary
+
+DEFAULT_DB = "bohemika_jobs.sqlite"
+
+# Klíč záznamu je zároveň název výstupního souboru - jen jedna bezpečná složka cesty
+SAFE_KEY = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9._-]{0,127}')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL DEFAULT 'queued',
+    template_path TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    seq INTEGER NOT NULL,
+    record_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    sha256 TEXT,
+    size INTEGER,
+    error TEXT,
+    PRIMARY KEY (job_id, record_key)
+);
+CREATE INDEX IF NOT EXISTS records_by_status ON records (job_id, status, seq);
+"""
+
+
+@contextmanager
+def fill_deadline(seconds: Optional[float]):
+    """
+    Přeruší blok výjimkou TimeoutError po uplynutí limitu
+
+    Používá SIGALRM, takže funguje jen v hlavním vlákně na POSIX systémech;
+    jinde se limit ignoruje.
+    """
+    if not seconds or not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def expire(signum, frame):
+        raise TimeoutError(f"Fill exceeded {seconds} s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def queue_depth(db_path: str) -> Dict[tuple, int]:
+    """
+    Čekající záznamy podle úlohy (vlastní spojení - volá se z vlákna endpointu)
+    """
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        rows = conn.execute(
+            "SELECT job_id, COUNT(*) FROM records WHERE status IN ('pending', 'running') GROUP BY job_id")
+        return {(job_id,): count for job_id, count in rows}
+    finally:
+        conn.close()
+
+
+def record_key_for(record: Dict[str, Any]) -> str:
+    """
+    Vrátí idempotentní klíč záznamu
+
+    Pokud záznam obsahuje '_key', použije se; jinak se klíč odvodí
+    z hashe kanonického JSON, takže opakované odeslání stejných dat
+    nevytvoří duplicitní práci.
+
+    Raises:
+        ValueError: '_key' není bezpečný název souboru (obsahuje '/', '..',
+            je absolutní cesta apod.)
+    """
+    if record.get('_key'):
+        key = str(record['_key'])
+        if not SAFE_KEY.fullmatch(key):
+            raise ValueError(f"Unsafe record key: {key!r}")
+        return key
+    canonical = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+
+
+class JobQueue:
+    """
+    Trvalá fronta úloh nad SQLite
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = str(db_path)
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def submit(self, records: Iterable[Dict[str, Any]],
+               output_dir: str,
+               template_path: str = str(TEMPLATE_PATH),
+               backend: str = 'fitz',
+               job_id: Optional[str] = None) -> str:
+        """
+        Založí úlohu a vloží její záznamy
+
+        Args:
+            records: Záznamy (form_data) k vyplnění
+            output_dir (str): Složka pro vyplněná PDF (uloží se absolutní,
+                aby cesty k výstupům nezávisely na pracovní složce workeru)
+            template_path (str): Cesta k šabloně PDF
+            backend (str): 'fitz' nebo 'pypdf'
+            job_id (str): Existující úloha, do které se záznamy přidají
+
+        Returns:
+            str: ID úlohy
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        if is_document_set(template_path) and set_name_of(template_path) not in DOCUMENT_SETS:
+            raise ValueError(f"Unknown document set: {set_name_of(template_path)}")
+        now = time.time()
+        job_id = job_id or uuid.uuid4().hex
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, template_path, backend, output_dir, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, str(template_path), backend, os.path.abspath(output_dir), now, now))
+            seq = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), -1) + 1 FROM records WHERE job_id = ?", (job_id,)).fetchone()[0]
+            for record in records:
+                key = record_key_for(record)
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO records (job_id, seq, record_key, payload) VALUES (?, ?, ?, ?)",
+                    (job_id, seq, key, json.dumps(record, ensure_ascii=False)))
+                if cursor.rowcount:
+                    cache_result('output', False)
+                else:
+                    # Záznam se stejným klíčem už existuje - zásah jen pokud je jeho výstup hotový,
+                    # duplikát ještě čekajícího záznamu se nepočítá
+                    done = self.conn.execute(
+                        "SELECT 1 FROM records WHERE job_id = ? AND record_key = ? AND status = 'done'",
+                        (job_id, key)).fetchone()
+                    if done:
+                        cache_result('output', True)
+                seq += cursor.rowcount
+            self.conn.execute(
+                "UPDATE jobs SET total = (SELECT COUNT(*) FROM records WHERE job_id = ?), "
+                "status = CASE WHEN status = 'done' THEN 'queued' ELSE status END, updated_at = ? WHERE id = ?",
+                (job_id, now, job_id))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def progress(self, job_id: str) -> Dict[str, Any]:
+        """
+        Vrátí stav úlohy a počty záznamů podle stavu
+        """
+        job = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        counts = {row['status']: row['n'] for row in self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM records WHERE job_id = ? GROUP BY status", (job_id,))}
+        return {
+            'job_id': job_id,
+            'status': job['status'],
+            'total': job['total'],
+            'done': counts.get('done', 0),
+            'failed': counts.get('failed', 0),
+            'pending': counts.get('pending', 0) + counts.get('running', 0),
+        }
+
+    def results(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        Vrátí výsledky záznamů v pořadí odeslání
+        """
+        rows = self.conn.execute(
+            "SELECT record_key, status, output_path, sha256, size, error, attempts "
+            "FROM records WHERE job_id = ? ORDER BY seq", (job_id,))
+        return [dict(row) for row in rows]
+
+    def retry(self, job_id: str) -> int:
+        """
+        Vrátí selhané záznamy zpět do fronty
+
+        Returns:
+            int: Počet znovu zařazených záznamů
+        """
+        cursor = self.conn.execute(
+            "UPDATE records SET status = 'pending', error = NULL WHERE job_id = ? AND status = 'failed'",
+            (job_id,))
+        if cursor.rowcount:
+            self.conn.execute("UPDATE jobs SET status = 'queued', updated_at = ? WHERE id = ?",
+                              (time.time(), job_id))
+        return cursor.rowcount
+
+    def next_job(self) -> Optional[str]:
+        """
+        Vrátí nejstarší nedokončenou úlohu
+        """
+        row = self.conn.execute(
+            "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at LIMIT 1").fetchone()
+        return row['id'] if row else None
+
+    def run(self, job_id: str, max_attempts: int = 3, timeout: Optional[float] = None,
+            guard: Optional[MemoryGuard] = None) -> Dict[str, Any]:
+        """
+        Zpracuje všechny čekající záznamy úlohy
+
+        Každý záznam se potvrdí samostatně až po zápisu výstupu, takže
+        pád procesu přijde nanejvýš o rozpracovaný záznam.
+
+        Args:
+            max_attempts (int): Počet pokusů, než se záznam označí jako failed
+            timeout (float): Limit na vyplnění jednoho záznamu v sekundách
+            guard (MemoryGuard): Hlídání paměti; při překročení limitu se běh
+                přeruší a úloha zůstane ve stavu running pro další proces
+        """
+        job = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if job is None:
+            raise KeyError(f"Unknown job: {job_id}")
+        output_dir = Path(job['output_dir'])
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        # Záznamy rozpracované při pádu se vrací do fronty
+        self.conn.execute(
+            "UPDATE records SET status = 'pending' WHERE job_id = ? AND status = 'running'", (job_id,))
+        self.conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                          (time.time(), job_id))
+
+        while True:
+            row = self.conn.execute(
+                "SELECT record_key, payload, attempts FROM records "
+                "WHERE job_id = ? AND status = 'pending' ORDER BY seq LIMIT 1", (job_id,)).fetchone()
+            if row is None:
+                break
+            key = row['record_key']
+            self.conn.execute(
+                "UPDATE records SET status = 'running', attempts = attempts + 1 "
+                "WHERE job_id = ? AND record_key = ?", (job_id, key))
+            try:
+                if is_document_set(job['template_path']):
+                    # Sada dokumentů: jedno mapování, všechny šablony, složka na klienta
+                    with fill_deadline(timeout):
+                        documents = fill_document_set(json.loads(row['payload']),
+                                                      set_name_of(job['template_path']), job['backend'])
+                    output_path = write_document_set(output_dir, key, documents)
+                    digest, size = documents_digest(documents), sum(map(len, documents.values()))
+                else:
+                    with fill_deadline(timeout):
+                        pdf_bytes = fill_record(json.loads(row['payload']), job['template_path'], job['backend'])
+                    output_path = output_dir / f"{key}.pdf"
+                    temp_path = output_path.with_suffix('.pdf.part')
+                    with open(temp_path, 'wb') as f:
+                        f.write(pdf_bytes)
+                    os.replace(temp_path, output_path)
+                    digest, size = hashlib.sha256(pdf_bytes).hexdigest(), len(pdf_bytes)
+                self.conn.execute(
+                    "UPDATE records SET status = 'done', output_path = ?, sha256 = ?, size = ?, error = NULL "
+                    "WHERE job_id = ? AND record_key = ?",
+                    (str(output_path), digest, size, job_id, key))
+            except Exception as e:
+                status = 'pending' if row['attempts'] + 1 < max_attempts else 'failed'
+                self.conn.execute(
+                    "UPDATE records SET status = ?, error = ? WHERE job_id = ? AND record_key = ?",
+                    (status, f"{type(e).__name__}: {e}", job_id, key))
+            bohemika_metrics.flush()
+            if guard is not None:
+                snapshots = len(guard.snapshots)
+                guard.after_fill()
+                if len(guard.snapshots) > snapshots:
+                    print(f"MEMORY: {json.dumps(guard.snapshots[-1])}", file=sys.stderr)
+                if guard.should_recycle():
+                    bohemika_metrics.flush(force=True)
+                    return {**self.progress(job_id), 'recycle': guard.summary()}
+
+        self.conn.execute("UPDATE jobs SET status = 'done', updated_at = ? WHERE id = ?",
+                          (time.time(), job_id))
+        emit_summary(job_id=job_id)
+        bohemika_metrics.flush(force=True)
+        return self.progress(job_id)
+
+
+def work(args) -> int:
+    """
+    Zpracuje čekající úlohy (příkaz work)
+
+    Returns:
+        int: Kód ukončení - RECYCLE_EXIT, pokud je třeba proces vyměnit
+    """
+    bohemika_metrics.configure_from_env(args.metrics_port, args.metrics_file)
+    QUEUE_DEPTH.callback = lambda: queue_depth(args.db)
+    guard = None
+    if args.max_rss_growth or args.snapshot_every:
+        guard = MemoryGuard(int((args.max_rss_growth or 0) * MB), snapshot_every=args.snapshot_every or 0)
+    queue = JobQueue(args.db)
+    try:
+        with start_profiler(options_from_args(args)):
+            while True:
+                job_id = queue.next_job()
+                if job_id is None:
+                    return 0
+                result = queue.run(job_id, timeout=args.timeout, guard=guard)
+                print(json.dumps(result), flush=True)
+                if 'recycle' in result:
+                    return RECYCLE_EXIT
+    finally:
+        queue.close()
+
+
+def _work_process(args):
+    sys.exit(work(args))
+
+
+def supervise(args) -> int:
+    """
+    Spouští work() v podprocesech a vyměňuje ty, které skončí s RECYCLE_EXIT
+    """
+    while True:
+        process = multiprocessing.Process(target=_work_process, args=(args,))
+        process.start()
+        process.join()
+        if process.exitcode != RECYCLE_EXIT:
+            return process.exitcode
+        print(f"MEMORY: worker {process.pid} recycled", file=sys.stderr)
+
+
+def read_records(path: str) -> Iterable[Dict[str, Any]]:
+    """
+    Načte záznamy z JSONL souboru (nebo JSON pole / jednoho objektu)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Fronta dávkových úloh Bohemika filleru")
+    parser.add_argument('--db', default=DEFAULT_DB, help="Cesta k SQLite databázi fronty")
+    add_profile_arguments(parser)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help="Založí novou úlohu")
+    submit.add_argument('input', help="JSONL/JSON soubor se záznamy")
+    submit.add_argument('--out', default='bohemika_output', help="Výstupní složka")
+    submit.add_argument('--template', default=str(TEMPLATE_PATH))
+    submit.add_argument('--backend', choices=BACKENDS, default='fitz')
+    submit.add_argument('--job', help="Přidá záznamy do existující úlohy")
+    submit.add_argument('--documents', metavar='SET', help="Místo šablony vyplní sadu dokumentů")
+
+    work_parser = commands.add_parser('work', help="Zpracuje všechny čekající úlohy")
+    work_parser.add_argument('--timeout', type=float, help="Limit na jeden záznam v sekundách")
+    work_parser.add_argument('--metrics-port', type=int, help="Port HTTP endpointu /metrics")
+    work_parser.add_argument('--metrics-file', help="Soubor s metrikami (Prometheus textfile)")
+    work_parser.add_argument('--max-rss-growth', type=float, help="Recyklovat worker po růstu RSS o tolik MB")
+    work_parser.add_argument('--snapshot-every', type=int, help="Snímek tracemalloc každých N záznamů")
+    for name in ('status', 'results', 'retry'):
+        commands.add_parser(name).add_argument('job_id')
+
+    args = parser.parse_args()
+    queue = JobQueue(args.db)
+    try:
+        if args.command == 'submit':
+            template = DOCUMENT_SET_PREFIX + args.documents if args.documents else args.template
+            job_id = queue.submit(read_records(args.input), args.out, template, args.backend, args.job)
+            print(job_id)
+        elif args.command == 'work':
+            code = supervise(args) if args.max_rss_growth else work(args)
+            if code:
+                sys.exit(code)
+        elif args.command == 'status':
+            print(json.dumps(queue.progress(args.job_id)))
+        elif args.command == 'results':
+            for result in queue.results(args.job_id):
+                print(json.dumps(result, ensure_ascii=False))
+        elif args.command == 'retry':
+            print(queue.retry(args.job_id))
+    except (KeyError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Zátěžový test vyplňování s otevřenou smyčkou (open-loop)
+
+Požadavky ze JSONL souboru (např. z create_test_data.py --count) se
+odesílají v pevně daných časech podle profilu zátěže bez ohledu na to,
+jestli předchozí doběhly - latence se měří od plánovaného příchodu,
+takže zahlcený cíl se projeví frontou a ne tišším generátorem.
+
+Cíle:
+    worker - pool procesů volajících bohemika_engine.fill_record
+    cli    - nový proces fill_bohemika_pdf_fitz.py na každý požadavek
+             (stejně jako netlify/functions/fill-pdf.ts)
+    http   - POST JSON na URL služby (např. netlify dev)
+
+Pro každý krok profilu se vypíše nabídnutá a dosažená propustnost,
+p50/p99 latence, chybovost, průměrná souběžnost a CPU a RSS workerů;
+z toho je vidět křivka saturace.
+
+Použití:
+    python bohemika_loadtest.py <data.jsonl> [--target worker|cli|http] [--workers 4]
+                                [--profile 2:20,4:20,8:20 | --ramp 1:16:x2:20] [--arrivals poisson]
+                                [--url http://localhost:8888/.netlify/functions/fill-pdf] [--watch-pid PID]
+                                [--out loadtest.json]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, fill_record
+from bohemika_jobs import read_records
+from bohemika_memory import MB
+from bohemika_records import RecordStore, RecordView
+
+REPO_ROOT = Path(__file__).parent.parent
+CLI_SCRIPT = Path(__file__).parent / "fill_bohemika_pdf_fitz.py"
+# Krok je saturovaný, pokud dosažená propustnost klesne pod tento podíl nabídnuté
+SATURATION_RATIO = 0.9
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def parse_profile(text: str) -> List[Tuple[float, float]]:
+    """
+    '2:20,4:20' -> [(2.0, 20.0), (4.0, 20.0)] (požadavků/s : sekund)
+    """
+    steps = []
+    for item in text.split(','):
+        rate, seconds = item.split(':')
+        steps.append((float(rate), float(seconds)))
+    return steps
+
+
+def ramp_profile(text: str) -> List[Tuple[float, float]]:
+    """
+    Rampa 'start:stop:krok:sekund'; krok 'x2' násobí, číslo přičítá
+    ('1:16:x2:20' -> 1, 2, 4, 8, 16 požadavků/s po 20 s)
+    """
+    start, stop, step, seconds = text.split(':')
+    rate, stop = float(start), float(stop)
+    steps = []
+    while rate <= stop + 1e-9:
+        steps.append((rate, float(seconds)))
+        rate = rate * float(step[1:]) if step.startswith('x') else rate + float(step)
+    return steps
+
+
+def process_usage(pids: Iterable[int]) -> Dict[str, float]:
+    """
+    Součet CPU času (s) a RSS (B) procesů z /proc; ukončené procesy se přeskočí
+    """
+    cpu, rss = 0.0, 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+            with open(f'/proc/{pid}/statm', 'r') as f:
+                rss += int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, IndexError, ValueError):
+            continue
+        # utime a stime jsou 14. a 15. pole stat (po názvu procesu 12. a 13.)
+        cpu += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    return {'cpu_seconds': cpu, 'rss': rss}
+
+
+def _worker_fill(record: Dict[str, Any], template_path: str, backend: str) -> Tuple[int, int]:
+    return os.getpid(), len(fill_record(record, template_path, backend))
+
+
+def _payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Odesílaný JSON v původním tvaru záznamu (řádek RecordStore se zase vnoří)"""
+    return record.to_record() if isinstance(record, RecordView) else dict(record)
+
+
+class WorkerTarget:
+    """Pool procesů s bohemika_engine (dlouho běžící fill worker)"""
+
+    def __init__(self, workers: int, template_path: str, backend: str):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.template_path, self.backend = template_path, backend
+        self.pids = set()
+        # Zahřátí: spustí všechny procesy a načte šablonu, než začne měření
+        for future in [self.pool.submit(_worker_fill, {}, template_path, backend) for _ in range(workers * 2)]:
+            self.pids.add(future.result()[0])
+
+    def submit(self, record: Dict[str, Any]) -> Future:
+        return self.pool.submit(_worker_fill, record, self.template_path, self.backend)
+
+    def usage(self) -> Dict[str, float]:
+        return process_usage(self.pids)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class CliTarget:
+    """Nový Python proces na každý požadavek (jako fill-pdf.ts)"""
+
+    def __init__(self, concurrency: int):
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    @staticmethod
+    def _run(record: Dict[str, Any]) -> int:
+        result = subprocess.run([sys.executable, str(CLI_SCRIPT), json.dumps(_payload(record), ensure_ascii=False)],
+                                cwd=REPO_ROOT, capture_output=True)
+        if result.returncode != 0 or result.stderr:
+            raise RuntimeError(f"exit {result.returncode}: {result.stderr[:200].decode('utf-8', 'replace')}")
+        return len(result.stdout)
+
+    def submit(self, record: Dict[str, Any]) -> Future:
+        return self.pool.submit(self._run, record)
+
+    def usage(self) -> Dict[str, float]:
+        # Jen skončené (posbírané) potomky; RSS = největší z nich
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return {'cpu_seconds': children.ru_utime + children.ru_stime, 'rss': children.ru_maxrss * 1024}
+
+    def close(self):
+        self.pool.shutdown()
+
+
+class HttpTarget:
+    """POST JSON na URL služby; CPU a RSS z --watch-pid"""
+
+    def __init__(self, url: str, concurrency: int, watch_pids: List[int], timeout: float = 60):
+        self.url, self.timeout, self.watch_pids = url, timeout, watch_pids
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _post(self, record: Dict[str, Any]) -> int:
+        request = urllib.request.Request(self.url, data=json.dumps(_payload(record)).encode('utf-8'),
+                                         headers={'Content-Type': 'application/json'}, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return len(response.read())
+
+    def submit(self, record: Dict[str, Any]) -> Future:
+        return self.pool.submit(self._post, record)
+
+    def usage(self) -> Dict[str, float]:
+        return process_usage(self.watch_pids)
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def _error_kind(error: BaseException) -> str:
+    if isinstance(error, urllib.error.HTTPError):
+        return f"http_{error.code}"
+    if isinstance(error, (TimeoutError, urllib.error.URLError)):
+        return 'timeout' if 'timed out' in str(error) else 'connection'
+    return type(error).__name__
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 1)
+
+
+def run_load(target, records: Sequence[Dict[str, Any]], profile: List[Tuple[float, float]],
+             arrivals: str = 'uniform', seed: int = 42) -> Dict[str, Any]:
+    """
+    Přehraje záznamy podle profilu zátěže a vrátí statistiky po krocích
+
+    Args:
+        target: WorkerTarget / CliTarget / HttpTarget
+        records: Záznamy s len() a indexem, např. RecordStore (cyklicky se opakují)
+        profile: Kroky (požadavků/s, sekund)
+        arrivals (str): 'uniform' (pravidelně) nebo 'poisson' (exponenciální rozestupy)
+
+    Returns:
+        dict: {'steps': [...], 'saturation_rate': první saturovaná rychlost nebo None}
+    """
+    rng = random.Random(seed)
+    source = (records[i % len(records)] for i in itertools.count())
+    # Podmínka hlídá počty i výsledky; konec běhu čeká, až doběhnou všechny callbacky
+    finished_all = threading.Condition()
+    in_flight = [0]
+    submitted, completed = [0], [0]
+    results: List[List[Tuple[float, float, Optional[str]]]] = [[] for _ in profile]
+
+    def done(future: Future, step: int, scheduled: float):
+        finished = time.perf_counter()
+        error = future.exception()
+        with finished_all:
+            in_flight[0] -= 1
+            completed[0] += 1
+            results[step].append((finished, finished - scheduled, None if error is None else _error_kind(error)))
+            finished_all.notify_all()
+
+    steps = []
+    started = time.perf_counter()
+    at = started
+    for step, (rate, seconds) in enumerate(profile):
+        step_start, step_end = at, at + seconds
+        usage_before = target.usage()
+        concurrency = []
+        # První příchod je na začátku kroku, další po rozestupech
+        while at < step_end:
+            delay = at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with finished_all:
+                in_flight[0] += 1
+                submitted[0] += 1
+                concurrency.append(in_flight[0])
+            future = target.submit(next(source))
+            future.add_done_callback(lambda f, step=step, scheduled=at: done(f, step, scheduled))
+            # Pravidelné příchody se počítají od začátku kroku (bez sčítání zaokrouhlení)
+            at = at + rng.expovariate(rate) if arrivals == 'poisson' else step_start + len(concurrency) / rate
+        at = step_end
+        delay = step_end - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        usage_after = target.usage()
+        steps.append({
+            'offered_rps': rate,
+            'seconds': seconds,
+            'sent': len(concurrency),
+            'mean_concurrency': round(sum(concurrency) / len(concurrency), 2) if concurrency else 0,
+            'max_concurrency': max(concurrency, default=0),
+            'cpu_percent': round((usage_after['cpu_seconds'] - usage_before['cpu_seconds']) / seconds * 100, 1),
+            'rss_mb': round(usage_after['rss'] / MB, 1),
+            '_window': (step_start, step_end),
+        })
+
+    with finished_all:
+        finished_all.wait_for(lambda: completed[0] == submitted[0])
+    wall = time.perf_counter() - started
+
+    saturation_rate = None
+    for step, stats in enumerate(steps):
+        window_start, window_end = stats.pop('_window')
+        # Propustnost z požadavků odeslaných v kroku; doba zahrnuje dobíhání
+        # až do posledního dokončeného z nich (zahlcený cíl tak nemá přes 100 %)
+        ok = sum(1 for _, _, error in results[step] if error is None)
+        last_finished = max((finished for finished, _, _ in results[step]), default=window_end)
+        duration = max(window_end, last_finished) - window_start
+        latencies = sorted(latency for _, latency, error in results[step] if error is None)
+        errors: Dict[str, int] = {}
+        for _, _, error in results[step]:
+            if error is not None:
+                errors[error] = errors.get(error, 0) + 1
+        stats.update({
+            'throughput_rps': round(ok / duration, 2),
+            'drain_seconds': round(max(0.0, last_finished - window_end), 2),
+            'p50_ms': _percentile(latencies, 0.5),
+            'p99_ms': _percentile(latencies, 0.99),
+            'error_rate': round(sum(errors.values()) / len(results[step]), 4) if results[step] else 0,
+            'errors': errors,
+        })
+        if saturation_rate is None and stats['throughput_rps'] < stats['offered_rps'] * SATURATION_RATIO:
+            saturation_rate = stats['offered_rps']
+    return {'steps': steps, 'saturation_rate': saturation_rate, 'wall_seconds': round(wall, 1)}
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'nabídka/s':>9} {'propust./s':>10} {'p50 ms':>8} {'p99 ms':>8} {'chyby':>6} "
+          f"{'souběh':>7} {'CPU %':>6} {'RSS MB':>7}", file=sys.stderr)
+    for step in report['steps']:
+        print(f"{step['offered_rps']:9.1f} {step['throughput_rps']:10.2f} {step['p50_ms'] or '-':>8} "
+              f"{step['p99_ms'] or '-':>8} {step['error_rate']:6.1%} {step['mean_concurrency']:7.1f} "
+              f"{step['cpu_percent']:6.0f} {step['rss_mb']:7.1f}", file=sys.stderr)
+    if report['saturation_rate']:
+        print(f"Saturace od {report['saturation_rate']} požadavků/s", file=sys.stderr)
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Zátěžový test Bohemika filleru (open-loop)")
+    parser.add_argument('input', help="JSONL/JSON soubor se záznamy")
+    parser.add_argument('--target', choices=('worker', 'cli', 'http'), default='worker')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Procesy workeru / souběžné požadavky pro cli a http")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    parser.add_argument('--url', help="URL služby pro --target http")
+    parser.add_argument('--watch-pid', type=int, action='append', default=[],
+                        help="PID procesu služby pro měření CPU a RSS (lze opakovat)")
+    profile = parser.add_mutually_exclusive_group()
+    profile.add_argument('--profile', type=parse_profile, help="Kroky 'rychlost:sekund,...'")
+    profile.add_argument('--ramp', type=ramp_profile, help="Rampa 'start:stop:krok:sekund' (krok 'x2' násobí)")
+    parser.add_argument('--arrivals', choices=('uniform', 'poisson'), default='uniform')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help="Výsledky (JSON)")
+    args = parser.parse_args()
+
+    # Sloupcové úložiště - i milion záznamů se vejde do paměti generátoru
+    records = RecordStore.from_records(read_records(args.input))
+    steps = args.profile or args.ramp or ramp_profile('1:16:x2:20')
+    if args.target == 'worker':
+        target = WorkerTarget(args.workers, args.template, args.backend)
+    elif args.target == 'cli':
+        target = CliTarget(args.workers)
+    else:
+        if not args.url:
+            parser.error("--target http vyžaduje --url")
+        target = HttpTarget(args.url, args.workers, args.watch_pid)
+    try:
+        report = run_load(target, records, steps, args.arrivals, args.seed)
+    finally:
+        target.close()
+    report.update(target=args.target, workers=args.workers, arrivals=args.arrivals)
+    print_report(report)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Předkompilovaný manifest polí šablony
+
+Místo procházení všech widgetů AcroFormu při každém vyplnění se pole
+šablony (stránka, xref, typ) zjistí jednou a uloží vedle šablony jako
+<šablona>.fields.json. Manifest nese sha256 šablony; pokud nesedí,
+vyplňování se vrátí k běžnému procházení widgetů.
+
+Použití (při buildu / po změně šablony):
+    python bohemika_manifest.py [sablona.pdf ...]
+"""
+
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+
+MANIFEST_SUFFIX = '.fields.json'
+MANIFEST_VERSION = 1
+
+
+def import_fitz():
+    """
+    Importuje PyMuPDF až při prvním použití
+
+    Novější verze mají modul 'pymupdf'; starý název 'fitz' při importu
+    vypisuje varování na stdout, což rozbíjí base64 výstup CLI.
+    """
+    try:
+        import pymupdf as fitz
+    except ImportError:
+        import fitz  # PyMuPDF < 1.24.3
+    return fitz
+
+
+def manifest_path(template_path: Union[str, Path]) -> Path:
+    template_path = Path(template_path)
+    return template_path.with_name(template_path.stem + MANIFEST_SUFFIX)
+
+
+def build_manifest(template_bytes: bytes) -> Dict[str, Any]:
+    """
+    Projde widgety šablony a vrátí manifest polí
+
+    Returns:
+        dict: {'version', 'sha256', 'fields': [{'name', 'page', 'xref', 'type'}]}
+    """
+    fitz = import_fitz()
+
+    doc = fitz.open(stream=template_bytes, filetype="pdf")
+    try:
+        fields = []
+        for page in doc:
+            for widget in page.widgets():
+                fields.append({
+                    'name': widget.field_name,
+                    'page': page.number,
+                    'xref': widget.xref,
+                    'type': widget.field_type,
+                })
+    finally:
+        doc.close()
+    return {
+        'version': MANIFEST_VERSION,
+        'sha256': hashlib.sha256(template_bytes).hexdigest(),
+        'fields': fields,
+    }
+
+
+def load_manifest(template_path: Union[str, Path], template_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Načte manifest šablony, pokud existuje a odpovídá jejímu obsahu
+    """
+    try:
+        with open(manifest_path(template_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    if manifest.get('sha256') != hashlib.sha256(template_bytes).hexdigest():
+        return None
+    return manifest
+
+
+def fields_by_page(manifest: Dict[str, Any], names) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Vybere z manifestu pole s danými názvy, seskupená podle stránky
+    """
+    pages: Dict[int, List[Dict[str, Any]]] = {}
+    for field in manifest['fields']:
+        if field['name'] in names:
+            pages.setdefault(field['page'], []).append(field)
+    return pages
+
+
+def write_manifest(template_path: Union[str, Path]) -> Path:
+    """
+    Vytvoří (přepíše) manifest vedle šablony
+    """
+    with open(template_path, 'rb') as f:
+        manifest = build_manifest(f.read())
+    path = manifest_path(template_path)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    return path
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    templates = sys.argv[1:] or [str(Path(__file__).parent.parent / "public" / "bohemika_template.pdf")]
+    for template in templates:
+        path = write_manifest(template)
+        print(f"{template} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Maskovaná varianta formuláře pro širší interní sdílení
+
+V maskované kopii je rodné číslo (fill_12), telefon a e-mail částečně
+skryté. Maskovaná verze vzniká ve stejném průchodu jako plná: šablona se
+otevře a namapuje jednou, vyplní se plná verze a pro masku se přepíšou
+jen maskovaná pole (viz bohemika_engine.fill_record_variants). Ostatní
+objekty a vzhledy polí jsou sdílené, příplatek za variantu je vyplnění
+tří polí a jedna serializace.
+
+Použití:
+    python bohemika_mask.py <data.json> [--out vyplneny.pdf] [--backend fitz]
+    python bohemika_mask.py <data.json> --bench 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Callable
+
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, fill_record, fill_record_variants
+
+MASK_CHAR = '*'
+MASKED_VARIANT = 'masked'
+
+
+def mask_chars(value: str, keep_start: int = 0, keep_end: int = 0) -> str:
+    """
+    Nahradí písmena a číslice maskou, oddělovače (mezery, '/', '+') nechá
+
+    Args:
+        keep_start (int): Kolik znaků ponechat na začátku
+        keep_end (int): Kolik znaků ponechat na konci
+    """
+    positions = [i for i, char in enumerate(value) if char.isalnum()]
+    hidden = set(positions[keep_start:len(positions) - keep_end])
+    return ''.join(MASK_CHAR if i in hidden else char for i, char in enumerate(value))
+
+
+def mask_email(value: str) -> str:
+    """jan.novak@example.cz -> j*******@example.cz"""
+    local, at, domain = value.partition('@')
+    if not at:
+        return mask_chars(value, 1)
+    return local[:1] + MASK_CHAR * max(len(local) - 1, 1) + at + domain
+
+
+# Maskovaná pole: název pole -> maskovací funkce
+MASK_RULES: Dict[str, Callable[[str], str]] = {
+    'fill_12': lambda value: mask_chars(value, 0, 3),  # Rodné číslo - jen poslední 3 číslice
+    'Telefon': lambda value: mask_chars(value, 0, 3),
+    'email': mask_email,
+}
+
+
+def mask_field_values(field_values: Dict[str, str]) -> Dict[str, str]:
+    """
+    Vrátí jen pole, která se v maskované variantě mění
+
+    Args:
+        field_values (dict): Namapované hodnoty polí (viz map_form_data)
+    """
+    overlay = {}
+    for name, rule in MASK_RULES.items():
+        value = field_values.get(name)
+        if value:
+            masked = rule(value)
+            if masked != value:
+                overlay[name] = masked
+    return overlay
+
+
+def fill_masked(form_data: Dict, template_path=TEMPLATE_PATH, backend: str = 'fitz') -> Dict[str, bytes]:
+    """
+    Vyplní plnou i maskovanou verzi v jednom průchodu
+
+    Returns:
+        dict: {'full': PDF bajty, 'masked': PDF bajty}
+    """
+    return fill_record_variants(form_data, {MASKED_VARIANT: mask_field_values}, template_path, backend)
+
+
+def variant_path(output_path: str, variant: str) -> str:
+    """vystup.pdf -> vystup.masked.pdf"""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}.{variant}{ext or '.pdf'}"
+
+
+def benchmark(form_data: Dict, repeat: int, template_path=TEMPLATE_PATH, backend: str = 'fitz') -> Dict:
+    """
+    Porovná jedno vyplnění, dvě samostatná vyplnění (plné + maskované)
+    a variantní průchod
+    """
+    masked_data = dict(form_data)
+    masked_data.update(mask_field_values({name: str(form_data.get(name) or '') for name in MASK_RULES}))
+    fill_masked(form_data, template_path, backend)  # zahřátí cache šablony
+
+    def timed(fill):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fill()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    single = timed(lambda: fill_record(form_data, template_path, backend))
+    twice = timed(lambda: (fill_record(form_data, template_path, backend),
+                           fill_record(masked_data, template_path, backend)))
+    variants = timed(lambda: fill_masked(form_data, template_path, backend))
+    return {
+        'backend': backend,
+        'repeat': repeat,
+        'single_ms': round(single, 2),
+        'two_fills_ms': round(twice, 2),
+        'variants_ms': round(variants, 2),
+        'marginal_ms': round(variants - single, 2),
+    }
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Plná a maskovaná verze Bohemika formuláře")
+    parser.add_argument('input', help="JSON soubor nebo JSON řetězec s daty formuláře")
+    parser.add_argument('--out', default='bohemika_vyplneny.pdf', help="Výstupní PDF plné verze")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    parser.add_argument('--bench', type=int, metavar='N', help="Změří příplatek za maskovanou variantu")
+    args = parser.parse_args()
+
+    if os.path.isfile(args.input):
+        with open(args.input, 'r', encoding='utf-8') as f:
+            form_data = json.load(f)
+    else:
+        form_data = json.loads(args.input)
+
+    if args.bench:
+        print(json.dumps(benchmark(form_data, args.bench, args.template, args.backend)))
+        return
+
+    outputs = fill_masked(form_data, args.template, args.backend)
+    paths = {'full': args.out, MASKED_VARIANT: variant_path(args.out, MASKED_VARIANT)}
+    for variant, pdf_bytes in outputs.items():
+        Path(paths[variant]).write_bytes(pdf_bytes)
+    print(json.dumps(paths, ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
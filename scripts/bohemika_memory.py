@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Hlídání paměti dlouho běžících workerů
+
+MemoryGuard po každém vyplnění zaznamená přírůstek RSS, v pravidelných
+intervalech porovná snímky tracemalloc (kde paměť roste) a ohlásí, že
+je čas worker recyklovat, když RSS vzroste nad limit oproti stavu po
+zahřátí. Worker pak dokončí rozpracovaný záznam a skončí s kódem
+RECYCLE_EXIT; supervisor (viz bohemika_jobs.py work --max-rss-growth)
+spustí nový proces, který pokračuje z fronty.
+
+Snímky tracemalloc jsou diagnostika: vyplňování výrazně zpomalí a
+režie snímků se projeví i v RSS, proto je nekombinujte s ostrým limitem.
+
+Soak test (výchozí 100 000 vyplnění v jednom procesu):
+    python bohemika_memory.py [--fills 100000] [--backend fitz] [--tracemalloc]
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from bohemika_metrics import current_rss
+
+# Kód ukončení workeru, který se má spustit znovu
+RECYCLE_EXIT = 75
+
+MB = 1024 * 1024
+
+
+def worker_rss() -> int:
+    """
+    RSS procesu bez paměti, kterou zabírá samotné tracemalloc
+    """
+    rss = current_rss()
+    if tracemalloc.is_tracing():
+        rss -= tracemalloc.get_tracemalloc_memory()
+    return rss
+
+
+class MemoryGuard:
+    """
+    Účetnictví paměti workeru
+
+    Args:
+        max_growth (int): Povolený růst RSS v bajtech oproti stavu po zahřátí (0 = bez limitu)
+        warmup (int): Počet vyplnění, po kterých se bere výchozí RSS (načtené knihovny, cache)
+        snapshot_every (int): Interval snímků tracemalloc ve vyplněních (0 = bez snímků)
+        top (int): Počet řádků s největším přírůstkem ve výpisu snímku
+    """
+
+    def __init__(self, max_growth: int = 0, warmup: int = 50,
+                 snapshot_every: int = 0, top: int = 5):
+        self.max_growth = max_growth
+        self.warmup = warmup
+        self.snapshot_every = snapshot_every
+        self.top = top
+        self.fills = 0
+        self.baseline: Optional[int] = None
+        self.rss = worker_rss()
+        self.peak_delta = 0
+        self.snapshots: List[Dict[str, Any]] = []
+        self._snapshot = None
+        if snapshot_every and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def growth(self) -> int:
+        """Růst RSS od konce zahřátí v bajtech"""
+        return 0 if self.baseline is None else self.rss - self.baseline
+
+    def after_fill(self) -> int:
+        """
+        Zaznamená stav po jednom vyplnění
+
+        Returns:
+            int: Přírůstek RSS tímto vyplněním v bajtech
+        """
+        previous = self.rss
+        self.rss = worker_rss()
+        self.fills += 1
+        delta = self.rss - previous
+        if self.baseline is not None:
+            self.peak_delta = max(self.peak_delta, delta)
+        if self.fills == self.warmup:
+            # Cykly z pypdf objektů se uvolní až sběrem - výchozí stav bez nich
+            gc.collect()
+            # Snímek se drží v paměti až do dalšího - patří do výchozího stavu
+            if self.snapshot_every:
+                self._snapshot = self._filtered_snapshot()
+            self.rss = self.baseline = worker_rss()
+        elif self.snapshot_every and self._snapshot is not None and self.fills % self.snapshot_every == 0:
+            self.take_snapshot()
+        return delta
+
+    @staticmethod
+    def _filtered_snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """
+        Porovná aktuální snímek tracemalloc s předchozím
+        """
+        snapshot = self._filtered_snapshot()
+        stats = snapshot.compare_to(self._snapshot, 'lineno') if self._snapshot else []
+        self._snapshot = snapshot
+        report = {
+            'fills': self.fills,
+            'rss': self.rss,
+            'growth': self.growth,
+            'top': [
+                {'where': str(stat.traceback[0]), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                for stat in stats[:self.top] if stat.size_diff > 0
+            ],
+        }
+        self.snapshots.append(report)
+        return report
+
+    def should_recycle(self) -> bool:
+        """
+        True, pokud RSS překročil povolený růst
+        """
+        return bool(self.max_growth) and self.growth > self.max_growth
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'fills': self.fills,
+            'rss': self.rss,
+            'baseline': self.baseline,
+            'growth': self.growth,
+            'growth_per_1k_fills': round(self.growth / max(self.fills - self.warmup, 1) * 1000),
+            'peak_fill_delta': self.peak_delta,
+        }
+
+
+def soak(fills: int, record: Dict[str, Any], template_path: str, backend: str,
+         report_every: int = 10_000, snapshot_every: int = 0) -> Dict[str, Any]:
+    """
+    Opakovaně vyplňuje záznam v jednom procesu a měří růst paměti
+
+    Returns:
+        dict: Souhrn MemoryGuard včetně průběhu RSS
+    """
+    from bohemika_engine import fill_record
+
+    guard = MemoryGuard(snapshot_every=snapshot_every)
+    timeline = []
+    started = time.perf_counter()
+    for i in range(1, fills + 1):
+        fill_record(record, template_path, backend)
+        guard.after_fill()
+        if i % report_every == 0 or i == fills:
+            point = {'fills': i, 'rss_mb': round(guard.rss / MB, 1), 'growth_mb': round(guard.growth / MB, 2),
+                     'fills_per_second': round(i / (time.perf_counter() - started), 1)}
+            timeline.append(point)
+            print(f"MEMORY: {json.dumps(point)}", file=sys.stderr)
+    summary = guard.summary()
+    summary['timeline'] = timeline
+    summary['snapshots'] = guard.snapshots
+    return summary
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    from bohemika_engine import BACKENDS, TEMPLATE_PATH
+
+    parser = argparse.ArgumentParser(description="Soak test paměti Bohemika filleru")
+    parser.add_argument('--fills', type=int, default=100_000)
+    parser.add_argument('--record', help="JSON soubor se záznamem (výchozí ukázkový klient)")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    parser.add_argument('--report-every', type=int, default=10_000)
+    parser.add_argument('--tracemalloc', type=int, nargs='?', const=10_000, default=0, metavar='N',
+                        help="Snímek tracemalloc každých N vyplnění (výrazně zpomaluje)")
+    args = parser.parse_args()
+
+    if args.record:
+        with open(args.record, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    else:
+        record = {'fill_11': 'Jan Novák', 'fill_12': '8001011234', 'Adresa': 'Hlavní 1, Brno',
+                  'fill_21': '2 500 000 Kč', 'LTV': '80 %', 'dne': '1. 1. 2025'}
+    summary = soak(args.fills, record, args.template, args.backend,
+                   max(min(args.report_every, args.fills), 1), args.tracemalloc)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Metriky workeru ve formátu Prometheus (text exposition 0.0.4)
+
+Sleduje počet vyplnění, latence podle šablony a backendu, hloubku
+fronty, úspěšnost cache šablon a výstupů, RSS procesu a chyby podle
+příčiny (missing_field, backend_exception, timeout).
+
+Export:
+    serve(port)            HTTP endpoint /metrics v samostatném vlákně
+    write_textfile(path)   atomický zápis pro node_exporter textfile collector
+
+Worker zapíná export přes --metrics-port / --metrics-file nebo proměnné
+prostředí BOHEMIKA_METRICS_PORT a BOHEMIKA_METRICS_FILE. Počítání samo
+běží vždy (jen aktualizace slovníků), jednorázové CLI nic neexportují.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Hranice košů latence vyplnění v sekundách
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ERROR_CAUSES = ('missing_field', 'backend_exception', 'timeout')
+
+_lock = threading.Lock()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Monotónně rostoucí čítač s popisky
+    """
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with _lock:
+            items = sorted(self.values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """
+    Okamžitá hodnota; volitelně se počítá až při exportu (callback)
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, labelnames=(), callback: Optional[Callable] = None):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, *labels: str):
+        with _lock:
+            self.values[labels] = value
+
+    def render(self) -> List[str]:
+        if self.callback is not None:
+            # Callback vrací {popisky: hodnota}; chyba při sběru metriku vynechá
+            try:
+                collected = self.callback()
+            except Exception:
+                collected = {}
+            with _lock:
+                self.values = dict(collected)
+        return super().render()
+
+
+class Histogram(_Metric):
+    """
+    Histogram s kumulativními koši (le) podle konvence Promethea
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with _lock:
+            # [počty v koších..., +Inf, součet]
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            index = 0
+            while index < len(self.buckets) and value > self.buckets[index]:
+                index += 1
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with _lock:
+            items = sorted((labels, list(state)) for labels, state in self.values.items())
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(state[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+def current_rss() -> int:
+    """
+    Aktuální RSS procesu v bajtech (mimo Linux maximum z getrusage, na Windows 0)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        # Modul resource není na Windows
+        import resource
+    except ImportError:
+        return 0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS vrací bajty, Linux kilobajty
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+FILLS = Counter('bohemika_fills_total', "Úspěšně vyplněné formuláře", ('template', 'backend'))
+FILL_SECONDS = Histogram('bohemika_fill_duration_seconds', "Doba vyplnění jednoho formuláře",
+                         ('template', 'backend'))
+ERRORS = Counter('bohemika_fill_errors_total', "Chyby vyplňování podle příčiny", ('cause',))
+CACHE = Counter('bohemika_cache_requests_total', "Dotazy do cache podle výsledku", ('cache', 'result'))
+QUEUE_DEPTH = Gauge('bohemika_queue_depth', "Čekající záznamy ve frontě", ('job',))
+RSS = Gauge('bohemika_worker_rss_bytes', "Resident set size procesu workeru",
+            callback=lambda: {(): current_rss()})
+
+REGISTRY = [FILLS, FILL_SECONDS, ERRORS, CACHE, QUEUE_DEPTH, RSS]
+
+
+def observe_fill(template: str, backend: str, seconds: float):
+    FILLS.inc(template, backend)
+    FILL_SECONDS.observe(seconds, template, backend)
+
+
+def cache_result(cache: str, hit: bool):
+    CACHE.inc(cache, 'hit' if hit else 'miss')
+
+
+def error_cause(exc: BaseException) -> str:
+    """
+    Zařadí výjimku vyplnění do jedné z ERROR_CAUSES
+
+    'missing_field' se nehlásí výjimkou - zaznamenává ho přímo fill engine
+    (record_error('missing_field')) po kontrole polí šablony.
+    """
+    if isinstance(exc, TimeoutError):
+        return 'timeout'
+    return 'backend_exception'
+
+
+def record_error(exc_or_cause):
+    cause = exc_or_cause if isinstance(exc_or_cause, str) else error_cause(exc_or_cause)
+    ERRORS.inc(cause)
+
+
+def render() -> str:
+    """
+    Vrátí všechny metriky v textovém formátu Promethea
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path: str):
+    """
+    Atomicky zapíše metriky do souboru (.prom)
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(temp_path, path)
+
+
+def _handler_class():
+    # http.server se importuje až se spuštěním endpointu (rychlejší start CLI)
+    from http.server import BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Přístupový log by na stderr rozbil výstup workeru
+            pass
+
+    return Handler
+
+
+def serve(port: int, host: str = '0.0.0.0'):
+    """
+    Spustí HTTP endpoint /metrics ve vlákně na pozadí
+    """
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _handler_class())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+_textfile: Optional[str] = None
+_textfile_interval = 10.0
+_last_flush = 0.0
+
+
+def configure(port: Optional[int] = None, textfile: Optional[str] = None, interval: float = 10.0):
+    """
+    Zapne export metrik workeru
+
+    Args:
+        port (int): Port HTTP endpointu /metrics (None = bez endpointu)
+        textfile (str): Soubor přepisovaný funkcí flush() (None = bez souboru)
+        interval (float): Minimální odstup zápisů souboru v sekundách
+    """
+    global _textfile, _textfile_interval
+    if port:
+        serve(int(port))
+    _textfile = textfile
+    _textfile_interval = interval
+
+
+def configure_from_env(port: Optional[int] = None, textfile: Optional[str] = None):
+    """
+    Jako configure(), chybějící hodnoty doplní z BOHEMIKA_METRICS_PORT/FILE
+    """
+    configure(port or os.environ.get('BOHEMIKA_METRICS_PORT') or None,
+              textfile or os.environ.get('BOHEMIKA_METRICS_FILE') or None)
+
+
+def flush(force: bool = False):
+    """
+    Přepíše soubor metrik, pokud je nastaven a uplynul interval
+    """
+    global _last_flush
+    if _textfile is None:
+        return
+    now = time.monotonic()
+    if force or now - _last_flush >= _textfile_interval:
+        _last_flush = now
+        write_textfile(_textfile)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Text pro standardní písma PDF (Helvetica) s kódováním cp1250
+
+Standardní písma se nevkládají a mají jen 1bajtové kódy. Čeština
+(ř, ě, ů...) proto jde přes /Differences nad /WinAnsiEncoding: přepíšou
+se jen kódy, kde se cp1250 liší od cp1252. Modul sdílí pokračovací strany
+(bohemika_continuation.py) i render_layout.py v kořeni repozitáře.
+"""
+
+from typing import Dict, List
+
+from reportlab.pdfbase import pdfmetrics
+
+TEXT_ENCODING = 'cp1250'
+ELLIPSIS = '…'
+FONTS = ('Helvetica', 'Helvetica-Bold')
+
+# Kódy, kde se cp1250 liší od cp1252 -> název glyfu (Adobe Glyph List)
+CP1250_DIFFERENCES: Dict[int, str] = {
+    140: 'Sacute', 141: 'Tcaron', 143: 'Zacute', 156: 'sacute', 157: 'tcaron', 159: 'zacute',
+    161: 'caron', 162: 'breve', 163: 'Lslash', 165: 'Aogonek', 170: 'Scedilla', 175: 'Zdot',
+    178: 'ogonek', 179: 'lslash', 185: 'aogonek', 186: 'scedilla', 188: 'Lcaron', 189: 'hungarumlaut',
+    190: 'lcaron', 191: 'zdot', 192: 'Racute', 195: 'Abreve', 197: 'Lacute', 198: 'Cacute',
+    200: 'Ccaron', 202: 'Eogonek', 204: 'Ecaron', 207: 'Dcaron', 208: 'Dcroat', 209: 'Nacute',
+    210: 'Ncaron', 213: 'Odblacute', 216: 'Rcaron', 217: 'Uring', 219: 'Udblacute', 222: 'Tcedilla',
+    224: 'racute', 227: 'abreve', 229: 'lacute', 230: 'cacute', 232: 'ccaron', 234: 'eogonek',
+    236: 'ecaron', 239: 'dcaron', 240: 'dcroat', 241: 'nacute', 242: 'ncaron', 245: 'odblacute',
+    248: 'rcaron', 249: 'uring', 251: 'udblacute', 254: 'tcedilla', 255: 'dotaccent',
+}
+
+# Hodnota /Differences slovníku kódování
+DIFFERENCES = f"[{' '.join(f'{code} /{name}' for code, name in CP1250_DIFFERENCES.items())}]".encode('ascii')
+ENCODING_OBJECT = b'<< /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences %s >>' % DIFFERENCES
+
+
+def _width_tables() -> Dict[str, List[float]]:
+    """
+    Šířky glyfů podle kódu cp1250 (v jednotkách velikosti písma)
+
+    Metriky standardních písem v reportlab neznají akcentované glyfy
+    (rcaron, uring...); ty dostanou šířku základního písmene.
+    """
+    vector = pdfmetrics.getEncoding('WinAnsiEncoding').vector
+    tables = {}
+    for font in FONTS:
+        glyph_widths = pdfmetrics.getFont(font).face.glyphWidths
+        table = [0.0] * 256
+        for code in range(32, 256):
+            try:
+                bytes([code]).decode(TEXT_ENCODING)
+            except UnicodeDecodeError:
+                continue
+            name = CP1250_DIFFERENCES.get(code) or vector[code]
+            if name:
+                table[code] = glyph_widths.get(name, glyph_widths.get(name[0], 556)) / 1000
+        tables[font] = table
+    return tables
+
+
+WIDTHS = _width_tables()
+
+
+def escape(data: bytes) -> bytes:
+    """Escapování obsahu PDF literálu (bez závorek)"""
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)').replace(b'\r', b'\\r')
+
+
+def encode_text(text: str) -> bytes:
+    """Řetězec do PDF literálu (bez závorek) - znaky mimo cp1250 jako '?'"""
+    return escape(text.encode(TEXT_ENCODING, 'replace'))
+
+
+def fit_text(text: str, width: float, size: float, font: str = 'Helvetica') -> bytes:
+    """
+    Zakóduje text do cp1250 a zkrátí ho (s '…') na danou šířku v bodech
+
+    Returns:
+        bytes: Obsah PDF literálu (escapovaný, bez závorek)
+    """
+    data = ' '.join(text.split()).encode(TEXT_ENCODING, 'replace')
+    table = WIDTHS[font]
+    limit = width / size
+    total = 0.0
+    ellipsis = ELLIPSIS.encode(TEXT_ENCODING)
+    cut = 0
+    for index, code in enumerate(data):
+        total += table[code]
+        if total > limit:
+            return escape(data[:cut] + ellipsis)
+        if total + table[ellipsis[0]] <= limit:
+            cut = index + 1
+    return escape(data)
+
+
+def pdf_number(value: float) -> bytes:
+    """Číslo do obsahu PDF - celá čísla bez desetin, jinak nejvýš 2 desetinná místa"""
+    return (b'%d' % value) if float(value).is_integer() else (b'%.2f' % value).rstrip(b'0')
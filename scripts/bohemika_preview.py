@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Náhledy vyplněných formulářů (PNG) s cache a pool procesů
+
+Každá stránka se uloží jako plný náhled a miniatura do cache podle
+sha256 výstupního PDF:
+    <cache>/<sha[:2]>/<sha>-<dpi>/page-<n>.png, thumb-<n>.png, fields.json
+
+Překreslení je inkrementální: jako pozadí slouží rastr předchozí verze
+téhož formuláře (parametr previous) nebo rastr prázdné šablony (cache
+podle sha256 šablony). Pozadí se použije jen pro stránku se stejným
+podpisem (obsah stránky a sada widgetů), jinak se stránka vykreslí celá.
+Znovu se vykreslí jen výřezy widgetů, jejichž hodnota se oproti pozadí
+změnila. Vykreslení každého výřezu znovu
+interpretuje obsah stránky, takže při více než MAX_CLIPS změnách je
+rychlejší vykreslit stránku celou.
+
+Použití:
+    python bohemika_preview.py <vyplneny.pdf ...> [--cache dir] [--dpi 110] [--workers 4] [--previous sha]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+from bohemika_engine import TEMPLATE_PATH, load_template
+from bohemika_manifest import import_fitz
+
+DEFAULT_CACHE = Path(os.environ.get('BOHEMIKA_PREVIEW_CACHE', 'bohemika_previews'))
+DEFAULT_DPI = 110
+# Miniatura = plný náhled zmenšený 2^THUMB_SHRINK krát
+THUMB_SHRINK = 2
+# Nad tento počet změněných widgetů se stránka vykreslí celá
+MAX_CLIPS = 4
+# Okraj výřezu v bodech (antialiasing okraje pole)
+CLIP_MARGIN = 1
+
+# Rastry šablon v rámci procesu: (cesta šablony, dpi) -> [(pixmapa, hodnoty polí, podpis stránky)]
+_backgrounds: Dict[Tuple[str, int], List[Tuple[Any, Dict[str, str], str]]] = {}
+
+
+def _entry_dir(cache_dir: Path, sha: str, dpi: int) -> Path:
+    return Path(cache_dir) / sha[:2] / f"{sha}-{dpi}"
+
+
+def _page_values(page) -> Dict[str, str]:
+    return {widget.field_name: widget.field_value or '' for widget in page.widgets()}
+
+
+def _page_widgets(page) -> List[Tuple[str, str, Any]]:
+    return [(widget.field_name, widget.field_value or '', widget.rect) for widget in page.widgets()]
+
+
+def _page_signature(page) -> str:
+    """
+    Podpis stránky nezávislý na hodnotách polí - obsah stránky, rozměr a widgety
+
+    Vyplnění mění jen vzhledy widgetů, takže vyplněná stránka má stejný
+    podpis jako stránka šablony, ze které vznikla.
+    """
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(repr(tuple(page.rect)).encode('ascii'))
+    for widget in page.widgets():
+        digest.update(f"{widget.field_name}:{tuple(widget.rect)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _template_background(template_path: Union[str, Path], dpi: int, cache_dir: Path):
+    """
+    Rastr prázdné šablony - z paměti procesu, z cache na disku, nebo vykreslený
+    """
+    fitz = import_fitz()
+
+    key = (str(template_path), dpi)
+    if key in _backgrounds:
+        return _backgrounds[key]
+    data = load_template(template_path)
+    sha = hashlib.sha256(data).hexdigest()
+    directory = Path(cache_dir) / 'templates' / f"{sha}-{dpi}"
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        pages = []
+        for page in doc:
+            png = directory / f"page-{page.number}.png"
+            if png.exists():
+                pix = fitz.Pixmap(str(png))
+            else:
+                pix = page.get_pixmap(dpi=dpi, alpha=False)
+                directory.mkdir(parents=True, exist_ok=True)
+                pix.save(str(png))
+            pages.append((pix, _page_values(page), _page_signature(page)))
+    finally:
+        doc.close()
+    _backgrounds[key] = pages
+    return pages
+
+
+def _previous_background(cache_dir: Path, previous: str, dpi: int):
+    fitz = import_fitz()
+
+    directory = _entry_dir(cache_dir, previous, dpi)
+    try:
+        with open(directory / 'fields.json', 'r', encoding='utf-8') as f:
+            fields = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return [(fitz.Pixmap(str(directory / f"page-{n}.png")), page['values'], page['signature'])
+            for n, page in enumerate(fields)]
+
+
+def render_preview(pdf_bytes: bytes,
+                   cache_dir: Union[str, Path] = DEFAULT_CACHE,
+                   dpi: int = DEFAULT_DPI,
+                   template_path: Union[str, Path] = TEMPLATE_PATH,
+                   previous: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Vykreslí (nebo z cache vrátí) náhledy všech stránek PDF
+
+    Args:
+        pdf_bytes (bytes): Vyplněné PDF
+        cache_dir (str): Kořen cache náhledů
+        dpi (int): Rozlišení plného náhledu
+        template_path (str): Šablona, ze které PDF vzniklo (pozadí)
+        previous (str): sha256 předchozí verze formuláře (např. před refill)
+
+    Returns:
+        dict: {'sha256', 'pages': [cesty], 'thumbs': [cesty], 'cached', 'clips'}
+    """
+    fitz = import_fitz()
+
+    sha = hashlib.sha256(pdf_bytes).hexdigest()
+    directory = _entry_dir(cache_dir, sha, dpi)
+    fields_path = directory / 'fields.json'
+    if fields_path.exists():
+        count = len(json.loads(fields_path.read_text(encoding='utf-8')))
+        return {
+            'sha256': sha,
+            'pages': [str(directory / f"page-{n}.png") for n in range(count)],
+            'thumbs': [str(directory / f"thumb-{n}.png") for n in range(count)],
+            'cached': True,
+            'clips': 0,
+        }
+
+    backgrounds = None
+    if previous:
+        backgrounds = _previous_background(cache_dir, previous, dpi)
+    if backgrounds is None:
+        backgrounds = _template_background(template_path, dpi, cache_dir)
+
+    matrix = fitz.Matrix(dpi / 72, dpi / 72)
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    directory.mkdir(parents=True, exist_ok=True)
+    pages, thumbs, fields, clips = [], [], [], 0
+    try:
+        for page in doc:
+            widgets = _page_widgets(page)
+            values = {name: value for name, value, _ in widgets}
+            signature = _page_signature(page)
+            pix = None
+            if page.number < len(backgrounds) and backgrounds[page.number][2] == signature:
+                background, background_values, _ = backgrounds[page.number]
+                changed = [rect for name, value, rect in widgets if background_values.get(name, '') != value]
+                target = (page.rect * matrix).irect
+                same_size = (background.width, background.height) == (target.width, target.height)
+                if same_size and len(changed) <= MAX_CLIPS:
+                    pix = fitz.Pixmap(background, 0)
+                    for rect in changed:
+                        clip = page.get_pixmap(matrix=matrix, alpha=False,
+                                               clip=rect + (-CLIP_MARGIN, -CLIP_MARGIN, CLIP_MARGIN, CLIP_MARGIN))
+                        pix.copy(clip, clip.irect)
+                    clips += len(changed)
+            if pix is None:
+                pix = page.get_pixmap(matrix=matrix, alpha=False)
+            page_path = directory / f"page-{page.number}.png"
+            thumb_path = directory / f"thumb-{page.number}.png"
+            pix.save(str(page_path))
+            thumb = fitz.Pixmap(pix, 0)
+            thumb.shrink(THUMB_SHRINK)
+            thumb.save(str(thumb_path))
+            pages.append(str(page_path))
+            thumbs.append(str(thumb_path))
+            fields.append({'values': values, 'signature': signature})
+    finally:
+        doc.close()
+    # fields.json se zapisuje poslední - jeho existence znamená hotovou položku cache
+    temp_path = directory / f"fields.json.{os.getpid()}.part"
+    temp_path.write_text(json.dumps(fields, ensure_ascii=False), encoding='utf-8')
+    os.replace(temp_path, fields_path)
+    return {'sha256': sha, 'pages': pages, 'thumbs': thumbs, 'cached': False, 'clips': clips}
+
+
+def _render_path(args):
+    path, cache_dir, dpi, template_path, previous = args
+    with open(path, 'rb') as f:
+        result = render_preview(f.read(), cache_dir, dpi, template_path, previous)
+    result['input'] = path
+    return result
+
+
+def render_many(pdf_paths: List[str],
+                cache_dir: Union[str, Path] = DEFAULT_CACHE,
+                dpi: int = DEFAULT_DPI,
+                template_path: Union[str, Path] = TEMPLATE_PATH,
+                workers: Optional[int] = None,
+                previous: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Vykreslí náhledy více PDF v poolu procesů (rastr šablony se drží v každém workeru)
+    """
+    tasks = [(path, str(cache_dir), dpi, str(template_path), previous) for path in pdf_paths]
+    if workers == 1 or len(tasks) == 1:
+        return [_render_path(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render_path, tasks, chunksize=max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))))
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="PNG náhledy vyplněných Bohemika formulářů")
+    parser.add_argument('pdfs', nargs='+', help="Vyplněná PDF")
+    parser.add_argument('--cache', default=str(DEFAULT_CACHE), help="Složka cache náhledů")
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--workers', type=int, help="Počet procesů (výchozí počet CPU)")
+    parser.add_argument('--previous', help="sha256 předchozí verze formuláře (inkrementální překreslení)")
+    args = parser.parse_args()
+
+    for result in render_many(args.pdfs, args.cache, args.dpi, args.template, args.workers, args.previous):
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Profilování Bohemika filleru (--profile / --profile-out)
+
+Režimy:
+    cprofile  deterministický cProfile, výstup ve formátu pstats
+    sample    vzorkování zásobníku hlavního vlákna, výstup jako
+              "collapsed stacks" pro flamegraph.pl / speedscope
+
+Po skončení se na stderr vypíše rozdělení času mezi náš kód
+(scripts/), pypdf, fitz (PyMuPDF), standardní knihovnu a ostatní.
+"""
+
+import contextlib
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+MODES = ('cprofile', 'sample')
+DEFAULT_OUT = {'cprofile': 'bohemika_fill.pstats', 'sample': 'bohemika_fill.collapsed'}
+COLLAPSED_SUFFIXES = ('.collapsed', '.folded', '.txt')
+
+# Interval vzorkování v sekundách
+SAMPLE_INTERVAL = 0.001
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Standardní knihovna (bez importu sysconfig)
+STDLIB_DIR = os.path.dirname(os.__file__)
+
+
+def categorize(filename: str) -> str:
+    """
+    Zařadí zdrojový soubor funkce do kategorie pro rozdělení času
+    """
+    if filename.startswith(SCRIPTS_DIR):
+        return 'bohemika'
+    parts = filename.replace('\\', '/').split('/')
+    if 'pypdf' in parts:
+        return 'pypdf'
+    if 'fitz' in parts or 'pymupdf' in parts:
+        return 'fitz'
+    if filename in ('~', '') or filename.startswith('<'):
+        return 'builtin'
+    if filename.startswith(STDLIB_DIR) and 'site-packages' not in parts:
+        return 'stdlib'
+    return 'other'
+
+
+def split_profile_args(argv: List[str]) -> Tuple[List[str], Dict[str, Optional[str]]]:
+    """
+    Oddělí --profile [režim] a --profile-out <soubor> od ostatních argumentů
+
+    Neznámý režim ukončí program chybovou hláškou (jako argparse).
+
+    Returns:
+        tuple: (zbylé argumenty, {'mode': ..., 'out': ...})
+    """
+    rest = []
+    options: Dict[str, Optional[str]] = {'mode': None, 'out': None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--profile':
+            options['mode'] = 'cprofile'
+            if i + 1 < len(argv) and argv[i + 1] in MODES:
+                options['mode'] = argv[i + 1]
+                i += 1
+        elif arg.startswith('--profile='):
+            options['mode'] = arg.split('=', 1)[1]
+        elif arg == '--profile-out' and i + 1 < len(argv):
+            options['out'] = argv[i + 1]
+            i += 1
+        elif arg.startswith('--profile-out='):
+            options['out'] = arg.split('=', 1)[1]
+        else:
+            rest.append(arg)
+        i += 1
+    if options['mode'] is not None and options['mode'] not in MODES:
+        raise SystemExit(f"Error: unknown profile mode '{options['mode']}' (choose from {', '.join(MODES)})")
+    if options['out'] and not options['mode']:
+        options['mode'] = 'sample' if options['out'].endswith(COLLAPSED_SUFFIXES) else 'cprofile'
+    return rest, options
+
+
+def add_profile_arguments(parser):
+    """
+    Přidá --profile a --profile-out do argparse parseru
+    """
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=MODES,
+                        help="Profilovat běh (cprofile nebo sample)")
+    parser.add_argument('--profile-out', help="Soubor s profilem (.pstats nebo .collapsed)")
+
+
+def options_from_args(args) -> Dict[str, Optional[str]]:
+    """
+    Převede argparse výsledek na volby pro start_profiler
+    """
+    mode, out = args.profile, args.profile_out
+    if out and not mode:
+        mode = 'sample' if out.endswith(COLLAPSED_SUFFIXES) else 'cprofile'
+    return {'mode': mode, 'out': out}
+
+
+class Profiler:
+    """
+    Kontextový manažer, který profiluje blok kódu a zapíše výsledek
+    """
+
+    def __init__(self, mode: str = 'cprofile', out: Optional[str] = None,
+                 interval: float = SAMPLE_INTERVAL):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.mode = mode
+        self.out = out or DEFAULT_OUT[mode]
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._profile = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        if self.mode == 'cprofile':
+            import cProfile
+
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            target = threading.get_ident()
+            self._thread = threading.Thread(target=self._sample, args=(target,), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.out)
+            totals = self._cprofile_attribution()
+        else:
+            self._stop.set()
+            self._thread.join()
+            self._write_collapsed()
+            totals = self._sample_attribution()
+        self._report(totals)
+        return False
+
+    def _sample(self, target: int):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+    def _write_collapsed(self):
+        with open(self.out, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                names = ';'.join(
+                    f"{os.path.splitext(os.path.basename(filename))[0]}:{name}" for filename, name in stack)
+                f.write(f"{names} {count}\n")
+
+    def _sample_attribution(self) -> Dict[str, float]:
+        # Vlastní čas se připíše funkci na vrcholu zásobníku
+        totals: Counter = Counter()
+        for stack, count in self.samples.items():
+            totals[categorize(stack[-1][0])] += count * self.interval
+        return dict(totals)
+
+    def _cprofile_attribution(self) -> Dict[str, float]:
+        import pstats
+
+        stats = pstats.Stats(self._profile).stats
+        totals: Counter = Counter()
+        for (filename, _, _), (_, _, tottime, _, callers) in stats.items():
+            category = categorize(filename)
+            if category == 'builtin' and callers:
+                # C funkce (např. _mupdf) počítáme knihovně, která je volala
+                caller = max(callers.items(), key=lambda item: item[1][1])[0]
+                category = categorize(caller[0])
+            totals[category] += tottime
+        return dict(totals)
+
+    def _report(self, totals: Dict[str, float]):
+        total = sum(totals.values()) or 1e-9
+        print(f"PROFILE: {self.mode} -> {self.out}", file=sys.stderr)
+        for category, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+            print(f"PROFILE: {category:<9} {seconds * 1000:9.1f} ms {seconds / total * 100:5.1f}%", file=sys.stderr)
+
+
+def start_profiler(options: Dict[str, Optional[str]]):
+    """
+    Vrátí Profiler podle voleb z příkazové řádky (nebo prázdný kontext)
+    """
+    if not options.get('mode'):
+        return contextlib.nullcontext()
+    return Profiler(options['mode'], options.get('out'))
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Sloupcové úložiště záznamů pro dávkové vyplňování
+
+Milion záznamů jako vnořené slovníky ({"zadatel": {...}, "uver": {...}})
+plus další slovník na záznam po mapování zabere gigabajty jen na režii
+slovníků. RecordStore drží jeden sloupec na pole (vnořené klíče se
+zploští na 'zadatel.jmeno'):
+
+- sloupce s opakujícími se hodnotami (produkt, obec, data) jsou kódované
+  slovníkem - každá hodnota je v paměti jednou a řádek je 4bajtový kód
+  v array('I')
+- sloupce s převážně unikátními hodnotami (jméno, rodné číslo) jsou
+  obyčejný seznam
+
+Řádek je RecordView se __slots__ (úložiště + index), který se chová jako
+slovník pro čtení, takže ho map_form_data(), fill_record() i run_pipeline()
+berou přímo; to_record() vrátí řádek v původním vnořeném tvaru. Mapování (map_store) pracuje po sloupcích: přejmenování pole
+sdílí sloupec bez kopie, spojené hodnoty (jméno + příjmení) se počítají
+jednou za sloupec.
+
+Použití:
+    python bohemika_records.py <data.jsonl> --bench [--nested]
+    python bohemika_records.py <data.jsonl> [--nested] --out vystup/ | --archive vystup.zip
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bohemika_archive import COMPRESSIONS, open_sink
+from bohemika_engine import TEMPLATE_PATH, BACKENDS, map_form_data
+from bohemika_export import directory_writer, report_failures, run_pipeline
+from bohemika_jobs import read_records
+
+# Po tolika řádcích se rozhodne, jestli se sloupec vyplatí kódovat slovníkem
+PROBE_ROWS = 4096
+# Sloupec s vyšším podílem unikátních hodnot se převede na obyčejný seznam
+MAX_UNIQUE_RATIO = 0.5
+
+# Mapování vnořených client_data (fill_pdf.py: prepare_form_data + create_field_mapping)
+# na pole formuláře; n-tice zdrojů se spojí mezerou
+CLIENT_DATA_MAPPING: Dict[str, Union[str, Tuple[str, ...]]] = {
+    'fill_11': ('zadatel.jmeno', 'zadatel.prijmeni'),
+    'fill_12': 'zadatel.rodne_cislo',
+    'Adresa': 'zadatel.trvale_bydliste',
+    'Telefon': 'doklady.telefon',
+    'email': 'doklady.email',
+    'Produkt': 'uver.produkt',
+    'fill_21': 'uver.vyse_uveru',
+    'fill_22': 'uver.suma_zajisteni',
+    'LTV': 'uver.ltv',
+    'fill_24': 'uver.ucel',
+    'fill_25': 'uver.mesicni_splatka',
+    'fill_26': 'uver.datum_podpisu',
+    'V': 'podpis.misto',
+    'dne': 'podpis.datum',
+}
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+# Hodnota řádku, který pole nemá
+MISSING = _Missing()
+
+
+class Column:
+    """
+    Jeden sloupec - kódovaný slovníkem (codes + values) nebo obyčejný seznam
+    """
+
+    __slots__ = ('values', 'codes', 'index')
+
+    def __init__(self, length: int = 0):
+        self.values: List[Any] = [MISSING]
+        self.codes: Optional[array] = array('I', bytes(4 * length))
+        self.index: Optional[Dict[Any, int]] = {(_Missing, MISSING): 0}
+
+    def __len__(self) -> int:
+        return len(self.codes) if self.codes is not None else len(self.values)
+
+    def __getitem__(self, row: int) -> Any:
+        if self.codes is not None:
+            return self.values[self.codes[row]]
+        return self.values[row]
+
+    def append(self, value: Any):
+        if self.codes is None:
+            self.values.append(value)
+            return
+        # True a 1 (nebo 1 a 1.0) jsou si rovné - netextové hodnoty se klíčují i typem
+        key = value if type(value) is str else (type(value), value)
+        try:
+            code = self.index.get(key)
+        except TypeError:
+            # Nehashovatelná hodnota (seznam) - slovník nejde použít
+            self._to_plain()
+            self.values.append(value)
+            return
+        if code is None:
+            code = self.index[key] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+        if len(self.codes) % PROBE_ROWS == 0:
+            self.compact()
+
+    def compact(self):
+        """Převede sloupec na obyčejný seznam, pokud se kódování slovníkem nevyplatí"""
+        if self.codes is not None and len(self.values) > len(self.codes) * MAX_UNIQUE_RATIO:
+            self._to_plain()
+
+    def _to_plain(self):
+        self.values = [self.values[code] for code in self.codes]
+        self.codes = None
+        self.index = None
+
+    @property
+    def encoded(self) -> bool:
+        return self.codes is not None
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> 'Column':
+        column = cls()
+        for value in values:
+            column.append(value)
+        column.compact()
+        return column
+
+
+class RecordView:
+    """
+    Řádek úložiště jako slovník jen pro čtení (bez kopie hodnot)
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'RecordStore', row: int):
+        self._store = store
+        self._row = row
+
+    def get(self, key: str, default: Any = None) -> Any:
+        column = self._store.columns.get(key)
+        if column is None:
+            return default
+        value = column[self._row]
+        return default if value is MISSING else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, column in self._store.columns.items() if column[self._row] is not MISSING)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def to_record(self) -> Dict[str, Any]:
+        """Řádek v původním tvaru - zploštělé sloupce ('zadatel.jmeno') zase vnořené"""
+        record: Dict[str, Any] = {}
+        paths = self._store.paths
+        for name, value in self.items():
+            *parents, leaf = paths.get(name, (name,))
+            target = record
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = value
+        return record
+
+    def __reduce__(self):
+        # Do jiného procesu (ProcessPoolExecutor) se posílá jen tento řádek, ne celé úložiště
+        return dict, (self.to_record(),)
+
+    def __repr__(self):
+        return f"RecordView({self.to_dict()!r})"
+
+
+def flatten(record: Dict[str, Any], path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+    """{'zadatel': {'jmeno': 'Jan'}} -> (('zadatel', 'jmeno'), 'Jan')"""
+    for key, value in record.items():
+        if isinstance(value, dict):
+            yield from flatten(value, path + (key,))
+        else:
+            yield path + (key,), value
+
+
+class RecordStore:
+    """
+    Sloupcové úložiště záznamů
+    """
+
+    def __init__(self):
+        self.columns: Dict[str, Column] = {}
+        # Zploštělý sloupec -> cesta klíčů v původním záznamu (jen vnořená pole)
+        self.paths: Dict[str, Tuple[str, ...]] = {}
+        self.length = 0
+
+    def append(self, record: Dict[str, Any]):
+        count = 0
+        for path, value in flatten(record):
+            name = '.'.join(path)
+            column = self.columns.get(name)
+            if column is None:
+                # Pole, které dřívější řádky neměly - doplní se MISSING
+                column = self.columns[name] = Column(self.length)
+                if len(path) > 1:
+                    self.paths[name] = path
+            column.append(value)
+            count += 1
+        if count != len(self.columns):
+            for column in self.columns.values():
+                if len(column) == self.length:
+                    column.append(MISSING)
+        self.length += 1
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'RecordStore':
+        store = cls()
+        for record in records:
+            store.append(record)
+        # Úložiště pod PROBE_ROWS řádků se jinak o kódování sloupců nerozhodne
+        for column in store.columns.values():
+            column.compact()
+        return store
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, row: int) -> RecordView:
+        if row < 0:
+            row += self.length
+        if not 0 <= row < self.length:
+            raise IndexError(row)
+        return RecordView(self, row)
+
+    def __iter__(self) -> Iterator[RecordView]:
+        return (RecordView(self, row) for row in range(self.length))
+
+    def stats(self) -> Dict[str, Any]:
+        """Počet řádků a kódování sloupců (kolik unikátních hodnot)"""
+        return {
+            'rows': self.length,
+            'columns': {name: {'encoded': column.encoded,
+                               'unique': len(column.values) - 1 if column.encoded else None}
+                        for name, column in self.columns.items()},
+        }
+
+
+Source = Union[str, Tuple[str, ...], Callable[[RecordView], Any]]
+
+
+def map_store(store: RecordStore, mapping: Dict[str, Source], keep: Iterable[str] = ('_key',)) -> RecordStore:
+    """
+    Namapuje úložiště po sloupcích
+
+    Args:
+        mapping (dict): Cílové pole -> zdrojový sloupec (sdílí se bez kopie),
+            n-tice sloupců (hodnoty spojené mezerou) nebo funkce řádku
+        keep: Sloupce převzaté beze změny (pokud existují)
+
+    Returns:
+        RecordStore: Nové úložiště se stejným počtem řádků
+    """
+    mapped = RecordStore()
+    mapped.length = store.length
+    for name in keep:
+        if name in store.columns:
+            mapped.columns[name] = store.columns[name]
+    for target, source in mapping.items():
+        if isinstance(source, str):
+            column = store.columns.get(source)
+            mapped.columns[target] = column if column is not None else Column(store.length)
+        elif isinstance(source, tuple):
+            parts = [store.columns.get(name) or Column(store.length) for name in source]
+            mapped.columns[target] = Column.from_values(
+                ' '.join(str(value) for value in (part[row] for part in parts) if value not in (MISSING, None, ''))
+                for row in range(store.length))
+        else:
+            mapped.columns[target] = Column.from_values(source(view) for view in store)
+    return mapped
+
+
+def _measure(build: Callable[[], Any]) -> Tuple[Any, int, float]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def benchmark(path: str, nested: bool) -> Dict[str, Any]:
+    """
+    Porovná paměť seznamu slovníků (+ slovník na záznam po mapování)
+    se sloupcovým úložištěm (+ sloupcové mapování)
+    """
+    def as_dicts():
+        records = list(read_records(path))
+        if nested:
+            mapped = [{target: ' '.join(filter(None, (_nested_get(record, name) for name in source)))
+                       if isinstance(source, tuple) else _nested_get(record, source)
+                       for target, source in CLIENT_DATA_MAPPING.items()} for record in records]
+        else:
+            mapped = [map_form_data(record) for record in records]
+        return records, mapped
+
+    def as_store():
+        store = RecordStore.from_records(read_records(path))
+        return store, map_store(store, CLIENT_DATA_MAPPING) if nested else store
+
+    dicts, dict_bytes, dict_seconds = _measure(as_dicts)
+    rows = len(dicts[0])
+    expected = [map_form_data(values) if nested else values for values in dicts[1][:100]]
+    del dicts
+    (store, mapped), store_bytes, store_seconds = _measure(as_store)
+    # Kontrola, že oba postupy dávají stejné hodnoty polí
+    sample = [map_form_data(mapped[row]) for row in range(len(expected))]
+    assert sample == expected, "Sloupcové úložiště dává jiné hodnoty polí než seznam slovníků"
+    return {
+        'rows': rows,
+        'dicts_mb': round(dict_bytes / 2 ** 20, 1),
+        'store_mb': round(store_bytes / 2 ** 20, 1),
+        'ratio': round(dict_bytes / store_bytes, 1) if store_bytes else None,
+        'dicts_seconds': round(dict_seconds, 2),
+        'store_seconds': round(store_seconds, 2),
+        'encoded_columns': sorted(name for name, column in mapped.columns.items() if column.encoded),
+        'sample_fields': len(sample[0]) if sample else 0,
+    }
+
+
+def _nested_get(record: Dict[str, Any], dotted: str) -> str:
+    value: Any = record
+    for part in dotted.split('.'):
+        value = value.get(part, '') if isinstance(value, dict) else ''
+    return '' if value is None else str(value)
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Sloupcové úložiště záznamů pro dávkové vyplňování")
+    parser.add_argument('input', help="JSONL/JSON soubor se záznamy")
+    parser.add_argument('--nested', action='store_true',
+                        help="Záznamy jsou vnořená client_data (zadatel/doklady/uver/podpis)")
+    parser.add_argument('--bench', action='store_true', help="Porovná paměť se seznamem slovníků")
+    parser.add_argument('--out', help="Výstupní složka pro PDF")
+    parser.add_argument('--archive', help="Výstupní archiv (.zip, .tar, .tar.gz)")
+    parser.add_argument('--compression', choices=COMPRESSIONS)
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    parser.add_argument('--backend', choices=BACKENDS, default='fitz')
+    args = parser.parse_args()
+
+    if args.bench:
+        print(json.dumps(benchmark(args.input, args.nested), ensure_ascii=False))
+        return
+    if not args.out and not args.archive:
+        parser.error("--out, --archive or --bench is required")
+
+    store = RecordStore.from_records(read_records(args.input))
+    if args.nested:
+        store = map_store(store, CLIENT_DATA_MAPPING)
+    failures: List[Dict[str, str]] = []
+    if args.archive:
+        with open_sink(args.archive, args.compression) as sink:
+            count = run_pipeline(store, sink.write, args.template, args.backend, failures=failures)
+    else:
+        count = run_pipeline(store, directory_writer(args.out), args.template, args.backend, failures=failures)
+    print(f"Filled {count} forms into {args.archive or args.out}", file=sys.stderr)
+    report_failures(failures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Úprava už vyplněného Bohemika PDF podle změněných polí
+
+Místo nového vyplnění celé šablony se v hotovém PDF načtou jen widgety
+změněných polí, přegeneruje se jejich vzhled a změny se připíšou na konec
+souboru jako inkrementální aktualizace (původní bajty zůstanou beze změny).
+Cena úpravy tak roste s počtem změněných polí, ne s velikostí formuláře.
+
+PyMuPDF při přegenerování vzhledu s diakritikou vloží pokaždé novou plnou
+kopii písma (~44 kB). Vzhledy proto po úpravě odkazují na stejné písmo,
+které už v PDF je, a nová kopie se do aktualizace nezapíše.
+
+Použití:
+    python bohemika_refill.py <vyplneny.pdf> <zmeny.json> [--out novy.pdf]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Union
+
+from bohemika_engine import TEMPLATE_PATH, template_manifest
+from bohemika_manifest import import_fitz
+from bohemika_metrics import observe_fill, record_error
+from bohemika_trace import start_trace
+
+
+def _changed_widgets(doc, names, manifest):
+    """
+    Najde widgety polí podle názvu - přes xref z manifestu šablony, pokud
+    PDF vzniklo z téže šablony (xref sedí), jinak procházením stránek
+    """
+    pages = list(doc)
+    widgets = []
+    found = set()
+    if manifest is not None:
+        for field in manifest['fields']:
+            if field['name'] not in names or field['page'] >= len(pages):
+                continue
+            try:
+                widget = pages[field['page']].load_widget(field['xref'])
+            except Exception:
+                continue
+            if widget is not None and widget.field_name == field['name']:
+                widgets.append(widget)
+                found.add(field['name'])
+    if found != set(names):
+        for page in pages:
+            for widget in page.widgets():
+                if widget.field_name in names and widget.field_name not in found:
+                    widgets.append(widget)
+    # Stránky se vrací s widgety - widget bez živé stránky nejde aktualizovat
+    return pages, widgets
+
+
+_REFERENCE = re.compile(r'(\d+) 0 R')
+_FONT_ENTRY = re.compile(r'/([^\s/<>\[\]()]+)\s+(\d+) 0 R')
+
+
+def _object_tree(doc, xref: int) -> List[int]:
+    """xref objektu a všech objektů, na které (nepřímo) odkazuje"""
+    tree, stack = [], [xref]
+    while stack:
+        current = stack.pop()
+        if current in tree:
+            continue
+        tree.append(current)
+        stack.extend(int(ref) for ref in _REFERENCE.findall(doc.xref_object(current, compressed=True)))
+    return tree
+
+
+def _font_key(doc, xref: int) -> str:
+    """Otisk písma podle obsahu jeho objektů a streamů (bez čísel xref)"""
+    digest = hashlib.sha256()
+    for current in _object_tree(doc, xref):
+        digest.update(_REFERENCE.sub('R', doc.xref_object(current, compressed=True)).encode('utf-8'))
+        if doc.xref_is_stream(current):
+            digest.update(doc.xref_stream_raw(current))
+    return digest.hexdigest()
+
+
+def _reuse_fonts(doc, widgets, first_new: int):
+    """
+    Přesměruje písma nových vzhledů na shodná písma, která už v PDF jsou
+
+    Args:
+        first_new (int): První xref vytvořený při této úpravě - starší
+            objekty jsou v souboru a jejich znovupoužití nic nestojí
+    """
+    existing: Optional[Dict[str, int]] = None
+    for widget in widgets:
+        appearance = doc.xref_get_key(widget.xref, 'AP/N')
+        if appearance[0] != 'xref':
+            continue
+        ap_xref = int(appearance[1].split()[0])
+        fonts = doc.xref_get_key(ap_xref, 'Resources/Font')
+        if fonts[0] != 'dict':
+            continue
+        for name, ref in _FONT_ENTRY.findall(fonts[1]):
+            font_xref = int(ref)
+            if font_xref < first_new:
+                continue
+            if existing is None:
+                existing = {}
+                for xref in range(1, first_new):
+                    try:
+                        if doc.xref_get_key(xref, 'Type') != ('name', '/Font') or \
+                                doc.xref_get_key(xref, 'Subtype') != ('name', '/Type0'):
+                            continue
+                        existing.setdefault(_font_key(doc, xref), xref)
+                    except Exception:
+                        # Volné/poškozené položky xref tabulky se přeskočí
+                        continue
+            key = _font_key(doc, font_xref)
+            if key not in existing:
+                # Písmo v PDF ještě není - ponechá se pro další vzhledy
+                existing[key] = font_xref
+                continue
+            doc.xref_set_key(ap_xref, f'Resources/Font/{name}', f'{existing[key]} 0 R')
+            for xref in _object_tree(doc, font_xref):
+                if xref >= first_new:
+                    doc.update_object(xref, 'null')
+
+
+def refill_file(pdf_path: Union[str, Path], delta: Dict[str, Any],
+                template_path: Union[str, Path] = TEMPLATE_PATH) -> List[str]:
+    """
+    Změní pole v PDF souboru a zapíše inkrementální aktualizaci na místě
+
+    Args:
+        pdf_path (str): Vyplněné PDF (přepíše se připsáním na konec)
+        delta (dict): Název pole -> nová hodnota
+        template_path (str): Šablona, ze které PDF vzniklo (kvůli manifestu polí)
+
+    Returns:
+        list: Názvy skutečně změněných polí
+    """
+    fitz = import_fitz()
+
+    started = time.perf_counter()
+    trace = start_trace(backend='fitz-refill', template=os.path.basename(str(template_path)))
+    values = {name: '' if value is None else str(value) for name, value in delta.items()}
+    try:
+        with trace.stage('template_load'):
+            doc = fitz.open(str(pdf_path))
+        try:
+            with trace.stage('field_discovery'):
+                pages, widgets = _changed_widgets(doc, values, template_manifest(template_path))
+            changed = []
+            first_new = doc.xref_length()
+            for widget in widgets:
+                value = values[widget.field_name]
+                if (widget.field_value or '') == value:
+                    continue
+                filled = time.perf_counter()
+                widget.field_value = value
+                updated = time.perf_counter()
+                widget.update()
+                trace.add('field_fill', updated - filled)
+                trace.add('appearance', time.perf_counter() - updated)
+                changed.append(widget.field_name)
+            if changed:
+                with trace.stage('appearance'):
+                    _reuse_fonts(doc, [widget for widget in widgets if widget.field_name in changed], first_new)
+                with trace.stage('serialization'):
+                    doc.saveIncr()
+        finally:
+            doc.close()
+    except Exception as e:
+        record_error(e)
+        raise
+    observe_fill(os.path.basename(str(template_path)), 'fitz-refill', time.perf_counter() - started)
+    trace.finish(changed=len(changed))
+    return changed
+
+
+def refill_pdf(pdf_bytes: bytes, delta: Dict[str, Any],
+               template_path: Union[str, Path] = TEMPLATE_PATH) -> bytes:
+    """
+    Jako refill_file(), ale nad bajty PDF
+
+    PyMuPDF umí inkrementální zápis jen do souboru, proto se PDF projde
+    přes dočasný soubor. Vrácené bajty začínají beze změny původním PDF.
+    """
+    fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_bytes)
+        refill_file(temp_path, delta, template_path)
+        with open(temp_path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(temp_path)
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Úprava vyplněného Bohemika PDF")
+    parser.add_argument('pdf', help="Dříve vygenerované PDF")
+    parser.add_argument('delta', help="JSON soubor nebo JSON řetězec se změněnými poli")
+    parser.add_argument('--out', help="Výstupní PDF (výchozí: úprava na místě)")
+    parser.add_argument('--template', default=str(TEMPLATE_PATH))
+    args = parser.parse_args()
+
+    if os.path.isfile(args.delta):
+        with open(args.delta, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+    else:
+        delta = json.loads(args.delta)
+
+    target = args.pdf
+    if args.out:
+        shutil.copyfile(args.pdf, args.out)
+        target = args.out
+    changed = refill_file(target, delta, args.template)
+    print(json.dumps({'output': target, 'changed': changed}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Měření času jednotlivých fází vyplňování PDF
+
+Fáze: template_load, field_discovery, mapping, field_fill, appearance,
+serialization, encoding. Každé vyplnění zapíše jeden JSON řádek do
+samostatného kanálu (ne na stderr, který fill-pdf.ts považuje za chybu).
+
+Konfigurace přes proměnné prostředí:
+    BOHEMIKA_TRACE=<cesta>        JSONL soubor pro záznamy (append)
+    BOHEMIKA_TRACE=fd:<n>         zápis do otevřeného file descriptoru
+    BOHEMIKA_TRACE_HISTOGRAMS=1   agregace do histogramů (režim workeru)
+
+Bez konfigurace je měření vypnuté a start_trace() vrací sdílený prázdný
+objekt, jehož metody nic nedělají.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+STAGES = (
+    'template_load',
+    'field_discovery',
+    'mapping',
+    'field_fill',
+    'appearance',
+    'serialization',
+    'encoding',
+)
+
+# Hranice košů histogramu v mikrosekundách (mocniny dvou do ~67 s)
+BUCKET_BOUNDS = tuple(2 ** i for i in range(27))
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullTrace:
+    """
+    Vypnuté měření - všechny operace jsou no-op
+    """
+    __slots__ = ()
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def add(self, name: str, seconds: float):
+        pass
+
+    def field(self, name: str, seconds: float):
+        pass
+
+    def finish(self, **extra) -> None:
+        return None
+
+
+NULL_TRACE = NullTrace()
+
+
+class _Stage:
+    __slots__ = ('trace', 'name', 'started')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.trace.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class FillTrace:
+    """
+    Měření jednoho vyplnění
+    """
+    __slots__ = ('meta', 'stages', 'fields', 'started')
+    enabled = True
+
+    def __init__(self, **meta):
+        self.meta = meta
+        self.stages: Dict[str, float] = {}
+        self.fields: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def field(self, name: str, seconds: float):
+        self.fields[name] = self.fields.get(name, 0.0) + seconds
+
+    def finish(self, **extra) -> Dict[str, Any]:
+        """
+        Uzavře měření a odešle záznam do kanálu / histogramů
+        """
+        record = {
+            'ts': time.time(),
+            **self.meta,
+            **extra,
+            'total_us': round((time.perf_counter() - self.started) * 1e6),
+            'stages_us': {name: round(value * 1e6) for name, value in self.stages.items()},
+            'fields_us': {name: round(value * 1e6) for name, value in self.fields.items()},
+        }
+        _emit(record)
+        return record
+
+
+class Histogram:
+    """
+    Histogram dob v logaritmických koších (mikrosekundy)
+    """
+    __slots__ = ('counts', 'count', 'total')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0
+
+    def observe(self, micros: int):
+        index = 0
+        while index < len(BUCKET_BOUNDS) and micros > BUCKET_BOUNDS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += micros
+
+    def quantile(self, q: float) -> int:
+        """
+        Horní hranice koše, ve kterém leží kvantil q
+        """
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else BUCKET_BOUNDS[-1] * 2
+        return BUCKET_BOUNDS[-1] * 2
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean_us': round(self.total / self.count) if self.count else 0,
+            'p50_us': self.quantile(0.5),
+            'p90_us': self.quantile(0.9),
+            'p99_us': self.quantile(0.99),
+        }
+
+
+_lock = threading.Lock()
+_channel = None
+_histograms: Optional[Dict[str, Histogram]] = None
+_enabled = False
+
+
+def configure(path: Optional[str] = None, histograms: bool = False):
+    """
+    Zapne nebo vypne měření
+
+    Args:
+        path (str): Cesta k JSONL souboru, 'fd:<n>' nebo None (bez záznamů)
+        histograms (bool): Agregovat fáze do histogramů
+    """
+    global _channel, _histograms, _enabled
+    with _lock:
+        if _channel is not None:
+            _channel.close()
+        _channel = None
+        if path:
+            if path.startswith('fd:'):
+                _channel = os.fdopen(int(path[3:]), 'a', buffering=1, encoding='utf-8', closefd=False)
+            else:
+                _channel = open(path, 'a', buffering=1, encoding='utf-8')
+        _histograms = {} if histograms else None
+        _enabled = _channel is not None or _histograms is not None
+
+
+def start_trace(**meta):
+    """
+    Začne měření jednoho vyplnění (při vypnutém měření vrátí NULL_TRACE)
+    """
+    if not _enabled:
+        return NULL_TRACE
+    return FillTrace(**meta)
+
+
+def _emit(record: Dict[str, Any]):
+    with _lock:
+        if _channel is not None:
+            _channel.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if _histograms is not None:
+            _observe('total', record['total_us'])
+            for name, micros in record['stages_us'].items():
+                _observe(name, micros)
+
+
+def _observe(name: str, micros: int):
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.observe(micros)
+
+
+def histogram_summary() -> Dict[str, Dict[str, Any]]:
+    """
+    Souhrn histogramů podle fází (prázdný, pokud agregace neběží)
+    """
+    with _lock:
+        if not _histograms:
+            return {}
+        return {name: histogram.summary() for name, histogram in _histograms.items()}
+
+
+def emit_summary(**meta) -> Optional[Dict[str, Any]]:
+    """
+    Zapíše souhrn histogramů do kanálu (volá worker na konci běhu)
+    """
+    summary = histogram_summary()
+    if not summary:
+        return None
+    record = {'ts': time.time(), 'type': 'histogram', **meta, 'stages': summary}
+    with _lock:
+        if _channel is not None:
+            _channel.write(json.dumps(record) + '\n')
+    return record
+
+
+configure(os.environ.get('BOHEMIKA_TRACE'),
+          os.environ.get('BOHEMIKA_TRACE_HISTOGRAMS', '') not in ('', '0'))
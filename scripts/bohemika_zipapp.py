@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Sestaví volitelný zipapp s CLI filleru (jeden soubor .pyz)
+
+Archiv obsahuje jen moduly potřebné pro jednorázové vyplnění a jejich
+předkompilovaný bytecode (.pyc), takže interpret při startu nic
+nekompiluje a nehledá moduly na disku. Knihovny (PyMuPDF, pypdf) se
+nebalí - zůstávají nainstalované v prostředí.
+
+Použití:
+    python bohemika_zipapp.py [--out build/bohemika_fill.pyz] [--backend fitz|pypdf]
+    python build/bohemika_fill.pyz <json_file_or_json_data>
+"""
+
+import argparse
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).parent
+
+# Moduly CLI a jejich lehké závislosti
+MODULES = {
+    'fitz': ['fill_bohemika_pdf_fitz', 'bohemika_manifest', 'bohemika_profile', 'bohemika_trace'],
+    'pypdf': ['fill_bohemika_pdf', 'bohemika_profile', 'bohemika_trace'],
+}
+
+MAIN_TEMPLATE = """import {module}
+
+{module}.main()
+"""
+
+
+def build_zipapp(output_path: str, backend: str = 'fitz') -> Path:
+    """
+    Vytvoří .pyz archiv s CLI pro zvolený backend
+
+    Returns:
+        Path: Cesta k archivu
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as staging:
+        staging = Path(staging)
+        for module in MODULES[backend]:
+            source = staging / f"{module}.py"
+            shutil.copy2(SCRIPTS_DIR / f"{module}.py", source)
+            # Bytecode vedle zdroje (legacy umístění) - zipimport ho použije přednostně;
+            # neověřovaný hash, protože časy souborů v zipu nejsou spolehlivé.
+            # Jiná verze Pythonu .pyc odmítne a načte zdroj.
+            py_compile.compile(str(source), cfile=str(staging / f"{module}.pyc"), doraise=True,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+        (staging / '__main__.py').write_text(MAIN_TEMPLATE.format(module=MODULES[backend][0]), encoding='utf-8')
+        zipapp.create_archive(staging, output_path, interpreter='/usr/bin/env python3')
+    return output_path
+
+
+def main():
+    """Hlavní funkce pro CLI použití"""
+    parser = argparse.ArgumentParser(description="Sestaví zipapp Bohemika filleru")
+    parser.add_argument('--out', default='build/bohemika_fill.pyz', help="Výstupní .pyz soubor")
+    parser.add_argument('--backend', choices=sorted(MODULES), default='fitz')
+    args = parser.parse_args()
+
+    path = build_zipapp(args.out, args.backend)
+    print(f"Built {path} ({path.stat().st_size} bytes)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
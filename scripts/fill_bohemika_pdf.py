@@ -10,15 +10,31 @@ import base64
 from pathlib import Path
 import tempfile
 import os
+import time
 
-try:
-    import pypdf
-    from pypdf import PdfWriter, PdfReader
-except ImportError:
-    print("Error: pypdf library not installed. Run: pip install pypdf")
-    sys.exit(1)
+from bohemika_profile import split_profile_args, start_profiler
+from bohemika_trace import NULL_TRACE, start_trace
 
-def fill_bohemika_pdf(form_data, template_path, output_path):
+# DEBUG výpisy jen na vyžádání - fill-pdf.ts bere jakýkoli stderr jako chybu
+DEBUG = os.environ.get('BOHEMIKA_DEBUG', '') not in ('', '0')
+
+
+def debug(message):
+    if DEBUG:
+        print(f"DEBUG: {message}", file=sys.stderr)
+
+
+def import_pypdf():
+    """Importuje pypdf až při vyplňování (rychlejší start CLI)"""
+    try:
+        from pypdf import PdfWriter, PdfReader
+    except ImportError:
+        print("Error: pypdf library not installed. Run: pip install pypdf")
+        sys.exit(1)
+    return PdfReader, PdfWriter
+
+
+def fill_bohemika_pdf(form_data, template_path, output_path, trace=NULL_TRACE):
     """
     Vyplní Bohemika PDF formulář s poskytnutými daty
     
@@ -26,34 +42,39 @@ def fill_bohemika_pdf(form_data, template_path, output_path):
         form_data (dict): Data pro vyplnění formuláře
         template_path (str): Cesta k šabloně PDF
         output_path (str): Cesta k výstupnímu souboru
+        trace: Měření fází (viz bohemika_trace.py)
     """
     try:
-        print(f"DEBUG: Reading template from: {template_path}", file=sys.stderr)
+        debug(f"Reading template from: {template_path}")
         # Načteme šablonu PDF
-        reader = PdfReader(template_path)
-        writer = PdfWriter()
+        with trace.stage('template_load'):
+            PdfReader, PdfWriter = import_pypdf()
+            reader = PdfReader(template_path)
+            writer = PdfWriter()
         
-        print(f"DEBUG: Template has {len(reader.pages)} pages", file=sys.stderr)
+            debug(f"Template has {len(reader.pages)} pages")
         
-        # Zkopírujeme všechny stránky
-        for page in reader.pages:
-            writer.add_page(page)
+            # Zkopírujeme všechny stránky
+            for page in reader.pages:
+                writer.add_page(page)
         
         # Zjistíme dostupná pole v PDF
-        if "/AcroForm" in reader.trailer["/Root"]:
-            acro_form = reader.trailer["/Root"]["/AcroForm"]
-            if "/Fields" in acro_form:
-                fields = acro_form["/Fields"]
-                print(f"DEBUG: Found {len(fields)} fields in PDF", file=sys.stderr)
-                for field in fields:
-                    field_obj = field.get_object()
-                    if "/T" in field_obj:
-                        field_name = field_obj["/T"]
-                        print(f"DEBUG: Field name: {field_name}", file=sys.stderr)
-        else:
-            print("DEBUG: No AcroForm found in PDF", file=sys.stderr)
+        with trace.stage('field_discovery'):
+            if "/AcroForm" in reader.trailer["/Root"]:
+                acro_form = reader.trailer["/Root"]["/AcroForm"]
+                if "/Fields" in acro_form:
+                    fields = acro_form["/Fields"]
+                    debug(f"Found {len(fields)} fields in PDF")
+                    for field in fields:
+                        field_obj = field.get_object()
+                        if "/T" in field_obj:
+                            field_name = field_obj["/T"]
+                            debug(f"Field name: {field_name}")
+            else:
+                debug("No AcroForm found in PDF")
         
         # Mapování polí z form_data na PDF pole (podle skutečných názvů v PDF)
+        mapping_started = time.perf_counter()
         field_mapping = {
             # Klient sekce
             'fill_11': form_data.get('fill_11', ''),  # Jméno a příjmení
@@ -81,28 +102,32 @@ def fill_bohemika_pdf(form_data, template_path, output_path):
             'dne': form_data.get('dne', ''),
         }
         
-        print(f"DEBUG: Trying to fill fields: {list(field_mapping.keys())}", file=sys.stderr)
+        trace.add('mapping', time.perf_counter() - mapping_started)
+        debug(f"Trying to fill fields: {list(field_mapping.keys())}")
         
         # Vyplníme pole - zkusíme různé metody
         try:
             # Nejdříve zkopírujeme form data z readeru do writeru
             if "/AcroForm" in reader.trailer["/Root"]:
-                writer.clone_reader_document_root(reader)
-                # Nyní zkusíme vyplnit pole
-                for page_num in range(len(writer.pages)):
-                    page = writer.pages[page_num]
-                    writer.update_page_form_field_values(page, field_mapping)
-                print("DEBUG: Used update_page_form_field_values with cloned form", file=sys.stderr)
+                with trace.stage('template_load'):
+                    writer.clone_reader_document_root(reader)
+                # Nyní zkusíme vyplnit pole (pypdf generuje vzhled v témže volání)
+                with trace.stage('field_fill'):
+                    for page_num in range(len(writer.pages)):
+                        page = writer.pages[page_num]
+                        writer.update_page_form_field_values(page, field_mapping)
+                debug("Used update_page_form_field_values with cloned form")
             else:
-                print("DEBUG: No AcroForm found in PDF - cannot fill fields", file=sys.stderr)
+                debug("No AcroForm found in PDF - cannot fill fields")
                 return False
         except Exception as e:
-            print(f"DEBUG: Form filling failed: {e}", file=sys.stderr)
-            print("DEBUG: Continuing without field filling - saving empty PDF", file=sys.stderr)
+            debug(f"Form filling failed: {e}")
+            debug("Continuing without field filling - saving empty PDF")
         
         # Uložíme výsledek
-        with open(output_path, "wb") as output_file:
-            writer.write(output_file)
+        with trace.stage('serialization'):
+            with open(output_path, "wb") as output_file:
+                writer.write(output_file)
             
         return True
         
@@ -112,59 +137,64 @@ def fill_bohemika_pdf(form_data, template_path, output_path):
 
 def main():
     """Hlavní funkce pro CLI použití"""
-    if len(sys.argv) < 2:
-        print("Usage: python fill_bohemika_pdf.py <json_file_or_json_data>")
+    args, profile_options = split_profile_args(sys.argv[1:])
+    if not args:
+        print("Usage: python fill_bohemika_pdf.py <json_file_or_json_data> [--profile [cprofile|sample]] [--profile-out FILE]")
         sys.exit(1)
     
-    try:
-        # Načteme JSON data z argumentu (buď soubor nebo přímo JSON string)
-        arg = sys.argv[1]
-        if os.path.isfile(arg):
-            # Je to soubor - načteme z něj
-            with open(arg, 'r', encoding='utf-8') as f:
-                form_data = json.load(f)
-            print(f"DEBUG: Loaded data from file: {arg}", file=sys.stderr)
-        else:
-            # Je to JSON string
-            form_data = json.loads(arg)
-            print(f"DEBUG: Parsed JSON string", file=sys.stderr)
+    with start_profiler(profile_options):
+        try:
+            # Načteme JSON data z argumentu (buď soubor nebo přímo JSON string)
+            arg = args[0]
+            if os.path.isfile(arg):
+                # Je to soubor - načteme z něj
+                with open(arg, 'r', encoding='utf-8') as f:
+                    form_data = json.load(f)
+                debug(f"Loaded data from file: {arg}")
+            else:
+                # Je to JSON string
+                form_data = json.loads(arg)
+                debug("Parsed JSON string")
         
-        print(f"DEBUG: Form data: {form_data}", file=sys.stderr)
+            debug(f"Form data: {form_data}")
+            trace = start_trace(backend='pypdf', template='bohemika_template.pdf', entry='fill_bohemika_pdf')
         
-        # Najdeme šablonu PDF (v public složce)
-        script_dir = Path(__file__).parent
-        template_path = script_dir.parent / "public" / "bohemika_template.pdf"
-        print(f"DEBUG: Template path: {template_path}", file=sys.stderr)
-        print(f"DEBUG: Template exists: {template_path.exists()}", file=sys.stderr)
-        template_path = script_dir.parent / "public" / "bohemika_template.pdf"
+            # Najdeme šablonu PDF (v public složce)
+            script_dir = Path(__file__).parent
+            template_path = script_dir.parent / "public" / "bohemika_template.pdf"
+            debug(f"Template path: {template_path}")
+            debug(f"Template exists: {template_path.exists()}")
+            template_path = script_dir.parent / "public" / "bohemika_template.pdf"
         
-        if not template_path.exists():
-            print(f"Error: Template not found at {template_path}")
-            sys.exit(1)
+            if not template_path.exists():
+                print(f"Error: Template not found at {template_path}")
+                sys.exit(1)
         
-        # Vytvoříme dočasný výstupní soubor
-        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-            output_path = temp_file.name
+            # Vytvoříme dočasný výstupní soubor
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+                output_path = temp_file.name
         
-        # Vyplníme PDF
-        success = fill_bohemika_pdf(form_data, str(template_path), output_path)
+            # Vyplníme PDF
+            success = fill_bohemika_pdf(form_data, str(template_path), output_path, trace)
         
-        if success:
-            # Přečteme vyplněný PDF a vrátíme jako base64
-            with open(output_path, 'rb') as f:
-                pdf_content = f.read()
-                pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
+            if success:
+                # Přečteme vyplněný PDF a vrátíme jako base64
+                with trace.stage('encoding'):
+                    with open(output_path, 'rb') as f:
+                        pdf_content = f.read()
+                        pdf_base64 = base64.b64encode(pdf_content).decode('utf-8')
                 print(pdf_base64)
-        else:
-            print("Error: Failed to fill PDF")
-            sys.exit(1)
+                trace.finish(size=len(pdf_content))
+            else:
+                print("Error: Failed to fill PDF")
+                sys.exit(1)
             
-        # Vyčistíme dočasný soubor
-        os.unlink(output_path)
+            # Vyčistíme dočasný soubor
+            os.unlink(output_path)
         
-    except Exception as e:
-        print(f"Error: {e}")
-        sys.exit(1)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -8,9 +8,22 @@ import json
 import base64
 import os
 import tempfile
-import fitz  # PyMuPDF
+import time
 
-def fill_pdf_with_fitz(template_path, output_path, form_data):
+from bohemika_manifest import fields_by_page, import_fitz, load_manifest
+from bohemika_profile import split_profile_args, start_profiler
+from bohemika_trace import NULL_TRACE, start_trace
+
+# DEBUG výpisy jen na vyžádání - fill-pdf.ts bere jakýkoli stderr jako chybu
+DEBUG = os.environ.get('BOHEMIKA_DEBUG', '') not in ('', '0')
+
+
+def debug(message):
+    if DEBUG:
+        print(f"DEBUG: {message}", file=sys.stderr)
+
+
+def fill_pdf_with_fitz(template_path, output_path, form_data, trace=NULL_TRACE):
     """
     Vyplní PDF formulář pomocí PyMuPDF
     
@@ -18,24 +31,22 @@ def fill_pdf_with_fitz(template_path, output_path, form_data):
         template_path (str): Cesta k šabloně PDF
         output_path (str): Cesta k výstupnímu souboru
         form_data (dict): Data pro vyplnění formuláře
+        trace: Měření fází (viz bohemika_trace.py)
     """
+    doc = None
     try:
-        print(f"DEBUG: Reading template from: {template_path}", file=sys.stderr)
+        debug(f"Reading template from: {template_path}")
         
-        # Otevřeme PDF
-        doc = fitz.open(template_path)
-        print(f"DEBUG: Template has {len(doc)} pages", file=sys.stderr)
-        
-        # Najdeme všechna pole
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            widgets = list(page.widgets())
-            print(f"DEBUG: Page {page_num} has {len(widgets)} widgets", file=sys.stderr)
-            
-            for widget in widgets:
-                print(f"DEBUG: Widget field name: '{widget.field_name}', type: {widget.field_type}", file=sys.stderr)
+        # Otevřeme PDF (PyMuPDF se importuje až tady)
+        with trace.stage('template_load'):
+            fitz = import_fitz()
+            with open(template_path, 'rb') as f:
+                template_bytes = f.read()
+            doc = fitz.open(stream=template_bytes, filetype="pdf")
+        debug(f"Template has {len(doc)} pages")
         
         # Mapování polí
+        mapping_started = time.perf_counter()
         field_mapping = {
             # Klient sekce
             'fill_11': form_data.get('fill_11', ''),  # Jméno a příjmení
@@ -63,85 +74,120 @@ def fill_pdf_with_fitz(template_path, output_path, form_data):
             'dne': form_data.get('dne', ''),
         }
         
-        print(f"DEBUG: Trying to fill fields: {list(field_mapping.keys())}", file=sys.stderr)
+        trace.add('mapping', time.perf_counter() - mapping_started)
+        debug(f"Trying to fill fields: {list(field_mapping.keys())}")
+        
+        # Najdeme pole - z předkompilovaného manifestu jen ta s hodnotou,
+        # bez manifestu projdeme všechny widgety
+        # Stránky držíme v seznamu - widget bez živé stránky nejde aktualizovat
+        with trace.stage('field_discovery'):
+            pages = list(doc)
+            manifest = load_manifest(template_path, template_bytes)
+            if manifest is not None:
+                wanted = {name for name, value in field_mapping.items() if value}
+                selected = fields_by_page(manifest, wanted)
+                page_widgets = [
+                    [pages[page_num].load_widget(field['xref']) for field in selected.get(page_num, [])]
+                    for page_num in range(len(pages))
+                ]
+            else:
+                page_widgets = [list(page.widgets()) for page in pages]
+        debug(f"Field manifest: {'yes' if manifest is not None else 'no'}")
+        for page_num, widgets in enumerate(page_widgets):
+            debug(f"Page {page_num} has {len(widgets)} widgets")
+            
+            for widget in widgets:
+                debug(f"Widget field name: '{widget.field_name}', type: {widget.field_type}")
         
         # Vyplníme pole
         filled_count = 0
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            widgets = list(page.widgets())
-            
+        for widgets in page_widgets:
             for widget in widgets:
                 field_name = widget.field_name
                 if field_name in field_mapping:
                     value = field_mapping[field_name]
                     if value:
                         try:
+                            started = time.perf_counter()
                             widget.field_value = str(value)
+                            filled = time.perf_counter()
                             widget.update()
+                            updated = time.perf_counter()
+                            trace.add('field_fill', filled - started)
+                            trace.add('appearance', updated - filled)
+                            trace.field(field_name, updated - started)
                             filled_count += 1
-                            print(f"DEBUG: Filled field '{field_name}' with value '{value}'", file=sys.stderr)
+                            debug(f"Filled field '{field_name}' with value '{value}'")
                         except Exception as e:
-                            print(f"DEBUG: Failed to fill field '{field_name}': {e}", file=sys.stderr)
+                            debug(f"Failed to fill field '{field_name}': {e}")
         
-        print(f"DEBUG: Successfully filled {filled_count} fields", file=sys.stderr)
+        debug(f"Successfully filled {filled_count} fields")
         
         # Uložíme PDF
-        doc.save(output_path)
-        doc.close()
+        with trace.stage('serialization'):
+            doc.save(output_path)
         
-        print(f"DEBUG: PDF saved to: {output_path}", file=sys.stderr)
+        debug(f"PDF saved to: {output_path}")
         return True
         
     except Exception as e:
         print(f"ERROR: {e}", file=sys.stderr)
         return False
+    finally:
+        # Dokument se zavírá i při chybě - v dlouho běžícím procesu by jinak zůstal v paměti
+        if doc is not None:
+            doc.close()
 
 def main():
     """Hlavní funkce pro CLI použití"""
-    if len(sys.argv) < 2:
-        print("Usage: python fill_bohemika_pdf_fitz.py <json_file_or_json_data>")
+    args, profile_options = split_profile_args(sys.argv[1:])
+    if not args:
+        print("Usage: python fill_bohemika_pdf_fitz.py <json_file_or_json_data> [--profile [cprofile|sample]] [--profile-out FILE]")
         sys.exit(1)
     
-    try:
-        # Načteme JSON data z argumentu (buď soubor nebo přímo JSON string)
-        json_input = sys.argv[1]
+    with start_profiler(profile_options):
+        try:
+            # Načteme JSON data z argumentu (buď soubor nebo přímo JSON string)
+            json_input = args[0]
         
-        if os.path.isfile(json_input):
-            # Je to soubor
-            with open(json_input, 'r', encoding='utf-8') as f:
-                form_data = json.load(f)
-        else:
-            # Je to JSON string
-            form_data = json.loads(json_input)
+            if os.path.isfile(json_input):
+                # Je to soubor
+                with open(json_input, 'r', encoding='utf-8') as f:
+                    form_data = json.load(f)
+            else:
+                # Je to JSON string
+                form_data = json.loads(json_input)
         
-        print(f"DEBUG: Loaded form data: {form_data}", file=sys.stderr)
+            debug(f"Loaded form data: {form_data}")
+            trace = start_trace(backend='fitz', template='bohemika_template.pdf', entry='fill_bohemika_pdf_fitz')
         
-        # Cesty k souborům
-        template_path = "public/bohemika_template.pdf"
-        # Používáme systémovou temp složku (cross-platform)
-        temp_dir = tempfile.gettempdir()
-        output_path = os.path.join(temp_dir, f"temp_filled_{os.getpid()}.pdf")
+            # Cesty k souborům
+            template_path = "public/bohemika_template.pdf"
+            # Používáme systémovou temp složku (cross-platform)
+            temp_dir = tempfile.gettempdir()
+            output_path = os.path.join(temp_dir, f"temp_filled_{os.getpid()}.pdf")
         
-        # Vyplníme PDF
-        success = fill_pdf_with_fitz(template_path, output_path, form_data)
+            # Vyplníme PDF
+            success = fill_pdf_with_fitz(template_path, output_path, form_data, trace)
         
-        if success and os.path.exists(output_path):
-            # Přečteme a zakódujeme do base64
-            with open(output_path, "rb") as f:
-                pdf_content = f.read()
-                encoded = base64.b64encode(pdf_content).decode('utf-8')
+            if success and os.path.exists(output_path):
+                # Přečteme a zakódujeme do base64
+                with trace.stage('encoding'):
+                    with open(output_path, "rb") as f:
+                        pdf_content = f.read()
+                        encoded = base64.b64encode(pdf_content).decode('utf-8')
                 print(encoded)  # Výstup pro frontend
+                trace.finish(size=len(pdf_content))
             
-            # Smažeme dočasný soubor
-            os.remove(output_path)
-        else:
-            print("ERROR: Failed to generate PDF", file=sys.stderr)
-            sys.exit(1)
+                # Smažeme dočasný soubor
+                os.remove(output_path)
+            else:
+                print("ERROR: Failed to generate PDF", file=sys.stderr)
+                sys.exit(1)
             
-    except Exception as e:
-        print(f"ERROR: {e}", file=sys.stderr)
-        sys.exit(1)
+        except Exception as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test manifestu clusteru - každý záznam právě jednou
+
+Několik lokálních workerů zpracuje jednu úlohu, přičemž:
+  - část záznamů je hotová už z dřívějšího běhu (bez řádku v manifestu)
+  - jeden rozsah je ukradený a oba uzly "spadly" (vypršený nárok)
+  - jeden záznam selže a znovu se naplánuje přes retry
+Klíče manifestu musí přesně odpovídat klíčům záznamů, bez duplicit.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from bohemika_cluster import ClusterQueue, _local_worker
+
+RECORDS = 40
+WORKERS = 3
+DONE_BEFORE = (3, 4, 5)
+
+
+def _run_workers(db_path: str, job_id: str):
+    processes = [multiprocessing.Process(target=_local_worker, args=(db_path, job_id, f"local-{i}"))
+                 for i in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0, f"worker skončil s kódem {process.exitcode}"
+
+
+def _check_manifest(queue: ClusterQueue, job_id: str, record_keys: set):
+    keys = [row['record_key'] for row in queue.manifest(job_id)]
+    assert len(keys) == len(set(keys)), "duplicitní řádky v manifestu"
+    missing = sorted(record_keys - set(keys))
+    assert set(keys) == record_keys, f"manifest neodpovídá záznamům, chybí {missing}"
+
+
+def test_cluster_manifest():
+    """Test úplnosti manifestu (exactly-once) včetně krádeže a opakování"""
+    print(f"=== Test manifestu clusteru ({RECORDS} záznamů, {WORKERS} workery) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / 'jobs.sqlite')
+        queue = ClusterQueue(db_path)
+        try:
+            records = [{'_key': f"r{i:03d}", 'fill_11': f"Jan Novák {i}"} for i in range(RECORDS)]
+            job_id = queue.submit(records, str(Path(tmp) / 'out'))
+            job = queue.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            output_dir = Path(job['output_dir'])
+            output_dir.mkdir(parents=True)
+            record_keys = {row[0] for row in queue.conn.execute(
+                "SELECT record_key FROM records WHERE job_id = ?", (job_id,))}
+
+            # Záznamy hotové z dřívějšího běhu (bohemika_jobs.py work)
+            for seq in DONE_BEFORE:
+                record = queue.conn.execute(
+                    "SELECT * FROM records WHERE job_id = ? AND seq = ?", (job_id, seq)).fetchone()
+                result = ClusterQueue._fill(job, record, output_dir)
+                with queue.conn:
+                    queue.conn.execute(
+                        "UPDATE records SET status = 'done', output_path = ?, sha256 = ?, size = ? "
+                        "WHERE job_id = ? AND seq = ?",
+                        (result['output_path'], result['sha256'], result['size'], job_id, seq))
+
+            # Jeden shard, ukradená horní polovina, oba vlastníci spadli
+            assert queue.plan(job_id, shard_size=RECORDS) == 1
+            assert queue.claim(job_id, 'slow') is not None
+            thief = ClusterQueue(db_path)
+            try:
+                thief._register_node(job_id, 'thief')
+                assert thief.claim(job_id, 'thief') is not None
+            finally:
+                thief.close()
+            with queue.conn:
+                queue.conn.execute("UPDATE shards SET lease_until = 0 WHERE job_id = ?", (job_id,))
+            assert queue.conn.execute(
+                "SELECT COUNT(*) FROM shards WHERE job_id = ?", (job_id,)).fetchone()[0] == 2
+
+            _run_workers(db_path, job_id)
+            _check_manifest(queue, job_id, record_keys)
+            print(f"✅ manifest: {len(record_keys)} záznamů, každý jednou")
+
+            # Selhání: záznam se vrátí do fronty přes retry a znovu se vyplní
+            with queue.conn:
+                queue.conn.execute(
+                    "UPDATE records SET status = 'failed', error = 'test' WHERE job_id = ? AND seq = 7",
+                    (job_id,))
+                queue.conn.execute(
+                    "DELETE FROM manifest WHERE job_id = ? AND record_key = 'r007'", (job_id,))
+            assert queue.retry(job_id) == 1
+            _run_workers(db_path, job_id)
+            _check_manifest(queue, job_id, record_keys)
+            assert all(os.path.exists(row['output_path']) for row in queue.manifest(job_id))
+            assert queue.progress(job_id)['failed'] == 0
+            print("✅ selhaný záznam znovu naplánován a doplněn do manifestu")
+        finally:
+            queue.close()
+
+
+if __name__ == "__main__":
+    try:
+        test_cluster_manifest()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test rozpočtu studeného startu CLI filleru
+
+Spustí `python -X importtime` nad moduly CLI a ověří, že:
+  - import modulu nenačte PyMuPDF ani pypdf (backend se importuje líně)
+  - kumulativní doba importu modulu je pod rozpočtem
+
+Rozpočet v ms lze změnit proměnnou COLD_START_BUDGET_MS. Bere se nejlepší
+z několika běhů, aby test neshazoval šum sdíleného stroje.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent
+
+BUDGET_MS = float(os.environ.get('COLD_START_BUDGET_MS', '80'))
+RUNS = 5
+MODULES = ['fill_bohemika_pdf_fitz', 'fill_bohemika_pdf']
+# Knihovny, které se nesmí načíst už při importu CLI
+FORBIDDEN = ('fitz', 'pymupdf', 'pypdf', 'http.server', 'cProfile', 'pstats')
+
+
+def import_times(module):
+    """Vrátí {modul: kumulativní µs} z jednoho běhu -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=str(scripts_dir), capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cold_start():
+    """Test rozpočtu importu CLI modulů"""
+    print(f"=== Test studeného startu (rozpočet {BUDGET_MS:.0f} ms) ===")
+    failures = []
+    for module in MODULES:
+        runs = [import_times(module) for _ in range(RUNS)]
+        loaded = [name for name in FORBIDDEN if name in runs[0]]
+        best_ms = min(times[module] for times in runs) / 1000
+        if loaded:
+            print(f"❌ {module}: při importu se načítá {', '.join(loaded)}")
+            failures.append(f"{module} imports {', '.join(loaded)}")
+        if best_ms > BUDGET_MS:
+            slowest = sorted(runs[0].items(), key=lambda item: -item[1])[1:6]
+            print(f"❌ {module}: import {best_ms:.1f} ms > {BUDGET_MS:.0f} ms")
+            for name, micros in slowest:
+                print(f"   {name}: {micros / 1000:.1f} ms")
+            failures.append(f"{module} import {best_ms:.1f} ms > {BUDGET_MS:.0f} ms")
+        elif not loaded:
+            print(f"✅ {module}: import {best_ms:.1f} ms")
+    assert not failures, '; '.join(failures)
+
+
+if __name__ == "__main__":
+    try:
+        test_cold_start()
+    except AssertionError:
+        sys.exit(1)
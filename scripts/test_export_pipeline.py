@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test chybových cest exportní pipeline (bohemika_export.run_pipeline)
+
+Ověří, že:
+  - chyba vyplnění jednoho záznamu dávku nepřeruší a záznam se nahlásí
+  - po chybě zápisu se čtecí vlákno zastaví a vstupní generátor se uzavře
+  - archiv se při výjimce nedokončí a rozepsaný soubor se smaže
+"""
+
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from bohemika_archive import open_sink, read_manifest
+from bohemika_export import run_pipeline
+
+RECORDS = 200
+
+
+def _fill(record, template_path, backend):
+    if record['_key'] == 'r003':
+        raise ValueError("bad record")
+    return b'%PDF-' + record['_key'].encode('ascii')
+
+
+def _source(closed: list):
+    try:
+        for i in range(RECORDS):
+            yield {'_key': f"r{i:03d}"}
+    finally:
+        closed.append(True)
+
+
+def test_export_pipeline():
+    """Test chyb vyplnění, zápisu a přerušeného archivu"""
+    print("=== Test chybových cest exportní pipeline ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Chyba vyplnění: záznam se přeskočí a nahlásí
+        archive = str(Path(tmp) / 'ok.zip')
+        failures = []
+        with open_sink(archive) as sink:
+            count = run_pipeline(_source([]), sink.write, fill=_fill, failures=failures)
+        assert count == RECORDS - 1 and failures == [{'key': 'r003', 'error': 'ValueError: bad record'}]
+        assert len(read_manifest(archive)) == RECORDS - 1
+        print(f"✅ chyba vyplnění: {count} záznamů zapsáno, 1 nahlášen")
+
+        # Chyba zápisu: pipeline skončí výjimkou bez visícího čtecího vlákna
+        def broken_write(key, pdf_bytes):
+            raise OSError("disk full")
+
+        closed = []
+        threads = threading.active_count()
+        try:
+            run_pipeline(_source(closed), broken_write, fill=_fill, queue_size=2)
+            raise AssertionError("chyba zápisu se neprojevila")
+        except OSError:
+            pass
+        assert closed, "vstupní generátor zůstal otevřený"
+        assert threading.active_count() == threads, "vlákno pipeline stále běží"
+        print("✅ chyba zápisu: čtecí vlákno zastaveno, vstup uzavřen")
+
+        # Výjimka uvnitř with: archiv se nedokončí
+        archive = str(Path(tmp) / 'partial.zip')
+        try:
+            with open_sink(archive) as sink:
+                sink.write('r000', b'%PDF-r000')
+                raise RuntimeError("přerušeno")
+        except RuntimeError:
+            pass
+        assert not os.path.exists(archive), "rozepsaný archiv zůstal na disku"
+        print("✅ přerušený archiv smazán")
+
+
+if __name__ == "__main__":
+    try:
+        test_export_pipeline()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
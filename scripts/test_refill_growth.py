@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test přírůstku PDF při inkrementální úpravě (bohemika_refill.py)
+
+Vyplní šablonu, dvakrát po sobě změní jedno pole s diakritikou a ověří, že
+každá úprava zvětší soubor jen o pár stovek bajtů - vzhled pole musí použít
+písmo, které už v PDF je, a ne vkládat novou kopii (~44 kB).
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from bohemika_engine import TEMPLATE_PATH, fill_record
+from bohemika_manifest import import_fitz
+from bohemika_refill import refill_file
+
+MAX_GROWTH = 5000
+VALUES = ['1 Kč', '2 Kč']
+
+
+def test_refill_growth():
+    """Test přírůstku dvou po sobě jdoucích úprav s diakritikou"""
+    print(f"=== Test přírůstku inkrementální úpravy (limit {MAX_GROWTH} B) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'refill.pdf'
+        path.write_bytes(fill_record({'fill_11': 'Jan Novák', 'fill_21': '100 Kč'}, TEMPLATE_PATH, 'fitz'))
+        size = os.path.getsize(path)
+        for value in VALUES:
+            assert refill_file(str(path), {'fill_21': value}) == ['fill_21']
+            growth = os.path.getsize(path) - size
+            size += growth
+            print(f"{'✅' if growth < MAX_GROWTH else '❌'} fill_21={value!r}: +{growth} B")
+            assert growth < MAX_GROWTH, f"úprava fill_21={value!r} zvětšila PDF o {growth} B"
+        doc = import_fitz().open(str(path))
+        try:
+            values = {widget.field_name: widget.field_value for widget in doc[0].widgets()}
+        finally:
+            doc.close()
+    assert values['fill_21'] == VALUES[-1] and values['fill_11'] == 'Jan Novák'
+
+
+if __name__ == "__main__":
+    try:
+        test_refill_growth()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test generátoru testovacích dat - rodná čísla syntetických záznamů
+"""
+
+import sys
+
+from create_test_data import generate_records, is_valid_birth_number
+
+COUNT = 2000
+
+
+def test_birth_numbers():
+    """
+    Všechna vygenerovaná rodná čísla musí projít kontrolou (dělitelnost 11,
+    měsíc včetně +50 u žen, den)
+    """
+    print(f"🔍 Kontrola rodných čísel ({COUNT} záznamů)")
+    invalid = [record['fill_12'] for record in generate_records(COUNT, seed=1, long_rate=0.5)
+               if not is_valid_birth_number(record['fill_12'])]
+    nested = [record['zadatel']['rodne_cislo'] for record in generate_records(COUNT, seed=2, nested=True)]
+    invalid += [value for value in nested if not is_valid_birth_number(value)]
+    # Vnořená data musí obsahovat rodná čísla žen i mužů
+    assert any(int(value[2:4]) > 50 for value in nested) and any(int(value[2:4]) <= 12 for value in nested)
+    # Kontrola sama musí chyby odhalit
+    assert not is_valid_birth_number('8010164777') and not is_valid_birth_number('8013164775')
+    assert not invalid, f"Neplatná rodná čísla: {invalid[:5]}"
+    print("✅ Všechna rodná čísla jsou platná")
+
+
+if __name__ == "__main__":
+    try:
+        test_birth_numbers()
+    except AssertionError as e:
+        print(f"❌ {e}")
+        sys.exit(1)